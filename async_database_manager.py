@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+asyncio front end for the Snake Game database.
+
+AsyncSnakeGameDatabaseManager mirrors the player, session, highscore and
+settings methods of SnakeGameDatabaseManager as coroutines, so services
+running on an event loop never block on SQLite.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from database_manager import SnakeGameDatabaseManager, PooledSnakeGameDatabaseManager
+
+
+class AsyncSnakeGameDatabaseManager:
+    """
+    Coroutine versions of the database manager methods.
+
+    Reads run concurrently on a pool of reader threads, each using its own
+    WAL connection from a PooledSnakeGameDatabaseManager. Writes run on a
+    single writer thread, and add_game_session() calls made while a write is
+    in flight are combined into one add_game_sessions_bulk() transaction.
+    """
+
+    READ_METHODS = (
+        "get_player", "get_all_players",
+        "get_game_session", "get_player_game_sessions", "get_player_stats", "get_replay",
+        "get_sessions_with_replays",
+        "get_highscores", "get_player_highscore", "get_player_rank", "get_rank_window",
+        "get_setting", "get_all_settings", "get_settings_snapshot",
+    )
+
+    WRITE_METHODS = (
+        "add_player", "update_player", "delete_player",
+        "add_game_sessions_bulk", "delete_game_session",
+        "add_setting", "set_settings", "delete_setting",
+    )
+
+    def __init__(self, db_file="snake_game.db", readers=4, max_batch=1024, **kwargs):
+        """
+        Initialize the async database manager.
+
+        Args:
+            db_file (str): Path to the SQLite database file
+            readers (int): Number of threads serving reads concurrently
+            max_batch (int): Maximum number of sessions written per transaction
+            **kwargs: Options passed on to PooledSnakeGameDatabaseManager
+        """
+        self.db = PooledSnakeGameDatabaseManager(db_file, pool_size=readers + 1, **kwargs)
+        self.max_batch = max_batch
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._pending_sessions = []
+        self._flush_task = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    def _call(self, name, *args, **kwargs):
+        """Run a manager method, which checks out a pooled connection only if it queries."""
+        return getattr(self.db, name)(*args, **kwargs)
+
+    async def _run(self, executor, name, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, lambda: self._call(name, *args, **kwargs))
+
+    async def add_game_session(self, player_id, score, duration, date_played=None, replay=None):
+        """
+        Add a new game session to the database.
+
+        Sessions submitted while another batch is being written are queued
+        and saved together in the next transaction.
+
+        Args:
+            player_id (int): The player's ID
+            score (int): The score achieved in the game
+            duration (int): The duration of the game in seconds
+            date_played (str, optional): Date and time the game was played
+            replay (bytes, optional): Encoded replay of the game
+
+        Returns:
+            int: The ID of the newly created game session, or None if failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending_sessions.append((future, (player_id, score, duration, date_played, replay)))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_sessions())
+        return await future
+
+    async def _flush_sessions(self):
+        """Write queued sessions in batches until the queue is empty."""
+        try:
+            # Let coroutines scheduled in the same loop iteration join the first batch
+            await asyncio.sleep(0)
+            while self._pending_sessions:
+                batch = self._pending_sessions[:self.max_batch]
+                del self._pending_sessions[:self.max_batch]
+                try:
+                    session_ids = await self._run(
+                        self._writer, "add_game_sessions_bulk", [session for _, session in batch]
+                    )
+                except Exception as e:
+                    for future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for i, (future, _) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(session_ids[i] if session_ids else None)
+        finally:
+            self._flush_task = None
+
+    async def flush(self):
+        """Wait until every queued game session has been written."""
+        while self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def close(self):
+        """Write queued sessions, stop the worker threads and close all connections."""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.db.close_all()
+
+
+def _async_method(name, executor_attr):
+    """Build a coroutine that runs the named manager method on the given executor."""
+    method = getattr(SnakeGameDatabaseManager, name)
+
+    @wraps(method)
+    async def coroutine(self, *args, **kwargs):
+        return await self._run(getattr(self, executor_attr), name, *args, **kwargs)
+    return coroutine
+
+
+for _name in AsyncSnakeGameDatabaseManager.READ_METHODS:
+    setattr(AsyncSnakeGameDatabaseManager, _name, _async_method(_name, "_readers"))
+for _name in AsyncSnakeGameDatabaseManager.WRITE_METHODS:
+    setattr(AsyncSnakeGameDatabaseManager, _name, _async_method(_name, "_writer"))
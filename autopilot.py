@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Autopilot for the Snake Game.
+
+An Autopilot picks the next direction for a SnakeEngine, so the curses loop
+can use it in place of the arrow keys for demos and load tests. It heads for
+the food along a shortest path, chases its own tail when eating would leave
+it trapped, and falls back to a Hamiltonian cycle of the board when neither
+is possible.
+
+Usage:
+    python autopilot.py [--sizes 20x60 40x120] [--decisions 20000] [--no-cache]
+"""
+
+import argparse
+import sys
+import time
+
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT
+
+# How often, in ticks, a tail chase stops to check for a safe way to the food
+CHASE_RECHECK_TICKS = 8
+
+
+class Autopilot:
+    """
+    Chooses directions for a SnakeEngine.
+
+    Searches are breadth-first over a flat grid and time-aware: a body cell
+    counts as free from the tick its segment will have moved away, so paths
+    may follow the snake's own tail. A path to the food stays valid until
+    the food is eaten, so it is searched for once per piece of food and then
+    replayed tick by tick; tail-chasing paths are cached the same way. The
+    search buffers are allocated once per board size and cleared in O(1) by
+    bumping a generation stamp, instead of being rebuilt for every search.
+    """
+
+    def __init__(self, cache_paths=True):
+        """
+        Initialize the autopilot.
+
+        Args:
+            cache_paths (bool): Reuse paths between ticks; turning this off
+                searches from scratch every tick, for comparison
+        """
+        self.cache_paths = cache_paths
+        self.decisions = 0
+        self.searches = 0
+        self._size = None
+        self._stalled = 0
+        self._last_food = None
+        self._chasing = False
+        self._chase_ticks = 0
+
+    def _prepare(self, height, width):
+        """Allocate the grid and search buffers for a board size."""
+        self._size = (height, width)
+        self._width = width
+        cells = height * width
+        self._moves = {-width: UP, width: DOWN, -1: LEFT, 1: RIGHT}
+        self._offsets = (-width, width, -1, 1)
+        # Cells the snake dies on, matching SnakeEngine.step()
+        self._wall = bytearray(
+            0 if 0 < y < height - 2 and 0 < x < width - 2 else 1
+            for y in range(height)
+            for x in range(width)
+        )
+        self._stamp = 0
+        self._seen = [0] * cells
+        self._parent = [0] * cells
+        self._body_stamp = [0] * cells
+        self._vacate = [0] * cells
+        self._path = []
+        self._path_goal = None
+        self._expected_head = None
+        self._cycle = None
+        # Ticks without eating after which an unsafe path to the food is taken anyway
+        self._stall_limit = (height - 3) * (width - 3)
+
+    def reset(self):
+        """Forget cached paths, e.g. after a new game starts."""
+        self._path = []
+        self._expected_head = None
+        self._stalled = 0
+
+    def decide(self, engine):
+        """
+        Choose the direction for the engine's next step.
+
+        Args:
+            engine (SnakeEngine): The game to play
+
+        Returns:
+            int: The direction to step in, or None if every move is fatal
+        """
+        if self._size != (engine.height, engine.width):
+            self._prepare(engine.height, engine.width)
+        self.decisions += 1
+        width = self._width
+        head = engine.head[0] * width + engine.head[1]
+        food = engine.food[0] * width + engine.food[1] if engine.food is not None else None
+        if not self.cache_paths or head != self._expected_head:
+            self._path = []
+        if food != self._last_food:
+            self._last_food = food
+            self._stalled = 0
+        else:
+            self._stalled += 1
+
+        if self._path and self._path_goal == food:
+            if not self._chasing:
+                return self._follow(head)
+            self._chase_ticks += 1
+            if self._chase_ticks % CHASE_RECHECK_TICKS:
+                return self._follow(head)
+            # Every few ticks of a chase, see whether the food has become safe
+            path = self._path_to_food([y * width + x for y, x in engine.body], food)
+            if path:
+                self._path, self._chasing = path, False
+            return self._follow(head)
+
+        body = [y * width + x for y, x in engine.body]
+        path = self._path_to_food(body, food)
+        if path:
+            self._path, self._path_goal, self._chasing = path, food, False
+            return self._follow(head)
+
+        # Eating now could trap the snake, so buy time by following the tail
+        # the long way round, which also reshapes the body. Keeping off the
+        # body means the cells the tail leaves behind are still free once the
+        # old tail cell is reached. Go through the food only if there is no
+        # other way.
+        avoid = food
+        path = self._search(body, body[-1], avoid=food, through_body=False)
+        if not path:
+            avoid = None
+            path = self._search(body, body[-1], through_body=False)
+        if path:
+            self._path, self._path_goal = self._lengthen(body, path, avoid), food
+            self._chasing, self._chase_ticks = True, 0
+            return self._follow(head)
+
+        self._path = []
+        self._expected_head = None
+        return self._fallback(body, head)
+
+    def _path_to_food(self, body, food):
+        """
+        Find a path to the food that does not leave the snake trapped.
+
+        Returns:
+            list: The path, as returned by _search(), or None
+        """
+        if food is None:
+            return None
+        path = self._search(body, food)
+        if path and (self._stalled > self._stall_limit or self._safe_after_eating(body, path)):
+            # After circling for a whole board's worth of ticks, a risky
+            # meal beats chasing the tail forever
+            return path
+        return None
+
+    def _follow(self, head):
+        """Take the next cell of the cached path."""
+        cell = self._path.pop()
+        self._expected_head = cell
+        return self._moves[cell - head]
+
+    def _search(self, body, goal, avoid=None, through_body=True):
+        """
+        Find a shortest path from the head to a goal cell.
+
+        Args:
+            body (list): Flat cell indices of the snake, head first
+            goal (int): Flat index of the cell to reach
+            avoid (int, optional): A cell the path must not pass through
+            through_body (bool): Let the path cross body cells once their
+                segments have moved on; otherwise only the tail is passable
+
+        Returns:
+            list: The path's cells from the goal back to the first step
+                (pop() yields them in order), or None if there is none
+        """
+        self.searches += 1
+        self._stamp += 1
+        stamp = self._stamp
+        seen = self._seen
+        parent = self._parent
+        body_stamp = self._body_stamp
+        vacate = self._vacate
+        wall = self._wall
+        offsets = self._offsets
+
+        # The segment i cells behind the head moves away after len(body) - i ticks
+        length = len(body)
+        for i, cell in enumerate(body):
+            body_stamp[cell] = stamp
+            vacate[cell] = length - i if through_body else sys.maxsize
+        vacate[body[-1]] = 1
+        head = body[0]
+        seen[head] = stamp
+        if avoid is not None:
+            seen[avoid] = stamp
+
+        frontier = [head]
+        tick = 0
+        while frontier:
+            tick += 1
+            next_frontier = []
+            for cell in frontier:
+                for offset in offsets:
+                    neighbour = cell + offset
+                    if seen[neighbour] == stamp or wall[neighbour]:
+                        continue
+                    if body_stamp[neighbour] == stamp and vacate[neighbour] > tick:
+                        continue
+                    seen[neighbour] = stamp
+                    parent[neighbour] = cell
+                    if neighbour == goal:
+                        path = [goal]
+                        while parent[path[-1]] != head:
+                            path.append(parent[path[-1]])
+                        return path
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+        return None
+
+    def _lengthen(self, body, path, avoid=None):
+        """
+        Stretch a path by detouring through free cells beside it.
+
+        Each step between two cells is replaced by a three-step detour
+        whenever the two cells next to them on one side are both free, until
+        no more detours fit. Detour cells were empty to begin with, so the
+        longer path is as safe as the original.
+
+        Args:
+            body (list): Flat cell indices of the snake, head first
+            path (list): Path as returned by _search()
+            avoid (int, optional): A cell the detours must not use
+
+        Returns:
+            list: The longer path, in the same order as path
+        """
+        self._stamp += 1
+        stamp = self._stamp
+        seen = self._seen
+        wall = self._wall
+        width = self._width
+        for cell in body:
+            seen[cell] = stamp
+        for cell in path:
+            seen[cell] = stamp
+        if avoid is not None:
+            seen[avoid] = stamp
+
+        out = [body[0]]
+        pending = list(path)
+        while pending:
+            a = out[-1]
+            b = pending[-1]
+            sides = (width, -width) if abs(b - a) == 1 else (1, -1)
+            for offset in sides:
+                c = a + offset
+                d = b + offset
+                if not wall[c] and not wall[d] and seen[c] != stamp and seen[d] != stamp:
+                    seen[c] = seen[d] = stamp
+                    pending.append(d)
+                    pending.append(c)
+                    break
+            else:
+                out.append(pending.pop())
+        return out[:0:-1]
+
+    def _safe_after_eating(self, body, path):
+        """
+        Check that the snake can still reach its tail once it has eaten.
+
+        Args:
+            body (list): Flat cell indices of the snake, head first
+            path (list): Path to the food, as returned by _search()
+
+        Returns:
+            bool: True if a path from the new head to the new tail exists
+        """
+        grown = len(body) + 1
+        new_body = path[:grown]
+        if len(new_body) < grown:
+            new_body.extend(body[:grown - len(new_body)])
+        if len(new_body) == 1:
+            return True
+        return self._search(new_body, new_body[-1], through_body=False) is not None
+
+    def _fallback(self, body, head):
+        """Follow the Hamiltonian cycle, or failing that any move that survives a tick."""
+        if self._cycle is None:
+            self._cycle = self._build_cycle()
+        occupied = set(body[:-1])
+        wall = self._wall
+
+        def open_neighbours(cell):
+            return sum(1 for offset in self._offsets
+                       if not wall[cell + offset] and cell + offset not in occupied)
+
+        successor = self._cycle.get(head)
+        if successor is not None and not wall[successor] and successor not in occupied:
+            return self._moves[successor - head]
+        moves = [head + offset for offset in self._offsets
+                 if not wall[head + offset] and head + offset not in occupied]
+        if not moves:
+            return None
+        return self._moves[max(moves, key=open_neighbours) - head]
+
+    def _build_cycle(self):
+        """
+        Build a Hamiltonian cycle over the playable cells.
+
+        The cycle snakes back and forth along the rows (or the columns, if
+        there is an odd number of rows), leaving the first column (or row)
+        as the way back to the start. A cycle needs an even number of cells,
+        so when both sides are odd the last row is left out.
+
+        Returns:
+            dict: Flat cell index mapped to the next cell on the cycle
+        """
+        height, width = self._size
+        rows = list(range(1, height - 2))
+        cols = list(range(1, width - 2))
+        cell = lambda y, x: y * width + x
+        if len(rows) % 2:
+            if len(cols) % 2 == 0:
+                # Walk the transposed board instead
+                rows, cols = cols, rows
+                cell = lambda x, y: y * width + x
+            else:
+                rows = rows[:-1]
+        if len(rows) < 2 or len(cols) < 2:
+            return {}
+
+        order = []
+        for i, y in enumerate(rows):
+            lane = cols[1:] if i % 2 == 0 else cols[:0:-1]
+            order.extend(cell(y, x) for x in lane)
+        order.extend(cell(y, cols[0]) for y in reversed(rows))
+        return {a: b for a, b in zip(order, order[1:] + order[:1])}
+
+
+def benchmark(height, width, decisions, cache_paths=True, seed=0):
+    """
+    Measure how fast the autopilot plays on a board size.
+
+    Games are restarted as they end until the decision budget is spent.
+
+    Args:
+        height (int): Board height
+        width (int): Board width
+        decisions (int): Number of decisions to time
+        cache_paths (bool): Reuse paths between ticks
+        seed (int): Seed for the first game
+
+    Returns:
+        dict: Decisions per second, searches per decision, games and mean score
+    """
+    pilot = Autopilot(cache_paths=cache_paths)
+    engine = SnakeEngine(height, width, seed=seed)
+    scores = []
+    elapsed = 0.0
+    for _ in range(decisions):
+        start = time.perf_counter()
+        direction = pilot.decide(engine)
+        elapsed += time.perf_counter() - start
+        engine.step(direction)
+        if engine.game_over:
+            scores.append(engine.score)
+            engine = SnakeEngine(height, width, seed=seed + len(scores))
+            pilot.reset()
+    if not scores or engine.ticks:
+        scores.append(engine.score)
+    return {
+        'height': height,
+        'width': width,
+        'decisions_per_second': decisions / max(elapsed, 1e-9),
+        'searches_per_decision': pilot.searches / pilot.decisions,
+        'games': len(scores),
+        'mean_score': sum(scores) / len(scores),
+    }
+
+
+def main(argv=None):
+    """Report autopilot decisions per second against board size."""
+    parser = argparse.ArgumentParser(description="Benchmark the Snake autopilot.")
+    parser.add_argument("--sizes", nargs="+", default=["20x60", "40x120", "80x240", "160x480"],
+                        help="board sizes as HEIGHTxWIDTH")
+    parser.add_argument("--decisions", type=int, default=20000, help="decisions timed per size")
+    parser.add_argument("--no-cache", action="store_true", help="search from scratch every tick")
+    args = parser.parse_args(argv)
+
+    print(f"{'board':>10} {'decisions/s':>12} {'searches/decision':>18} {'games':>6} {'mean score':>11}")
+    for size in args.sizes:
+        height, width = (int(n) for n in size.lower().split("x"))
+        result = benchmark(height, width, args.decisions, cache_paths=not args.no_cache)
+        print(f"{size:>10} {result['decisions_per_second']:>12,.0f} "
+              f"{result['searches_per_decision']:>18.3f} {result['games']:>6} "
+              f"{result['mean_score']:>11,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
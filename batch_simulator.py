@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Vectorized batch simulator for the Snake Game.
+
+Steps N independent games in lockstep with the same rules as SnakeEngine
+(movement, the 180-degree turn guard, wall and self collision, food placement
+and scoring with food_value). Every game is stored in NumPy arrays, so one
+step() call advances all of them without a Python object per game.
+"""
+
+import numpy as np
+
+from snake_engine import RIGHT, DIRECTION_DELTAS, OPPOSITE
+
+_DY = np.array([delta[0] for delta in DIRECTION_DELTAS], dtype=np.int32)
+_DX = np.array([delta[1] for delta in DIRECTION_DELTAS], dtype=np.int32)
+_OPPOSITE = np.array(OPPOSITE, dtype=np.int8)
+
+# Rejection sampling rounds before falling back to scanning the free cells
+_FOOD_SAMPLE_ROUNDS = 4
+
+
+class BatchSnakeSimulator:
+    """
+    N snake games stored as arrays and advanced together.
+
+    Bodies are ring buffers of shape (N, capacity) holding y and x
+    coordinates, with head_idx pointing at the head and length counting back
+    to the tail. An (N, height, width) occupancy grid makes self-collision
+    checks a single gather.
+    """
+
+    def __init__(self, n_games, height, width, food_value=10, seed=None):
+        """
+        Initialize N games on boards of the same size.
+
+        Args:
+            n_games (int): Number of games to simulate
+            height (int): Playfield height, including the border rows
+            width (int): Playfield width, including the border columns
+            food_value (int): Points gained when eating food
+            seed (int, optional): Seed for the simulator's random generator
+        """
+        self.n_games = n_games
+        self.height = height
+        self.width = width
+        self.food_value = food_value
+        self.rng = np.random.default_rng(seed)
+
+        # The snake can occupy rows 1..height-3 and columns 1..width-3
+        self.capacity = (height - 3) * (width - 3)
+        self.body_y = np.zeros((n_games, self.capacity), dtype=np.int32)
+        self.body_x = np.zeros((n_games, self.capacity), dtype=np.int32)
+        self.head_idx = np.zeros(n_games, dtype=np.int64)
+        self.length = np.zeros(n_games, dtype=np.int64)
+        self.grid = np.zeros((n_games, height, width), dtype=np.bool_)
+        self.direction = np.zeros(n_games, dtype=np.int8)
+        self.score = np.zeros(n_games, dtype=np.int64)
+        self.ticks = np.zeros(n_games, dtype=np.int64)
+        self.food_y = np.zeros(n_games, dtype=np.int32)
+        self.food_x = np.zeros(n_games, dtype=np.int32)
+        self.alive = np.zeros(n_games, dtype=np.bool_)
+        self._index = np.arange(n_games)
+
+        self.reset()
+
+    @property
+    def head_y(self):
+        """Head row of every game."""
+        return self.body_y[self._index, self.head_idx]
+
+    @property
+    def head_x(self):
+        """Head column of every game."""
+        return self.body_x[self._index, self.head_idx]
+
+    def reset(self, mask=None):
+        """
+        Start new games, either for all games or only where mask is True.
+
+        Args:
+            mask (np.ndarray, optional): Boolean array selecting games to reset
+        """
+        games = self._index if mask is None else self._index[mask]
+        if games.size == 0:
+            return
+
+        y = self.height // 2
+        x = self.width // 4
+        self.grid[games] = False
+        # Ring buffer holds the tail first, so the head sits at index 2
+        for i in range(3):
+            self.body_y[games, i] = y
+            self.body_x[games, i] = x - 2 + i
+            self.grid[games, y, x - 2 + i] = True
+        self.head_idx[games] = 2
+        self.length[games] = 3
+        self.direction[games] = RIGHT
+        self.score[games] = 0
+        self.ticks[games] = 0
+        self.alive[games] = True
+        self._place_food(games)
+
+    def step(self, directions=None):
+        """
+        Advance every live game by one tick.
+
+        Args:
+            directions (np.ndarray, optional): Direction per game, or -1 to keep
+                the current direction
+
+        Returns:
+            tuple: Boolean arrays (ate, died) for this tick
+        """
+        alive = self.alive
+        games = self._index[alive]
+        if directions is not None:
+            directions = np.asarray(directions)[games]
+            turn = (directions >= 0) & (directions != _OPPOSITE[self.direction[games]])
+            self.direction[games[turn]] = directions[turn]
+
+        head_idx = self.head_idx[games]
+        direction = self.direction[games]
+        hy = self.body_y[games, head_idx] + _DY[direction]
+        hx = self.body_x[games, head_idx] + _DX[direction]
+        ate = (hy == self.food_y[games]) & (hx == self.food_x[games])
+        self.ticks[games] += 1
+
+        # The tail moves out of the way before the head moves in
+        moving = games[~ate]
+        tail_idx = (self.head_idx[moving] - self.length[moving] + 1) % self.capacity
+        self.grid[moving, self.body_y[moving, tail_idx], self.body_x[moving, tail_idx]] = False
+        self.length[games[ate]] += 1
+
+        # Check for collisions with walls (excluding the score display area)
+        wall = (hy <= 0) | (hy >= self.height - 2) | (hx <= 0) | (hx >= self.width - 2)
+        inside = ~wall
+        self_hit = np.zeros_like(wall)
+        self_hit[inside] = self.grid[games[inside], hy[inside], hx[inside]]
+        dead = wall | self_hit
+
+        # Write the new head into the ring buffer
+        head_idx = (head_idx + 1) % self.capacity
+        self.head_idx[games] = head_idx
+        self.body_y[games, head_idx] = hy
+        self.body_x[games, head_idx] = hx
+        self.grid[games[inside], hy[inside], hx[inside]] = True
+
+        self.score[games[ate]] += self.food_value
+        self.alive[games[dead]] = False
+        self._place_food(games[ate])
+
+        ate_all = np.zeros(self.n_games, dtype=np.bool_)
+        died_all = np.zeros(self.n_games, dtype=np.bool_)
+        ate_all[games] = ate
+        # Includes games that ended because food found no free cell
+        died_all[games] = ~self.alive[games]
+        return ate_all, died_all
+
+    def _place_food(self, games):
+        """Place food on a free cell for each of the given games."""
+        pending = games
+        # Use safe boundaries for food (2 cells from borders)
+        for _ in range(_FOOD_SAMPLE_ROUNDS):
+            if pending.size == 0:
+                return
+            fy = self.rng.integers(2, self.height - 2, size=pending.size)
+            fx = self.rng.integers(2, self.width - 2, size=pending.size)
+            free = ~self.grid[pending, fy, fx]
+            self.food_y[pending[free]] = fy[free]
+            self.food_x[pending[free]] = fx[free]
+            pending = pending[~free]
+
+        # Crowded boards: pick uniformly among the remaining free cells
+        for game in pending:
+            region = self.grid[game, 2:self.height - 2, 2:self.width - 2]
+            free_cells = np.flatnonzero(~region)
+            if free_cells.size == 0:
+                # The board is full, so the game ends
+                self.alive[game] = False
+                continue
+            cell = free_cells[self.rng.integers(free_cells.size)]
+            self.food_y[game] = cell // region.shape[1] + 2
+            self.food_x[game] = cell % region.shape[1] + 2
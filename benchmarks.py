@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Snake Game.
+
+Measures the hot paths at several scales:
+- SnakeEngine.step() against snake length
+- create_food() and FreeCellIndex.sample() against how full the board is
+- add_game_session(), get_highscores() and get_player_game_sessions()
+  against the number of game sessions in the database
+
+Every measurement is repeated with fixed seeds and the garbage collector
+off, after an untimed warm-up run. Results are written as JSON and can be
+compared against a saved baseline, failing if any benchmark's best time got
+slower by more than the allowed threshold. The best of several runs is far
+less sensitive to other load on the machine than the median.
+
+Usage:
+    python benchmarks.py [--quick] [--output results.json]
+                         [--baseline baseline.json] [--save-baseline baseline.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from snake_engine import SnakeEngine, FreeCellIndex, create_food, food_area, DOWN
+
+# Increase in best time over the baseline that counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+SNAKE_LENGTHS = (10, 100, 1000, 10000, 100000)
+FILL_RATIOS = (0.1, 0.5, 0.9, 0.99)
+ROW_COUNTS = (10**3, 10**4, 10**5, 10**6, 10**7)
+
+QUICK_SNAKE_LENGTHS = (10, 1000)
+QUICK_FILL_RATIOS = (0.1, 0.9)
+QUICK_ROW_COUNTS = (10**3, 10**4)
+
+
+def measure(operation, number, repeat=7, setup=None):
+    """
+    Time an operation.
+
+    Args:
+        operation (callable): Runs `number` operations, taking setup()'s result if given
+        number (int): Operations performed by one call of operation
+        repeat (int): How many times to time it
+        setup (callable, optional): Untimed preparation run before each repeat
+
+    Returns:
+        dict: Median, min and max seconds per operation, and the counts
+    """
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # Warm up caches and lazily built state before timing
+        operation(setup()) if setup else operation()
+        for _ in range(repeat):
+            state = setup() if setup else None
+            start = time.perf_counter_ns()
+            operation(state) if setup else operation()
+            samples.append((time.perf_counter_ns() - start) / number / 1e9)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def result_key(result):
+    """Identify a benchmark result by its name and parameters, e.g. engine_tick[length=100]."""
+    params = ",".join(f"{name}={value}" for name, value in sorted(result['params'].items()))
+    return f"{result['name']}[{params}]"
+
+
+def _engine_with_snake(length, run, width=64):
+    """
+    Build an engine whose snake has the given length and a clear run ahead.
+
+    The body zigzags across the top rows, and the head points down into
+    `run` empty rows, with the food out of the way.
+    """
+    lane = width - 3
+    rows = -(-length // lane)
+    height = rows + run + 4
+    engine = SnakeEngine(height, width, seed=0)
+
+    cells = []
+    for i in range(length):
+        row, offset = divmod(i, lane)
+        x = 1 + offset if row % 2 == 0 else lane - offset
+        cells.append((1 + row, x))
+    engine.body.clear()
+    engine.body.extend(reversed(cells))
+    engine.occupied = set(cells)
+    engine.direction = DOWN
+    engine._index_free_cells()
+    head_x = engine.head[1]
+    _, bottom, left, right = food_area(height, width)
+    engine.food = (bottom, right if head_x != right else left)
+    engine.free_cells.discard(engine.food)
+    return engine
+
+
+def bench_engine_tick(lengths, run=1000, repeat=7):
+    """Time SnakeEngine.step() as the snake grows."""
+    results = []
+    for length in lengths:
+        def operation(engine):
+            step = engine.step
+            for _ in range(run):
+                step()
+        timing = measure(operation, run, repeat, setup=lambda: _engine_with_snake(length, run))
+        results.append(dict(name="engine_tick", params={'length': length}, **timing))
+    return results
+
+
+def bench_food_placement(fill_ratios, height=40, width=120, number=2000, repeat=7):
+    """Time create_food() and FreeCellIndex.sample() as the board fills up."""
+    top, bottom, left, right = food_area(height, width)
+    cells = [(y, x) for y in range(top, bottom + 1) for x in range(left, right + 1)]
+    results = []
+    for fill in fill_ratios:
+        rng = random.Random(0)
+        occupied = set(rng.sample(cells, int(len(cells) * fill)))
+        index = FreeCellIndex(cell for cell in cells if cell not in occupied)
+
+        def place():
+            for _ in range(number):
+                create_food(height, width, occupied, rng)
+
+        def sample():
+            for _ in range(number):
+                index.sample(rng)
+
+        results.append(dict(name="create_food", params={'fill': fill},
+                            **measure(place, number, repeat)))
+        results.append(dict(name="free_cell_sample", params={'fill': fill},
+                            **measure(sample, number, repeat)))
+    return results
+
+
+def bench_database(row_counts, players=1000, number=200, repeat=7, directory=None, progress=None):
+    """
+    Time the database operations as the game_sessions table grows.
+
+    One database is filled up to each row count in turn, so the largest
+    scale is only loaded once.
+    """
+    from database_manager import SnakeGameDatabaseManager
+
+    directory = tempfile.mkdtemp(prefix="snake-bench-", dir=directory)
+    db = SnakeGameDatabaseManager(os.path.join(directory, "bench.db"), persistent=True)
+    rng = random.Random(0)
+    results = []
+    try:
+        for i in range(players):
+            db.add_player(f"bench{i}")
+        rows = 0
+        for target in sorted(row_counts):
+            if progress:
+                progress(f"loading {target:,} game sessions")
+            while rows < target:
+                batch = min(100000, target - rows)
+                db.add_game_sessions_bulk(
+                    (rng.randint(1, players), rng.randint(0, 5000), rng.randint(1, 600))
+                    for _ in range(batch)
+                )
+                rows += batch
+
+            def add_sessions():
+                for _ in range(number):
+                    db.add_game_session(rng.randint(1, players), rng.randint(0, 5000), 60)
+
+            def highscores():
+                for _ in range(number):
+                    # Time the query itself, not the leaderboard cache
+                    db.leaderboard.invalidate()
+                    db.get_highscores(10)
+
+            def player_sessions():
+                for _ in range(number):
+                    db.get_player_game_sessions(rng.randint(1, players))
+
+            results.append(dict(name="add_game_session", params={'rows': target},
+                                **measure(add_sessions, number, repeat)))
+            results.append(dict(name="get_highscores", params={'rows': target},
+                                **measure(highscores, number, repeat)))
+            results.append(dict(name="get_player_game_sessions", params={'rows': target},
+                                **measure(player_sessions, number, repeat)))
+            # Count the sessions add_game_session() added, warm-up included
+            rows += number * (repeat + 1)
+    finally:
+        db.close_persistent()
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def run_benchmarks(quick=False, row_counts=None, progress=None):
+    """
+    Run the whole suite.
+
+    Args:
+        quick (bool): Use small scales, for a fast check during development
+        row_counts (list, optional): Database sizes to measure instead of the defaults
+        progress (callable, optional): Called with a description of each stage
+
+    Returns:
+        dict: Environment metadata and the list of results
+    """
+    if progress:
+        progress("engine ticks")
+    results = bench_engine_tick(QUICK_SNAKE_LENGTHS if quick else SNAKE_LENGTHS)
+    if progress:
+        progress("food placement")
+    results += bench_food_placement(QUICK_FILL_RATIOS if quick else FILL_RATIOS)
+    results += bench_database(row_counts or (QUICK_ROW_COUNTS if quick else ROW_COUNTS),
+                              progress=progress)
+    return {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results against a baseline run.
+
+    Args:
+        results (dict): Output of run_benchmarks()
+        baseline (dict): An earlier output of run_benchmarks()
+        threshold (float): Allowed relative increase in best time
+
+    Returns:
+        list: (key, baseline time, current time, ratio, regressed) for every
+            benchmark present in both runs, comparing best times
+    """
+    previous = {result_key(result): result for result in baseline['results']}
+    rows = []
+    for result in results['results']:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        before = previous[key]['min']
+        ratio = result['min'] / before if before else float("inf")
+        rows.append((key, before, result['min'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_time(seconds):
+    """Format a per-operation time with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv=None):
+    """Run the benchmarks, save the results and check them against a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the Snake engine and database.")
+    parser.add_argument("--quick", action="store_true", help="small scales only")
+    parser.add_argument("--rows", nargs="+", type=float, help="database sizes, e.g. 1e3 1e5")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as regressed")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        quick=args.quick,
+        row_counts=[int(rows) for rows in args.rows] if args.rows else None,
+        progress=lambda stage: print(f"Running {stage}...", file=sys.stderr),
+    )
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        for result in results['results']:
+            print(f"{result_key(result):<45} {format_time(result['min']):>12} "
+                  f"(median {format_time(result['median'])})")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"{'benchmark':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:<45} {format_time(before):>12} {format_time(after):>12} {ratio - 1:>+8.0%}{flag}")
+    if regressions:
+        print(f"{regressions} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
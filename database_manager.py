@@ -1,6 +1,180 @@
+import math
 import sqlite3
 import os
+import queue
+import re
+import threading
+from contextlib import contextmanager
+from copy import copy
 from datetime import datetime
+from functools import wraps
+
+from migrations import migrate
+from replay import MAX_FOOD_VALUE, is_recordable_food_value
+
+
+# Numbers as str() writes them: no spaces, underscores or non-ASCII digits
+_INT_TEXT = re.compile(r"-?\d+", re.ASCII)
+_FLOAT_TEXT = re.compile(r"-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?", re.ASCII)
+
+
+def parse_setting_value(value):
+    """
+    Parse a setting_value from its text form into a bool, int, float or str.
+    
+    Only the forms set_settings() writes are converted: "true" and "false",
+    integers and finite floats. Anything else, such as "yes", "inf" or
+    "nan", stays a string.
+    
+    Args:
+        value (str): The stored text value
+        
+    Returns:
+        The parsed value
+    """
+    if not isinstance(value, str):
+        return value
+    if value == "true":
+        return True
+    if value == "false":
+        return False
+    if _INT_TEXT.fullmatch(value):
+        return int(value)
+    if _FLOAT_TEXT.fullmatch(value):
+        number = float(value)
+        # Exponents too large for a float overflow to inf
+        if math.isfinite(number):
+            return number
+    return value
+
+
+def _setting_error(setting_name, setting_value):
+    """
+    Check a setting's value before it is stored.
+    
+    food_value must fit in a replay header, so a bad value is refused when it
+    is written rather than found when a game starts.
+    
+    Args:
+        setting_name (str): The name of the setting
+        setting_value (str): The value of the setting, in its stored text form
+        
+    Returns:
+        str: Why the value cannot be stored, or None if it can
+    """
+    if setting_name == "food_value":
+        if not is_recordable_food_value(parse_setting_value(setting_value)):
+            return f"food_value must be a whole number from 0 to {MAX_FOOD_VALUE}, got {setting_value!r}"
+    return None
+
+
+class SettingsSnapshot(dict):
+    """
+    Typed game settings loaded in one query, read like a plain dict.
+    
+    The snapshot remembers the manager's settings version when it was
+    loaded, so is_stale() is a single integer comparison and hot loops can
+    keep reading values without touching the database.
+    """
+
+    def __init__(self, values, version, manager):
+        super().__init__(values)
+        self.version = version
+        self._manager = manager
+
+    def is_stale(self):
+        """
+        Returns:
+            bool: True if settings were written through the manager since loading
+        """
+        return self._manager.settings_version != self.version
+
+
+class LeaderboardCache:
+    """
+    In-process cache of the top highscore rows.
+    
+    The manager's write paths call note_highscore() or invalidate() so the
+    cache never serves stale rows written through the same manager. Writes
+    made by other processes are not seen until the next invalidation.
+    """
+
+    def __init__(self, size=100):
+        """
+        Args:
+            size (int): Number of top rows to keep cached
+        """
+        self.size = size
+        self.rows = None
+        self.complete = False  # True when the table had fewer rows than were fetched
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, limit):
+        """
+        Return up to limit cached rows, or None on a cache miss.
+        
+        Args:
+            limit (int): Number of rows requested
+            
+        Returns:
+            list: Copies of the cached row dictionaries, or None
+        """
+        with self._lock:
+            rows = self.rows
+            if rows is not None and (limit <= len(rows) or self.complete):
+                self.hits += 1
+                return [dict(row) for row in rows[:limit]]
+            self.misses += 1
+            return None
+
+    def store(self, rows, fetched, generation):
+        """
+        Cache freshly queried rows, unless a write invalidated the cache meanwhile.
+        
+        Args:
+            rows (list): Row dictionaries ordered by score
+            fetched (int): The LIMIT the rows were queried with
+            generation (int): The value of self.generation before querying
+        """
+        with self._lock:
+            if generation == self.generation:
+                self.rows = rows
+                self.complete = len(rows) < fetched
+
+    def note_highscore(self, score):
+        """
+        Account for a new highscore row, keeping the cache when the row cannot
+        enter the cached top rows.
+        
+        Args:
+            score (int): The new highscore
+        """
+        with self._lock:
+            rows = self.rows
+            if rows is not None and not self.complete and len(rows) >= self.size \
+                    and score < rows[-1]['score']:
+                return
+            self._invalidate()
+
+    def invalidate(self):
+        """Drop the cached rows."""
+        with self._lock:
+            self._invalidate()
+
+    def _invalidate(self):
+        self.rows = None
+        self.complete = False
+        self.generation += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counters
+        """
+        return {"hits": self.hits, "misses": self.misses}
 
 
 class SnakeGameDatabaseManager:
@@ -9,100 +183,117 @@ class SnakeGameDatabaseManager:
     Handles connections, table creation, and CRUD operations.
     """
 
-    def __init__(self, db_file="snake_game.db"):
+    def __init__(self, db_file="snake_game.db", persistent=False, cache_size_kb=8192,
+                 mmap_size=64 * 1024 * 1024, cached_statements=256, leaderboard_size=100):
         """
         Initialize the database manager with a database file.
         
         Args:
             db_file (str): Path to the SQLite database file
+            persistent (bool): Keep one long-lived, tuned connection open (from
+                first use) instead of connecting and closing around each use
+            cache_size_kb (int): SQLite page cache size in persistent mode
+            mmap_size (int): Bytes of the database to memory-map in persistent mode
+            cached_statements (int): Number of prepared statements to reuse per connection
+            leaderboard_size (int): Number of top highscore rows get_highscores() caches
         """
         self.db_file = db_file
         self.conn = None
         self.cursor = None
-        
-        # Create tables on initialization if they don't exist
-        self.connect()
-        self.create_tables()
-        self.close()
+        self.persistent = persistent
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.leaderboard = LeaderboardCache(leaderboard_size)
+        self.settings_version = 0
+        self._settings_snapshot = None
+        # Nothing touches the database file until the first connection, which
+        # also applies any pending schema migrations; in persistent mode that
+        # first connection is the long-lived one
+        self._schema_ready = False
+
+    def __enter__(self):
+        return self.open_persistent()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_persistent()
+        return False
 
     def connect(self):
         """Establish a connection to the database."""
+        if self.persistent and self.conn:
+            # Reuse the long-lived connection
+            return True
         try:
-            self.conn = sqlite3.connect(self.db_file)
+            self.conn = sqlite3.connect(self.db_file, cached_statements=self.cached_statements)
             self.conn.row_factory = sqlite3.Row  # This enables column access by name
             self.cursor = self.conn.cursor()
-            return True
+            if self.persistent:
+                self._apply_pragmas(self.conn)
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
             return False
+        if self._schema_ready or self.create_tables():
+            return True
+        self.conn.close()
+        self.conn = None
+        self.cursor = None
+        return False
+
+    def _apply_pragmas(self, conn):
+        """Tune a connection for many small writes: WAL journaling, fewer fsyncs, bigger caches."""
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
 
     def close(self):
-        """Close the database connection."""
+        """Close the database connection, unless it is held open in persistent mode."""
+        if self.persistent:
+            return
         if self.conn:
             self.conn.close()
             self.conn = None
             self.cursor = None
 
+    def open_persistent(self):
+        """
+        Switch to persistent mode, opening one tuned connection that connect()
+        and close() then leave alone until close_persistent() is called.
+        
+        Returns:
+            SnakeGameDatabaseManager: This manager, so it can be used in a with statement
+        """
+        if not self.persistent:
+            # Drop any plain connection so the tuned one replaces it
+            self.close()
+            self.persistent = True
+        self.connect()
+        return self
+
+    def close_persistent(self):
+        """Leave persistent mode and close the long-lived connection."""
+        self.persistent = False
+        self.close()
+
     def create_tables(self):
-        """Create all required tables if they don't exist."""
-        if not self.conn:
-            if not self.connect():
-                return False
+        """
+        Bring the schema up to date by applying any pending migrations.
         
-        # Player table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Game Session table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            player_id INTEGER NOT NULL,
-            score INTEGER NOT NULL,
-            date_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            duration INTEGER NOT NULL,  -- in seconds
-            FOREIGN KEY (player_id) REFERENCES players (id) ON DELETE CASCADE
-        )
-        ''')
-        
-        # Create index on player_id for faster lookups
-        self.cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_game_sessions_player_id ON game_sessions (player_id)
-        ''')
-        
-        # Highscores table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS highscores (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            player_id INTEGER NOT NULL,
-            score INTEGER NOT NULL,
-            date_achieved TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (player_id) REFERENCES players (id) ON DELETE CASCADE
-        )
-        ''')
-        
-        # Create index on score for faster highscore lookups
-        self.cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_highscores_score ON highscores (score DESC)
-        ''')
-        
-        # Game Settings table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_settings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            setting_name TEXT UNIQUE NOT NULL,
-            setting_value TEXT NOT NULL,
-            description TEXT
-        )
-        ''')
+        Returns:
+            bool: True if the schema is current, False if migrating failed
+        """
+        if not self.conn:
+            # connect() brings the schema up to date on the first connection
+            return self.connect()
         
-        self.conn.commit()
-        return True
+        try:
+            migrate(self.conn)
+            self._schema_ready = True
+            return True
+        except sqlite3.Error as e:
+            print(f"Error migrating database schema: {e}")
+            return False
     
     # Player CRUD operations
     
@@ -196,6 +387,8 @@ class SnakeGameDatabaseManager:
                 (username, player_id)
             )
             self.conn.commit()
+            # Cached leaderboard rows carry the username
+            self.leaderboard.invalidate()
             return self.cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error updating player: {e}")
@@ -204,7 +397,12 @@ class SnakeGameDatabaseManager:
     
     def delete_player(self, player_id):
         """
-        Delete a player from the database.
+        Delete a player from the database, along with their game sessions,
+        replays, highscore and statistics.
+        
+        Foreign keys are not enforced, so the player's rows are deleted here
+        in one transaction; deleting the highscore row keeps highscore_counts,
+        and so every other player's rank, correct.
         
         Args:
             player_id (int): The player's ID
@@ -216,8 +414,17 @@ class SnakeGameDatabaseManager:
             return False
             
         try:
+            # Drop the rollup first, so the session delete trigger has nothing to update
+            self.cursor.execute("DELETE FROM player_stats WHERE player_id = ?", (player_id,))
+            self.cursor.execute(
+                "DELETE FROM replays WHERE session_id IN (SELECT id FROM game_sessions WHERE player_id = ?)",
+                (player_id,)
+            )
+            self.cursor.execute("DELETE FROM game_sessions WHERE player_id = ?", (player_id,))
+            self.cursor.execute("DELETE FROM highscores WHERE player_id = ?", (player_id,))
             self.cursor.execute("DELETE FROM players WHERE id = ?", (player_id,))
             self.conn.commit()
+            self.leaderboard.invalidate()
             return self.cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error deleting player: {e}")
@@ -226,7 +433,7 @@ class SnakeGameDatabaseManager:
     
     # Game Session CRUD operations
     
-    def add_game_session(self, player_id, score, duration, date_played=None):
+    def add_game_session(self, player_id, score, duration, date_played=None, replay=None):
         """
         Add a new game session to the database.
         
@@ -235,6 +442,7 @@ class SnakeGameDatabaseManager:
             score (int): The score achieved in the game
             duration (int): The duration of the game in seconds
             date_played (str, optional): Date and time the game was played
+            replay (bytes, optional): Encoded replay of the game
             
         Returns:
             int: The ID of the newly created game session, or None if failed
@@ -253,43 +461,135 @@ class SnakeGameDatabaseManager:
                     "INSERT INTO game_sessions (player_id, score, duration) VALUES (?, ?, ?)",
                     (player_id, score, duration)
                 )
+            session_id = self.cursor.lastrowid
             
-            self.conn.commit()
+            if replay is not None:
+                self.cursor.execute(
+                    "INSERT INTO replays (session_id, data) VALUES (?, ?)",
+                    (session_id, replay)
+                )
             
-            # Check if this is a high score for the player
-            self._update_highscore(player_id, score)
+            # Check if this is a high score for the player, in the same transaction
+            new_highscore = self._update_highscore(player_id, score)
             
-            return self.cursor.lastrowid
+            self.conn.commit()
+            if new_highscore:
+                self.leaderboard.note_highscore(score)
+            
+            return session_id
         except sqlite3.Error as e:
             print(f"Error adding game session: {e}")
             self.conn.rollback()
             return None
     
-    def _update_highscore(self, player_id, score):
+    def add_game_sessions_bulk(self, sessions):
         """
-        Update the highscores table if this is one of the top scores.
+        Add many game sessions in a single transaction.
+        
+        Sessions are inserted with one executemany() call, and highscores are
+        updated with one set-based UPSERT that records each player's best
+        score in the batch if it beats their current highscore.
         
         Args:
-            player_id (int): The player's ID
-            score (int): The score achieved
+            sessions (iterable): Tuples of (player_id, score, duration),
+                optionally followed by date_played and an encoded replay
+            
+        Returns:
+            list: The IDs of the newly created game sessions, in input order,
+                or an empty list if failed
         """
+        if not self.conn and not self.connect():
+            return []
+        
+        count = 0
+        replays = []
+        
+        def rows():
+            nonlocal count
+            for session in sessions:
+                player_id, score, duration = session[:3]
+                date_played = session[3] if len(session) > 3 else None
+                if len(session) > 4 and session[4] is not None:
+                    replays.append((count, session[4]))
+                count += 1
+                yield (player_id, score, duration, date_played)
+        
         try:
-            # Get the player's current high score
-            self.cursor.execute(
-                "SELECT score FROM highscores WHERE player_id = ? ORDER BY score DESC LIMIT 1",
-                (player_id,)
+            self.cursor.executemany(
+                """
+                INSERT INTO game_sessions (player_id, score, duration, date_played)
+                VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """,
+                rows()
             )
-            result = self.cursor.fetchone()
+            if count == 0:
+                self.conn.rollback()
+                return []
             
-            if not result or score > result['score']:
-                # This is a new high score for the player
-                self.cursor.execute(
-                    "INSERT INTO highscores (player_id, score) VALUES (?, ?)",
-                    (player_id, score)
+            # AUTOINCREMENT ids are consecutive while this transaction holds the write lock
+            self.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'game_sessions'")
+            last_id = self.cursor.fetchone()['seq']
+            first_id = last_id - count + 1
+            
+            if replays:
+                self.cursor.executemany(
+                    "INSERT INTO replays (session_id, data) VALUES (?, ?)",
+                    [(first_id + offset, data) for offset, data in replays]
                 )
-                self.conn.commit()
+            
+            self.cursor.execute(
+                """
+                INSERT INTO highscores (player_id, score)
+                SELECT player_id, MAX(score)
+                FROM game_sessions
+                WHERE id BETWEEN ? AND ?
+                GROUP BY player_id
+                ON CONFLICT (player_id) DO UPDATE
+                    SET score = excluded.score, date_achieved = CURRENT_TIMESTAMP
+                    WHERE excluded.score > highscores.score
+                """,
+                (first_id, last_id)
+            )
+            new_highscores = self.cursor.rowcount
+            
+            self.conn.commit()
+            if new_highscores:
+                self.leaderboard.invalidate()
+            return list(range(first_id, last_id + 1))
         except sqlite3.Error as e:
-            print(f"Error updating highscore: {e}")
+            print(f"Error adding game sessions: {e}")
+            self.conn.rollback()
+            return []
+        except (TypeError, ValueError) as e:
+            # A malformed session tuple stops executemany() part way through the batch
+            print(f"Error adding game sessions: malformed session: {e}")
+            self.conn.rollback()
+            return []
+    
+    def _update_highscore(self, player_id, score):
+        """
+        Record the score as the player's highscore if it beats their best.
+        
+        Runs a single UPSERT against the one-row-per-player highscores table
+        and leaves committing to the caller.
+        
+        Args:
+            player_id (int): The player's ID
+            score (int): The score achieved
+            
+        Returns:
+            bool: True if the player's highscore row was created or raised
+        """
+        self.cursor.execute(
+            """
+            INSERT INTO highscores (player_id, score) VALUES (?, ?)
+            ON CONFLICT (player_id) DO UPDATE
+                SET score = excluded.score, date_achieved = CURRENT_TIMESTAMP
+                WHERE excluded.score > highscores.score
+            """,
+            (player_id, score)
+        )
+        return self.cursor.rowcount > 0
     
     def get_game_session(self, session_id):
         """
@@ -335,6 +635,94 @@ class SnakeGameDatabaseManager:
             print(f"Error getting player game sessions: {e}")
             return []
     
+    def get_player_stats(self, player_id):
+        """
+        Get a player's statistics from the player_stats rollup.
+        
+        The rollup is kept current by triggers as sessions are added and
+        deleted, so this is a single primary key lookup however many games
+        the player has played.
+        
+        Args:
+            player_id (int): The player's ID
+            
+        Returns:
+            dict: Games played, total play time, average score and best score,
+                or None if failed
+        """
+        if not self.conn and not self.connect():
+            return None
+            
+        try:
+            self.cursor.execute("SELECT * FROM player_stats WHERE player_id = ?", (player_id,))
+            result = self.cursor.fetchone()
+            if not result:
+                return {
+                    'player_id': player_id,
+                    'games_played': 0,
+                    'total_duration': 0,
+                    'average_score': 0,
+                    'best_score': 0,
+                }
+            stats = dict(result)
+            stats['average_score'] = stats.pop('total_score') / stats['games_played']
+            return stats
+        except sqlite3.Error as e:
+            print(f"Error getting player stats: {e}")
+            return None
+    
+    def get_replay(self, session_id):
+        """
+        Get the encoded replay recorded for a game session.
+        
+        Args:
+            session_id (int): The game session ID
+            
+        Returns:
+            bytes: The replay data, or None if none was recorded
+        """
+        if not self.conn and not self.connect():
+            return None
+            
+        try:
+            self.cursor.execute("SELECT data FROM replays WHERE session_id = ?", (session_id,))
+            result = self.cursor.fetchone()
+            return bytes(result['data']) if result else None
+        except sqlite3.Error as e:
+            print(f"Error getting replay: {e}")
+            return None
+
+    def get_sessions_with_replays(self, after_id=0, limit=1000):
+        """
+        Get a page of game sessions together with their replays, in ID order.
+
+        Paging by the last ID seen keeps every page an index range scan,
+        however far into the table a batch job has got.
+
+        Args:
+            after_id (int): Only return sessions with a larger ID
+            limit (int): Maximum number of sessions to return
+
+        Returns:
+            list: Dicts with id, player_id, score, duration and the replay data
+        """
+        if not self.conn and not self.connect():
+            return []
+
+        try:
+            self.cursor.execute('''
+            SELECT s.id, s.player_id, s.score, s.duration, r.data
+            FROM replays r
+            JOIN game_sessions s ON s.id = r.session_id
+            WHERE r.session_id > ?
+            ORDER BY r.session_id
+            LIMIT ?
+            ''', (after_id, limit))
+            return [dict(row, data=bytes(row['data'])) for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting sessions with replays: {e}")
+            return []
+
     def delete_game_session(self, session_id):
         """
         Delete a game session from the database.
@@ -349,6 +737,7 @@ class SnakeGameDatabaseManager:
             return False
             
         try:
+            self.cursor.execute("DELETE FROM replays WHERE session_id = ?", (session_id,))
             self.cursor.execute("DELETE FROM game_sessions WHERE id = ?", (session_id,))
             self.conn.commit()
             return self.cursor.rowcount > 0
@@ -363,16 +752,28 @@ class SnakeGameDatabaseManager:
         """
         Get the top highscores from the database.
         
+        Results are served from the leaderboard cache when possible; on a miss
+        at least leaderboard.size rows are fetched so later calls hit.
+        
         Args:
             limit (int): Maximum number of highscores to return
             
         Returns:
             list: List of highscore dictionaries with player information
         """
+        cached = self.leaderboard.get(limit)
+        if cached is not None:
+            return cached
+        return self._query_highscores(limit)
+    
+    def _query_highscores(self, limit):
+        """Query the top highscores on a cache miss and cache them; see get_highscores()."""
         if not self.conn and not self.connect():
             return []
             
         try:
+            generation = self.leaderboard.generation
+            fetch = max(limit, self.leaderboard.size)
             self.cursor.execute(
                 """
                 SELECT h.id, h.player_id, h.score, h.date_achieved, p.username
@@ -381,9 +782,11 @@ class SnakeGameDatabaseManager:
                 ORDER BY h.score DESC
                 LIMIT ?
                 """, 
-                (limit,)
+                (fetch,)
             )
-            return [dict(row) for row in self.cursor.fetchall()]
+            rows = [dict(row) for row in self.cursor.fetchall()]
+            self.leaderboard.store(rows, fetch, generation)
+            return [dict(row) for row in rows[:limit]]
         except sqlite3.Error as e:
             print(f"Error getting highscores: {e}")
             return []
@@ -401,17 +804,148 @@ class SnakeGameDatabaseManager:
         if not self.conn and not self.connect():
             return None
             
+        try:
+            self.cursor.execute("SELECT * FROM highscores WHERE player_id = ?", (player_id,))
+            result = self.cursor.fetchone()
+            return dict(result) if result else None
+        except sqlite3.Error as e:
+            print(f"Error getting player highscore: {e}")
+            return None
+    
+    def get_player_rank(self, player_id):
+        """
+        Get a player's leaderboard rank.
+        
+        Players with equal highscores share a rank. The rank is summed from
+        the highscore_counts table, so its cost depends on the number of
+        distinct scores above the player rather than on the number of players.
+        
+        Args:
+            player_id (int): The player's ID
+            
+        Returns:
+            dict: The player's score, rank and the total number of ranked
+                players, or None if the player has no highscore
+        """
+        if not self.conn and not self.connect():
+            return None
+            
         try:
             self.cursor.execute(
-                "SELECT * FROM highscores WHERE player_id = ? ORDER BY score DESC LIMIT 1", 
+                """
+                SELECT h.player_id, h.score,
+                    1 + (SELECT COALESCE(SUM(c.players), 0) FROM highscore_counts c
+                         WHERE c.score > h.score) AS rank,
+                    (SELECT COALESCE(SUM(players), 0) FROM highscore_counts) AS total
+                FROM highscores h
+                WHERE h.player_id = ?
+                """,
                 (player_id,)
             )
             result = self.cursor.fetchone()
             return dict(result) if result else None
         except sqlite3.Error as e:
-            print(f"Error getting player highscore: {e}")
+            print(f"Error getting player rank: {e}")
             return None
     
+    def get_rank_window(self, player_id, radius=2):
+        """
+        Get the leaderboard rows around a player.
+        
+        Each side of the window is read with two seeks on the (score DESC,
+        player_id) index: one through the players tied with the player's
+        score and one through the neighbouring scores. Ranks are worked out
+        from the player's own rank and the highscore_counts rows spanned by
+        the window, rather than summed again for every row.
+        
+        Args:
+            player_id (int): The player's ID
+            radius (int): Number of players to include above and below
+            
+        Returns:
+            list: Highscore dictionaries with username and rank, ordered from
+                best to worst, or an empty list if the player has no highscore
+        """
+        player_rank = self.get_player_rank(player_id)
+        if not player_rank:
+            return []
+            
+        try:
+            score = player_rank['score']
+            self.cursor.execute(
+                """
+                SELECT * FROM (
+                    SELECT player_id, score FROM highscores
+                    WHERE score = ? AND player_id < ?
+                    ORDER BY player_id DESC LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT player_id, score FROM highscores
+                    WHERE score > ?
+                    ORDER BY score ASC, player_id DESC LIMIT ?
+                )
+                ORDER BY score ASC, player_id DESC
+                LIMIT ?
+                """,
+                (score, player_id, radius, score, radius, radius)
+            )
+            above = [dict(row) for row in self.cursor.fetchall()][::-1]
+            self.cursor.execute(
+                """
+                SELECT * FROM (
+                    SELECT player_id, score FROM highscores
+                    WHERE score = ? AND player_id > ?
+                    ORDER BY player_id ASC LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT player_id, score FROM highscores
+                    WHERE score < ?
+                    ORDER BY score DESC, player_id ASC LIMIT ?
+                )
+                ORDER BY score DESC, player_id ASC
+                LIMIT ?
+                """,
+                (score, player_id, radius, score, radius, radius)
+            )
+            below = [dict(row) for row in self.cursor.fetchall()]
+            window = above + [{'player_id': player_id, 'score': score}] + below
+            
+            # Players per score from the window's worst score to its best
+            self.cursor.execute(
+                "SELECT score, players FROM highscore_counts WHERE score BETWEEN ? AND ?",
+                (window[-1]['score'], window[0]['score'])
+            )
+            counts = dict(self.cursor.fetchall())
+            placeholders = ", ".join("?" * len(window))
+            self.cursor.execute(
+                f"SELECT id, username FROM players WHERE id IN ({placeholders})",
+                [row['player_id'] for row in window]
+            )
+            usernames = dict(self.cursor.fetchall())
+            
+            # A score's rank is one more than the number of players above it
+            ranks = {score: player_rank['rank']}
+            rank = player_rank['rank']
+            for counted in sorted(s for s in counts if s > score):
+                rank -= counts[counted]
+                ranks[counted] = rank
+            rank = player_rank['rank']
+            previous = score
+            for counted in sorted((s for s in counts if s < score), reverse=True):
+                rank += counts[previous]
+                ranks[counted] = rank
+                previous = counted
+            
+            for row in window:
+                row['username'] = usernames.get(row['player_id'])
+                row['rank'] = ranks[row['score']]
+            return window
+        except sqlite3.Error as e:
+            print(f"Error getting rank window: {e}")
+            return []
+    
     # Game Settings operations
     
     def add_setting(self, setting_name, setting_value, description=None):
@@ -426,41 +960,101 @@ class SnakeGameDatabaseManager:
         Returns:
             int: The ID of the newly created setting, or None if failed
         """
+        error = _setting_error(setting_name, setting_value)
+        if error:
+            print(f"Error adding/updating setting: {error}")
+            return None
         if not self.conn and not self.connect():
             return None
             
         try:
-            # Check if setting already exists
-            self.cursor.execute("SELECT id FROM game_settings WHERE setting_name = ?", (setting_name,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                # Update existing setting
-                if description:
-                    self.cursor.execute(
-                        "UPDATE game_settings SET setting_value = ?, description = ? WHERE id = ?",
-                        (setting_value, description, result['id'])
-                    )
-                else:
-                    self.cursor.execute(
-                        "UPDATE game_settings SET setting_value = ? WHERE id = ?",
-                        (setting_value, result['id'])
-                    )
-                self.conn.commit()
-                return result['id']
-            else:
-                # Insert new setting
-                self.cursor.execute(
-                    "INSERT INTO game_settings (setting_name, setting_value, description) VALUES (?, ?, ?)",
-                    (setting_name, setting_value, description)
-                )
-                self.conn.commit()
-                return self.cursor.lastrowid
+            # Insert the setting, or update it in place if the name already exists
+            self.cursor.execute(
+                """
+                INSERT INTO game_settings (setting_name, setting_value, description) VALUES (?, ?, ?)
+                ON CONFLICT (setting_name) DO UPDATE SET
+                    setting_value = excluded.setting_value,
+                    description = COALESCE(NULLIF(excluded.description, ''), game_settings.description)
+                RETURNING id
+                """,
+                (setting_name, setting_value, description)
+            )
+            setting_id = self.cursor.fetchone()['id']
+            self.conn.commit()
+            self.settings_version += 1
+            return setting_id
         except sqlite3.Error as e:
             print(f"Error adding/updating setting: {e}")
             self.conn.rollback()
             return None
     
+    def set_settings(self, settings):
+        """
+        Add or update several game settings in one transaction.
+        
+        Args:
+            settings (dict): Setting names mapped to values; values are stored
+                as text, with booleans written as "true" or "false"
+            
+        Returns:
+            bool: True if successful, False otherwise; nothing is written if
+                any value is refused
+        """
+        rows = [
+            (name, str(value).lower() if isinstance(value, bool) else str(value))
+            for name, value in settings.items()
+        ]
+        for name, value in rows:
+            error = _setting_error(name, value)
+            if error:
+                print(f"Error setting settings: {error}")
+                return False
+        if not self.conn and not self.connect():
+            return False
+        
+        try:
+            self.cursor.executemany(
+                """
+                INSERT INTO game_settings (setting_name, setting_value) VALUES (?, ?)
+                ON CONFLICT (setting_name) DO UPDATE SET setting_value = excluded.setting_value
+                """,
+                rows
+            )
+            self.conn.commit()
+            self.settings_version += 1
+            return True
+        except sqlite3.Error as e:
+            print(f"Error setting settings: {e}")
+            self.conn.rollback()
+            return False
+    
+    def get_settings_snapshot(self, defaults=None):
+        """
+        Get all game settings as a typed, cached snapshot.
+        
+        The database is only queried when a setting was written through this
+        manager since the last snapshot was loaded.
+        
+        Args:
+            defaults (dict, optional): Values for settings missing from the database
+            
+        Returns:
+            SettingsSnapshot: Setting names mapped to parsed values
+        """
+        snapshot = self._settings_snapshot
+        if snapshot is None or snapshot.is_stale():
+            version = self.settings_version
+            values = {
+                setting['setting_name']: parse_setting_value(setting['setting_value'])
+                for setting in self.get_all_settings()
+            }
+            snapshot = self._settings_snapshot = SettingsSnapshot(values, version, self)
+        if defaults:
+            missing = {name: value for name, value in defaults.items() if name not in snapshot}
+            if missing:
+                snapshot = SettingsSnapshot({**missing, **snapshot}, snapshot.version, self)
+        return snapshot
+    
     def get_setting(self, setting_name):
         """
         Get a game setting by name.
@@ -515,9 +1109,209 @@ class SnakeGameDatabaseManager:
         try:
             self.cursor.execute("DELETE FROM game_settings WHERE setting_name = ?", (setting_name,))
             self.conn.commit()
+            self.settings_version += 1
             return self.cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error deleting setting: {e}")
             self.conn.rollback()
             return False
 
+
+class PooledSnakeGameDatabaseManager(SnakeGameDatabaseManager):
+    """
+    A SnakeGameDatabaseManager that one object can share between threads.
+    
+    Every query method checks a connection out of a bounded pool for the
+    length of the call and returns it afterwards (get_highscores() only on
+    a leaderboard cache miss), so threads that exit
+    without calling close() never leak a slot. A thread that wants one
+    connection across several calls holds it with connection() or connect(),
+    and self.conn and self.cursor are per-thread. Connections run in WAL mode
+    so reads stay concurrent, while all writes go through a single lock so
+    writers never fight over SQLite's write lock.
+    """
+
+    # Methods that write to the database and must hold the writer lock,
+    # mapped to the value they return when no connection is available
+    WRITE_METHODS = {
+        "create_tables": False,
+        "add_player": None, "update_player": False, "delete_player": False,
+        "add_game_session": None, "add_game_sessions_bulk": [], "delete_game_session": False,
+        "add_setting": None, "set_settings": False, "delete_setting": False,
+    }
+
+    # Methods that only read, mapped the same way
+    READ_METHODS = {
+        "get_player": None, "get_all_players": [],
+        "get_game_session": None, "get_player_game_sessions": [], "get_player_stats": None,
+        "get_replay": None, "get_sessions_with_replays": [],
+        "_query_highscores": [], "get_player_highscore": None, "get_player_rank": None,
+        "get_rank_window": [],
+        "get_setting": None, "get_all_settings": [],
+    }
+
+    def __init__(self, db_file="snake_game.db", pool_size=8, busy_timeout=5.0,
+                 checkout_timeout=None, **kwargs):
+        """
+        Initialize the pooled database manager.
+        
+        Args:
+            db_file (str): Path to the SQLite database file
+            pool_size (int): Maximum number of open connections
+            busy_timeout (float): Seconds a connection waits on a locked database
+            checkout_timeout (float, optional): Seconds a thread waits for a free
+                connection when the pool is exhausted, or None to wait forever
+            **kwargs: Tuning options passed on to SnakeGameDatabaseManager
+        """
+        self._local = threading.local()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._write_lock = threading.RLock()
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.checkout_timeout = checkout_timeout
+        kwargs.pop("persistent", None)
+        super().__init__(db_file, **kwargs)
+
+    @property
+    def conn(self):
+        """The calling thread's checked-out connection, or None."""
+        return getattr(self._local, "conn", None)
+
+    @conn.setter
+    def conn(self, value):
+        self._local.conn = value
+
+    @property
+    def cursor(self):
+        """The calling thread's cursor, or None."""
+        return getattr(self._local, "cursor", None)
+
+    @cursor.setter
+    def cursor(self, value):
+        self._local.cursor = value
+
+    def _open_connection(self):
+        """Open a new tuned connection for the pool."""
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
+        return conn
+
+    def connect(self):
+        """Check out a connection for the calling thread."""
+        if self.conn:
+            return True
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                if self._slots.acquire(blocking=False):
+                    try:
+                        conn = self._open_connection()
+                    except sqlite3.Error:
+                        self._slots.release()
+                        raise
+                else:
+                    # The pool is exhausted, so wait for another thread to return one
+                    conn = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            print("Database connection error: connection pool exhausted")
+            return False
+        except sqlite3.Error as e:
+            print(f"Database connection error: {e}")
+            return False
+        
+        self.conn = conn
+        self.cursor = conn.cursor()
+        if self._schema_ready or self.create_tables():
+            return True
+        self.close()
+        return False
+
+    def close(self):
+        """Return the calling thread's connection to the pool."""
+        conn = self.conn
+        if conn:
+            if conn.in_transaction:
+                conn.rollback()
+            self.conn = None
+            self.cursor = None
+            self._idle.put(conn)
+
+    def close_all(self):
+        """Return the calling thread's connection and close every idle connection."""
+        self.close()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            self._slots.release()
+
+    def open_persistent(self):
+        """Pooled connections are always long-lived, so this only returns the manager."""
+        return self
+
+    def close_persistent(self):
+        """Close the pool's connections."""
+        self.close_all()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a with block.
+        
+        The connection is returned to the pool afterwards, unless the calling
+        thread already held one before entering the block.
+        """
+        owned = self.conn is None
+        if owned and not self.connect():
+            raise sqlite3.OperationalError("No database connection available")
+        try:
+            yield self.conn
+        finally:
+            if owned:
+                self.close()
+
+    @contextmanager
+    def writer(self):
+        """Hold the single writer lock for a group of writes."""
+        with self._write_lock:
+            yield
+
+
+def _pooled_call(method, failure, write):
+    """
+    Wrap a query method so it runs on a connection checked out for the call,
+    and under the pool's writer lock if it writes.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        owned = self.conn is None
+        # Check out a connection first, so no thread waits on the pool while holding the lock
+        if owned and not self.connect():
+            return copy(failure)
+        try:
+            if write:
+                with self._write_lock:
+                    return method(self, *args, **kwargs)
+            return method(self, *args, **kwargs)
+        finally:
+            if owned:
+                self.close()
+    return wrapper
+
+
+for _name, _failure in PooledSnakeGameDatabaseManager.WRITE_METHODS.items():
+    setattr(PooledSnakeGameDatabaseManager, _name,
+            _pooled_call(getattr(SnakeGameDatabaseManager, _name), _failure, write=True))
+for _name, _failure in PooledSnakeGameDatabaseManager.READ_METHODS.items():
+    setattr(PooledSnakeGameDatabaseManager, _name,
+            _pooled_call(getattr(SnakeGameDatabaseManager, _name), _failure, write=False))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Per-tick frame timing for the Snake Game loop.
+
+A FrameProfiler timestamps the phases of each tick with perf_counter_ns and
+keeps two views of them: a rolling window of recent ticks for the live
+overlay, and a log-bucketed histogram of the whole session for the report
+written at exit. Both cost O(1) per tick; percentiles are only worked out
+when the overlay or the report asks for them.
+"""
+
+import json
+import math
+import platform
+from collections import deque
+from datetime import datetime
+from time import perf_counter_ns
+
+# Phases of one tick, in loop order. "input" includes the wait for a key.
+PHASES = ("input", "update", "draw", "refresh")
+
+# Histogram buckets per doubling of duration (about 19% wide each)
+BUCKETS_PER_OCTAVE = 4
+
+
+class Histogram:
+    """Counts durations in logarithmic buckets, for session-long percentiles."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        """Record one duration in nanoseconds."""
+        bucket = int(math.log2(ns) * BUCKETS_PER_OCTAVE) if ns > 0 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Upper bound in nanoseconds of the bucket holding the percentile
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE), self.max)
+        return float(self.max)
+
+
+def _window_stats(samples):
+    """p50, p99 and max of a window of nanosecond samples."""
+    if not samples:
+        return 0, 0, 0
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return ordered[last // 2], ordered[round(last * 0.99)], ordered[last]
+
+
+class FrameProfiler:
+    """
+    Times the phases of every tick of the game loop.
+
+    Call start_tick() at the top of the loop and mark(phase) as each phase
+    finishes; each mark records the time since the previous one. The tick
+    period is the time between consecutive start_tick() calls, and jitter is
+    the mean change in period from one tick to the next.
+    """
+
+    enabled = True
+
+    def __init__(self, window=256):
+        """
+        Args:
+            window (int): Number of recent ticks the overlay summarizes
+        """
+        self.window = {phase: deque(maxlen=window) for phase in PHASES + ("tick",)}
+        self.jitter_window = deque(maxlen=window)
+        self.histograms = {phase: Histogram() for phase in PHASES + ("tick",)}
+        self.jitter = Histogram()
+        self.started = datetime.now()
+        self._tick_start = None
+        self._last_mark = None
+        self._last_period = None
+
+    def start_tick(self):
+        """Mark the start of a tick, closing the previous tick's period."""
+        now = perf_counter_ns()
+        if self._tick_start is not None:
+            period = now - self._tick_start
+            self.window["tick"].append(period)
+            self.histograms["tick"].add(period)
+            if self._last_period is not None:
+                change = abs(period - self._last_period)
+                self.jitter_window.append(change)
+                self.jitter.add(change)
+            self._last_period = period
+        self._tick_start = self._last_mark = now
+
+    def mark(self, phase):
+        """Record the time since the previous mark as the given phase."""
+        now = perf_counter_ns()
+        elapsed = now - self._last_mark
+        self.window[phase].append(elapsed)
+        self.histograms[phase].add(elapsed)
+        self._last_mark = now
+
+    def pause(self):
+        """Forget the open tick, e.g. while the loop waits on a menu or a resize."""
+        self._tick_start = None
+        self._last_period = None
+
+    def overlay(self):
+        """
+        Returns:
+            str: One line summarizing recent ticks, with times in milliseconds
+        """
+        p50, p99, peak = _window_stats(self.window["tick"])
+        parts = [f"tick {p50 / 1e6:.1f}/{p99 / 1e6:.1f}/{peak / 1e6:.1f}"]
+        for phase in PHASES:
+            _, phase_p99, _ = _window_stats(self.window[phase])
+            parts.append(f"{phase} {phase_p99 / 1e6:.2f}")
+        jitter = sum(self.jitter_window) / len(self.jitter_window) if self.jitter_window else 0
+        parts.append(f"jitter {jitter / 1e6:.2f}")
+        return " ms p50/p99/max: " + " | ".join(parts) + " (phases p99) "
+
+    def report(self):
+        """
+        Summarize the whole session.
+
+        Returns:
+            dict: Per-phase count, mean, p50, p99 and max in milliseconds, plus jitter
+        """
+        def summary(histogram):
+            return {
+                'count': histogram.count,
+                'mean_ms': histogram.total / histogram.count / 1e6 if histogram.count else 0.0,
+                'p50_ms': histogram.percentile(50) / 1e6,
+                'p99_ms': histogram.percentile(99) / 1e6,
+                'max_ms': histogram.max / 1e6,
+            }
+
+        return {
+            'started': self.started.isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'phases': {phase: summary(histogram) for phase, histogram in self.histograms.items()},
+            'jitter': summary(self.jitter),
+        }
+
+    def dump(self, path):
+        """Write the session report to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class NullFrameProfiler:
+    """Stands in for FrameProfiler when instrumentation is off, doing nothing."""
+
+    enabled = False
+
+    def start_tick(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def pause(self):
+        pass
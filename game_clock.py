@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Fixed-timestep scheduling and buffered input for the Snake Game loop.
+
+The loop used to wait for a key with stdscr.timeout() and then step, so a
+tick lasted the timeout plus however long drawing took, and at most one key
+counted per tick. TickScheduler instead keeps a schedule of tick deadlines
+on the monotonic clock, so the tick rate holds however long a frame takes,
+and InputQueue keeps the keys pressed between ticks so quick sequences are
+applied one per tick instead of being dropped.
+"""
+
+import time
+from collections import deque
+
+from snake_engine import OPPOSITE
+
+
+class TickScheduler:
+    """
+    Tells the loop when the next tick is due and how many ticks to run.
+
+    Deadlines advance by exactly one period per tick, so time spent drawing
+    is absorbed instead of adding to every tick. If the loop falls behind,
+    up to max_catch_up ticks run back to back; anything beyond that is
+    dropped, so a long stall slows the game down briefly rather than making
+    it race to catch up.
+    """
+
+    def __init__(self, period, max_catch_up=3, clock=time.monotonic):
+        """
+        Args:
+            period (float): Seconds per tick
+            max_catch_up (int): Most ticks run at once after falling behind
+            clock (callable): Monotonic time source in seconds
+        """
+        self.period = period
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.dropped = 0
+        self.reset()
+
+    def reset(self):
+        """Schedule the next tick one period from now, e.g. after a pause."""
+        self.next_tick = self.clock() + self.period
+
+    def set_period(self, period):
+        """Change the tick rate from the next deadline on."""
+        self.next_tick += period - self.period
+        self.period = period
+
+    def time_until_tick(self):
+        """
+        Returns:
+            float: Seconds until the next tick is due, or 0 if it already is
+        """
+        return max(0.0, self.next_tick - self.clock())
+
+    def due_ticks(self):
+        """
+        Claim the ticks that are due now.
+
+        Returns:
+            int: Number of ticks to run, between 0 and max_catch_up
+        """
+        now = self.clock()
+        if now < self.next_tick:
+            return 0
+        due = int((now - self.next_tick) // self.period) + 1
+        if due > self.max_catch_up:
+            self.dropped += due - self.max_catch_up
+            self.next_tick = now + self.period
+            return self.max_catch_up
+        self.next_tick += due * self.period
+        return due
+
+
+class InputQueue:
+    """
+    Directions pressed since the last tick, applied one per tick.
+
+    Keys that would not change the heading the snake will have by then
+    (repeats and reversals) are ignored, and the queue holds at most
+    `size` turns so mashing keys cannot build up a long delay.
+    """
+
+    def __init__(self, size=3):
+        self.turns = deque()
+        self.size = size
+
+    def __len__(self):
+        return len(self.turns)
+
+    def clear(self):
+        self.turns.clear()
+
+    def push(self, direction, heading):
+        """
+        Queue a direction.
+
+        Args:
+            direction (int): The direction pressed
+            heading (int): The snake's current direction
+
+        Returns:
+            bool: True if the direction was queued
+        """
+        last = self.turns[-1] if self.turns else heading
+        if direction == last or direction == OPPOSITE[last] or len(self.turns) >= self.size:
+            return False
+        self.turns.append(direction)
+        return True
+
+    def pop(self):
+        """
+        Returns:
+            int: The direction for this tick, or None to keep going straight
+        """
+        return self.turns.popleft() if self.turns else None
@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""
+Multi-session Snake server for telnet-style terminals.
+
+Every connection plays its own SnakeEngine game on one asyncio event loop,
+each with its own tick timer, and is drawn with plain ANSI escape codes, so
+any telnet client (or `nc`) can play without curses or a process per
+player. Finished games are saved through AsyncSnakeGameDatabaseManager,
+which batches the writes on a worker thread and never blocks the loop.
+Games can also be watched from a second port as a delta-encoded state
+stream (see state_stream.py).
+
+Usage:
+    python game_server.py serve [--port 2323] [--stream-port 2324] [--workers 1] [--db snake_game.db]
+    python game_server.py load [--clients 500] [--seconds 30] [--spawn]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_clock import TickScheduler, InputQueue
+from replay import ReplayRecorder, tick_delay
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, EVENT_MOVE, EVENT_EAT, EVENT_FOOD
+from state_stream import StateEncoder
+
+# Telnet commands used to switch the client to character-at-a-time mode
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+ECHO, SUPPRESS_GO_AHEAD = 1, 3
+TELNET_CHARACTER_MODE = bytes([IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD, IAC, DO, SUPPRESS_GO_AHEAD])
+
+# Keys mapped to engine directions: arrow key escape sequence finals and WASD
+ARROW_DIRECTIONS = {ord("A"): UP, ord("B"): DOWN, ord("C"): RIGHT, ord("D"): LEFT}
+LETTER_DIRECTIONS = {
+    ord("w"): UP, ord("s"): DOWN, ord("a"): LEFT, ord("d"): RIGHT,
+    ord("W"): UP, ord("S"): DOWN, ord("A"): LEFT, ord("D"): RIGHT,
+}
+
+# ANSI escape codes
+CLEAR = "\x1b[2J\x1b[H"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+RESET = "\x1b[0m"
+GREEN, RED, YELLOW = "\x1b[32m", "\x1b[31m", "\x1b[33m"
+
+# Spectators whose unsent stream data grows past this are dropped
+MAX_WATCHER_BUFFER = 64 * 1024
+
+# Printed by the server when it stops, followed by its statistics as JSON
+STATS_PREFIX = "STATS "
+
+
+class TelnetInput:
+    """
+    Turns raw bytes from a telnet client into keys.
+
+    Telnet negotiation is stripped out, and arrow key escape sequences are
+    folded into single directions. State is kept between calls, because a
+    sequence can be split across reads.
+    """
+
+    def __init__(self):
+        self._state = "data"
+
+    def feed(self, data):
+        """
+        Args:
+            data (bytes): Bytes read from the connection
+
+        Returns:
+            list: Keys, as ints for ordinary bytes or ("arrow", direction) tuples
+        """
+        keys = []
+        state = self._state
+        for byte in data:
+            if state == "data":
+                if byte == IAC:
+                    state = "iac"
+                elif byte == 0x1b:
+                    state = "escape"
+                else:
+                    keys.append(byte)
+            elif state == "iac":
+                if byte in (WILL, WONT, DO, DONT):
+                    state = "option"
+                elif byte == SB:
+                    state = "subnegotiation"
+                else:
+                    if byte == IAC:
+                        keys.append(byte)
+                    state = "data"
+            elif state == "option":
+                state = "data"
+            elif state == "subnegotiation":
+                if byte == IAC:
+                    state = "subnegotiation_iac"
+            elif state == "subnegotiation_iac":
+                state = "data" if byte == SE else "subnegotiation"
+            elif state == "escape":
+                state = "csi" if byte in (ord("["), ord("O")) else "data"
+            elif state == "csi":
+                if byte in ARROW_DIRECTIONS:
+                    keys.append(("arrow", ARROW_DIRECTIONS[byte]))
+                if 0x40 <= byte <= 0x7e:
+                    state = "data"
+        self._state = state
+        return keys
+
+
+def _at(y, x):
+    """ANSI cursor movement to a 0-based screen cell."""
+    return f"\x1b[{y + 1};{x + 1}H"
+
+
+class AnsiRenderer:
+    """
+    Draws a game as ANSI escape sequences, the way GameRenderer does with curses.
+
+    After the first full frame only the cells touched by each tick are sent,
+    and the status line only when its text changes.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.status = None
+
+    def draw_full(self, engine, status):
+        """Return a whole frame: border, snake, food and status."""
+        right = self.width - 2
+        bottom = self.height - 2
+        out = [CLEAR, HIDE_CURSOR, _at(0, 0), "╔", "═" * (right - 1), "╗"]
+        for y in range(1, bottom):
+            out.append(f"{_at(y, 0)}║{_at(y, right)}║")
+        out.append(f"{_at(bottom, 0)}╚{'═' * (right - 1)}╝")
+        out.append(GREEN)
+        for i, (y, x) in enumerate(engine.body):
+            out.append(f"{_at(y, x)}{'■' if i == 0 else '□'}")
+        if engine.food is not None:
+            out.append(f"{RED}{_at(*engine.food)}●")
+        out.append(RESET)
+        self.status = None
+        out.append(self.draw_status(status))
+        return "".join(out)
+
+    def draw_events(self, events):
+        """Return the changes made by some engine steps."""
+        out = []
+        for event in events:
+            if event[0] == EVENT_MOVE:
+                _, old_head, head, tail = event
+                if tail is not None:
+                    out.append(f"{_at(*tail)} ")
+                out.append(f"{GREEN}{_at(*old_head)}□{_at(*head)}■{RESET}")
+            elif event[0] == EVENT_FOOD:
+                out.append(f"{RED}{_at(*event[1])}●{RESET}")
+        return "".join(out)
+
+    def draw_status(self, text):
+        """Return the status line if its text changed since the last call."""
+        if text == self.status:
+            return ""
+        # Pad over the previous text, which may have been longer
+        padding = " " * max(0, len(self.status or "") - len(text))
+        self.status = text
+        return f"{YELLOW}{_at(0, 2)}{text}{RESET}{'═' * len(padding)}"
+
+    def message(self, line, text):
+        """Return text centered on a line, e.g. the game over screen."""
+        return f"{_at(line, max(0, (self.width - len(text)) // 2))}{text}"
+
+
+class GameServer:
+    """
+    Hosts one Snake game per connection on the running event loop.
+
+    Each session runs its own tick schedule and input queue, so a slow or
+    idle client only ever delays itself. A username can be logged in on
+    one connection at a time, since spectators find games by username.
+    """
+
+    def __init__(self, db, height=24, width=80):
+        """
+        Args:
+            db (AsyncSnakeGameDatabaseManager): Where players and finished games are saved
+            height (int): Board height, including the border and message rows
+            width (int): Board width
+        """
+        self.db = db
+        self.height = height
+        self.width = width
+        self.tasks = set()
+        self.players = set()
+        self.games = {}
+        self.watchers = {}
+        self.stats = {'connections': 0, 'active_games': 0, 'peak_games': 0,
+                      'games_finished': 0, 'ticks': 0, 'dropped_ticks': 0, 'spectators': 0}
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection: log in, then play games until the client leaves."""
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        self.stats['connections'] += 1
+        keys = TelnetInput()
+        username = None
+        try:
+            writer.write(TELNET_CHARACTER_MODE)
+            prompt = "Username: "
+            while True:
+                username = await self._read_line(reader, writer, keys, prompt)
+                if username not in self.players:
+                    break
+                prompt = f"{username} is already playing.\r\nUsername: "
+                username = None
+            self.players.add(username)
+            player = await self.db.get_player(username=username)
+            player_id = player['id'] if player else await self.db.add_player(username)
+            while await self._play(reader, writer, keys, username, player_id):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; ending normally keeps asyncio from logging every session
+            writer.write(f"{CLEAR}{SHOW_CURSOR}Server shutting down.\r\n".encode())
+        finally:
+            self.tasks.discard(task)
+            self.players.discard(username)
+            writer.close()
+
+    async def handle_spectator(self, reader, writer):
+        """
+        Stream a player's games to a spectator.
+
+        The spectator sends a username line, then receives a keyframe of the
+        game in progress (if any) followed by the shared per-tick deltas, and
+        a new keyframe whenever the player starts another game.
+        """
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        username = None
+        try:
+            username = (await reader.readline()).decode(errors="replace").strip()
+            if not username:
+                return
+            self.stats['spectators'] += 1
+            self.watchers.setdefault(username, set()).add(writer)
+            if username in self.games:
+                engine, encoder = self.games[username]
+                writer.write(encoder.keyframe(engine))
+            # Nothing more is expected from the spectator; wait for it to leave
+            while await reader.read(256):
+                pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.tasks.discard(task)
+            watchers = self.watchers.get(username)
+            if watchers is not None:
+                watchers.discard(writer)
+                if not watchers:
+                    del self.watchers[username]
+            writer.close()
+
+    def _broadcast(self, username, data):
+        """Send stream data to a player's spectators, dropping any that fall too far behind."""
+        watchers = self.watchers.get(username)
+        if not watchers or not data:
+            return
+        for watcher in list(watchers):
+            if watcher.transport.get_write_buffer_size() > MAX_WATCHER_BUFFER:
+                watchers.discard(watcher)
+                watcher.close()
+            else:
+                watcher.write(data)
+
+    async def _read_line(self, reader, writer, keys, prompt):
+        """Read a line of text, echoing it back since the client's echo is off."""
+        writer.write(f"{CLEAR}{prompt}".encode())
+        line = []
+        while True:
+            data = await reader.read(256)
+            if not data:
+                raise ConnectionError("client disconnected")
+            for key in keys.feed(data):
+                if key in (13, 10):
+                    if line:
+                        return "".join(line)
+                elif key in (8, 127):
+                    if line:
+                        line.pop()
+                        writer.write(b"\b \b")
+                elif isinstance(key, int) and 32 <= key < 127 and len(line) < 32:
+                    line.append(chr(key))
+                    writer.write(bytes([key]))
+            await writer.drain()
+
+    async def _read_keys(self, reader, keys, turns, engine, state):
+        """Queue direction keys for the running game until it ends or the client quits."""
+        while True:
+            data = await reader.read(256)
+            if not data:
+                state['quit'] = True
+                return
+            for key in keys.feed(data):
+                if isinstance(key, tuple):
+                    turns.push(key[1], engine.direction)
+                elif key in LETTER_DIRECTIONS:
+                    turns.push(LETTER_DIRECTIONS[key], engine.direction)
+                elif key in (ord("q"), ord("Q"), 3):
+                    state['quit'] = True
+                    return
+
+    async def _play(self, reader, writer, keys, username, player_id):
+        """
+        Play one game on the connection and save it.
+
+        A game the player quits (or disconnects from) before it ends is
+        abandoned rather than saved: it has no final score, and its replay
+        would fail verification for ending before the game is over.
+
+        Returns:
+            bool: True if the client wants another game
+        """
+        seed = random.getrandbits(63)
+        engine = SnakeEngine(self.height, self.width, seed=seed)
+        recorder = ReplayRecorder(seed, self.height, self.width, engine.food_value)
+        renderer = AnsiRenderer(self.height, self.width)
+        scheduler = TickScheduler(tick_delay(engine.score))
+        turns = InputQueue()
+        encoder = StateEncoder()
+        state = {'quit': False}
+        started = time.monotonic()
+
+        def status():
+            return f" Player: {username} | Score: {engine.score} "
+
+        writer.write(renderer.draw_full(engine, status()).encode())
+        self.games[username] = (engine, encoder)
+        self._broadcast(username, encoder.keyframe(engine))
+        self.stats['active_games'] += 1
+        self.stats['peak_games'] = max(self.stats['peak_games'], self.stats['active_games'])
+        reading = asyncio.create_task(self._read_keys(reader, keys, turns, engine, state))
+        try:
+            while not engine.game_over and not state['quit']:
+                await asyncio.sleep(scheduler.time_until_tick())
+                events = []
+                frames = []
+                ticks = engine.ticks
+                watched = username in self.watchers
+                for _ in range(scheduler.due_ticks()):
+                    direction = turns.pop()
+                    if engine.would_turn(direction):
+                        recorder.record_input(engine.ticks + 1, direction)
+                    tick_events = engine.step(direction)
+                    events.extend(tick_events)
+                    if watched:
+                        frames.append(encoder.encode(engine, tick_events))
+                    for event in tick_events:
+                        if event[0] == EVENT_EAT:
+                            scheduler.set_period(tick_delay(engine.score))
+                    if engine.game_over:
+                        break
+                self.stats['ticks'] += engine.ticks - ticks
+                if frames:
+                    self._broadcast(username, b"".join(frames))
+                writer.write((renderer.draw_events(events) + renderer.draw_status(status())).encode())
+                await writer.drain()
+        finally:
+            reading.cancel()
+            if self.games.get(username, (None,))[0] is engine:
+                del self.games[username]
+            self.stats['active_games'] -= 1
+            self.stats['dropped_ticks'] += scheduler.dropped
+        if state['quit'] and not engine.game_over:
+            writer.write(f"{CLEAR}{SHOW_CURSOR}Game abandoned, not saved. Bye!\r\n".encode())
+            return False
+
+        self.stats['games_finished'] += 1
+        middle = self.height // 2
+        writer.write((renderer.message(middle - 2, "GAME OVER!") +
+                      renderer.message(middle, f"Final Score: {engine.score}")).encode())
+        duration = int(time.monotonic() - started)
+        session_id = await self.db.add_game_session(
+            player_id, engine.score, duration, replay=recorder.finish(engine.ticks)
+        )
+        if session_id is not None:
+            rank = await self.db.get_player_rank(player_id)
+            if rank:
+                writer.write(renderer.message(middle + 1, f"Rank #{rank['rank']} of {rank['total']}").encode())
+        writer.write(renderer.message(middle + 3, "Play again? [y/n]").encode())
+        await writer.drain()
+
+        while True:
+            data = await reader.read(256)
+            if not data:
+                return False
+            for key in keys.feed(data):
+                if key in (ord("y"), ord("Y")):
+                    return True
+                if key in (ord("n"), ord("N"), ord("q"), ord("Q"), 3):
+                    writer.write(f"{CLEAR}{SHOW_CURSOR}Bye!\r\n".encode())
+                    return False
+
+
+async def serve(host="0.0.0.0", port=2323, db_file="snake_game.db", height=24, width=80,
+                reuse_port=False, stop=None, stream_port=None):
+    """
+    Run the server until stop is set (or forever).
+
+    Args:
+        host (str): Address to listen on
+        port (int): TCP port to listen on
+        db_file (str): Path to the SQLite database file
+        height (int): Board height
+        width (int): Board width
+        reuse_port (bool): Share the game port with other worker processes
+        stop (asyncio.Event, optional): Set to shut the server down; by default
+            SIGINT and SIGTERM do
+        stream_port (int, optional): TCP port for spectators' state streams.
+            Never shared, since a spectator can only watch games on this process.
+
+    Returns:
+        dict: Server statistics, including CPU and wall-clock seconds
+    """
+    from async_database_manager import AsyncSnakeGameDatabaseManager
+
+    if stop is None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    db = AsyncSnakeGameDatabaseManager(db_file)
+    game_server = GameServer(db, height, width)
+    server = await asyncio.start_server(
+        game_server.handle_client, host, port, reuse_port=reuse_port or None, limit=4096
+    )
+    stream_server = None
+    if stream_port is not None:
+        stream_server = await asyncio.start_server(
+            game_server.handle_spectator, host, stream_port, limit=4096
+        )
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        if stream_server:
+            stream_server.close()
+        for task in list(game_server.tasks):
+            task.cancel()
+        await asyncio.gather(*game_server.tasks, return_exceptions=True)
+        await db.close()
+
+    return dict(game_server.stats,
+                cpu_seconds=time.process_time() - cpu_started,
+                wall_seconds=time.perf_counter() - started)
+
+
+def _serve_worker(host, port, db_file, height, width, reuse_port, stream_port=None):
+    """Run one server process and print its statistics when it stops."""
+    stats = asyncio.run(serve(host, port, db_file, height, width, reuse_port, stream_port=stream_port))
+    print(STATS_PREFIX + json.dumps(stats), flush=True)
+
+
+async def _load_client(host, port, name, deadline, stats, rng):
+    """
+    Play games with random key presses until the deadline.
+
+    Output is read and thrown away, except to spot the end of each game.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats['failed'] += 1
+        return
+    stats['connected'] += 1
+    writer.write(f"{name}\r\n".encode())
+
+    async def press_keys():
+        while True:
+            await asyncio.sleep(rng.uniform(0.2, 0.6))
+            writer.write(b"\x1b[" + rng.choice(b"ABCD").to_bytes(1, "big"))
+
+    keys = asyncio.create_task(press_keys())
+    tail = b""
+    try:
+        while time.monotonic() < deadline:
+            try:
+                data = await asyncio.wait_for(reader.read(65536), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+            stats['bytes'] += len(data)
+            window = tail + data
+            if b"Play again?" in window:
+                stats['games'] += 1
+                writer.write(b"y")
+                tail = b""
+            else:
+                tail = window[-16:]
+    except ConnectionError:
+        pass
+    finally:
+        keys.cancel()
+        writer.close()
+
+
+async def _run_clients(host, port, clients, seconds, offset):
+    """Run a batch of load clients, ramping up over the first second."""
+    stats = {'connected': 0, 'failed': 0, 'games': 0, 'bytes': 0}
+    deadline = time.monotonic() + seconds
+    rng = random.Random(offset)
+    tasks = []
+    for i in range(clients):
+        tasks.append(asyncio.create_task(
+            _load_client(host, port, f"load{offset + i}", deadline, stats, random.Random(offset + i))
+        ))
+        if i % 100 == 99:
+            await asyncio.sleep(rng.uniform(0.05, 0.1))
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def _client_process(host, port, clients, seconds, offset):
+    return asyncio.run(_run_clients(host, port, clients, seconds, offset))
+
+
+def run_load(host, port, clients, seconds, processes=1):
+    """
+    Connect many clients that play random games, and count the games finished.
+
+    Args:
+        host (str): Server address
+        port (int): Server port
+        clients (int): Concurrent connections to hold
+        seconds (float): How long to run
+        processes (int): Client processes to spread the connections over
+
+    Returns:
+        dict: Connections made and failed, games finished and bytes received
+    """
+    per_process = [clients // processes + (1 if i < clients % processes else 0)
+                   for i in range(processes)]
+    totals = {'connected': 0, 'failed': 0, 'games': 0, 'bytes': 0}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_client_process, host, port, count, seconds, sum(per_process[:i]))
+                   for i, count in enumerate(per_process)]
+        for future in futures:
+            for key, value in future.result().items():
+                totals[key] += value
+    return totals
+
+
+def _load_command(args):
+    """Run the load generator, optionally against a freshly spawned local server."""
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--host", args.host,
+             "--port", str(args.port), "--db", args.db],
+            stdout=subprocess.PIPE, text=True,
+        )
+        time.sleep(1.0)
+    try:
+        totals = run_load(args.host, args.port, args.clients, args.seconds, args.processes)
+    finally:
+        server_stats = None
+        if server:
+            server.send_signal(signal.SIGINT)
+            output, _ = server.communicate(timeout=30)
+            for line in output.splitlines():
+                if line.startswith(STATS_PREFIX):
+                    server_stats = json.loads(line[len(STATS_PREFIX):])
+
+    print(f"Clients: {totals['connected']:,} connected, {totals['failed']:,} failed")
+    print(f"Games finished: {totals['games']:,} ({totals['games'] / args.seconds:,.1f}/s), "
+          f"{totals['bytes'] / args.seconds / 1024:,.0f} KiB/s received")
+    if server_stats:
+        utilization = server_stats['cpu_seconds'] / max(server_stats['wall_seconds'], 1e-9)
+        print(f"Server: {server_stats['peak_games']:,} concurrent games, "
+              f"{server_stats['ticks'] / server_stats['wall_seconds']:,.0f} ticks/s, "
+              f"{server_stats['dropped_ticks']:,} dropped ticks, {utilization:.0%} of one core")
+        if utilization > 0:
+            print(f"Estimated capacity: {server_stats['peak_games'] / utilization:,.0f} concurrent games per core")
+    return 0
+
+
+def main(argv=None):
+    """Run the game server or its load generator."""
+    parser = argparse.ArgumentParser(description="Multi-session Snake server for telnet clients.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="host games")
+    serve_parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=2323, help="TCP port to listen on")
+    serve_parser.add_argument("--stream-port", type=int,
+                              help="TCP port for spectators (python state_stream.py USERNAME); "
+                                   "needs --workers 1")
+    serve_parser.add_argument("--board", default="24x80", help="board size as HEIGHTxWIDTH")
+    serve_parser.add_argument("--workers", type=int, default=1,
+                              help="server processes sharing the port (Linux/BSD)")
+    serve_parser.add_argument("--db", default="snake_game.db", help="path to the game database")
+
+    load_parser = commands.add_parser("load", help="measure how many games a server sustains")
+    load_parser.add_argument("--host", default="127.0.0.1", help="server address")
+    load_parser.add_argument("--port", type=int, default=2323, help="server port")
+    load_parser.add_argument("--clients", type=int, default=500, help="concurrent connections")
+    load_parser.add_argument("--seconds", type=float, default=30, help="how long to run")
+    load_parser.add_argument("--processes", type=int, default=1, help="client processes")
+    load_parser.add_argument("--spawn", action="store_true",
+                             help="start a local server for the run and report its CPU use")
+    load_parser.add_argument("--db", default="snake_game.db", help="database for a spawned server")
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        return _load_command(args)
+
+    if args.workers > 1 and args.stream_port is not None:
+        # The kernel would hand each spectator to a random worker, which only knows its own games
+        parser.error("--stream-port needs --workers 1")
+
+    height, width = (int(n) for n in args.board.lower().split("x"))
+    if args.workers <= 1:
+        _serve_worker(args.host, args.port, args.db, height, width, False, args.stream_port)
+        return 0
+    workers = [
+        multiprocessing.Process(target=_serve_worker,
+                                args=(args.host, args.port, args.db, height, width, True))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def stop_workers(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    for worker in workers:
+        worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
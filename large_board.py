@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Large-board mode: the snake rules on a compact byte-per-cell grid.
+
+SnakeEngine keeps the body as a deque of (y, x) tuples, a set of occupied
+cells and an index of every free cell, which is fine for a terminal but
+costs well over a hundred bytes per cell on a board of millions. Here the
+whole board is one bytearray holding walls, food and body, with each body
+cell storing the direction to the next segment towards the head, so the
+snake needs no per-segment objects at all: moving the tail just follows the
+pointer in its cell. A 10,000 x 10,000 board takes 100 MB however long the
+snake grows. A Viewport picks the part of the board to draw.
+
+The board is not tied to a terminal: walls are its outer ring of cells, and
+food may land on any empty cell inside it.
+
+Usage:
+    python large_board.py [--board 10000x10000] [--ticks 200000] [--seed 1] [--view 24x80]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from snake_engine import (
+    FOOD_SAMPLE_ATTEMPTS, DIRECTIONS, DIRECTION_DELTAS, OPPOSITE, RIGHT,
+    EVENT_MOVE, EVENT_EAT, EVENT_FOOD, EVENT_DIE,
+)
+
+# Cell values. Body cells are BODY plus the direction of the next segment
+# towards the head; the head's own cell holds the direction it last moved.
+EMPTY = 0
+WALL = 1
+FOOD = 2
+BODY = 4
+
+# How each cell value is drawn by Viewport.rows()
+CELL_CHARS = {EMPTY: " ", WALL: "#", FOOD: "*", BODY: "o", BODY + 1: "o", BODY + 2: "o", BODY + 3: "o"}
+_DRAW_TABLE = bytes(ord(CELL_CHARS.get(value, "?")) for value in range(256))
+
+MAX_SIDE = 10_000
+
+# Cells counted per bytearray.count call when random_empty falls back to counting
+COUNT_CHUNK = 4096
+
+
+class Board:
+    """
+    A height x width grid of cells in a single bytearray, row by row.
+
+    Cells are addressed by flat index (y * width + x), so neighbours are one
+    addition away: width for a row, one for a column.
+    """
+
+    def __init__(self, height, width):
+        """
+        Args:
+            height (int): Rows, including the wall ring
+            width (int): Columns, including the wall ring
+        """
+        if not (5 <= height <= MAX_SIDE and 5 <= width <= MAX_SIDE):
+            raise ValueError(f"board sides must be between 5 and {MAX_SIDE}")
+        self.height = height
+        self.width = width
+        self.cells = bytearray(height * width)
+        wall_row = bytes([WALL]) * width
+        self.cells[:width] = wall_row
+        self.cells[-width:] = wall_row
+        wall_column = bytes([WALL]) * height
+        self.cells[::width] = wall_column
+        self.cells[width - 1::width] = wall_column
+        self.free = self.cells.count(EMPTY)
+        # Offset of the neighbour in each direction
+        self.steps = tuple(dy * width + dx for dy, dx in DIRECTION_DELTAS)
+
+    def index(self, y, x):
+        return y * self.width + x
+
+    def position(self, index):
+        return divmod(index, self.width)
+
+    def __getitem__(self, position):
+        y, x = position
+        return self.cells[y * self.width + x]
+
+    def add_wall(self, y, x):
+        """Turn an empty cell into a wall, e.g. to build obstacles."""
+        i = y * self.width + x
+        if self.cells[i] == EMPTY:
+            self.cells[i] = WALL
+            self.free -= 1
+
+    def random_empty(self, rng):
+        """
+        Pick an empty cell uniformly, by sampling first and then by counting.
+
+        Sampling finds a cell in a few tries unless the board is nearly
+        full. The fallback then picks the k-th empty cell for a random k,
+        counting COUNT_CHUNK cells at a time with bytearray.count so even
+        a huge board is searched at C speed. Scanning forward from a random
+        cell instead would favour cells just after long runs of wall or body.
+
+        Returns:
+            int: The flat index of an empty cell, or None if there is none
+        """
+        if not self.free:
+            return None
+        cells = self.cells
+        size = len(cells)
+        for _ in range(FOOD_SAMPLE_ATTEMPTS):
+            i = rng.randrange(size)
+            if cells[i] == EMPTY:
+                return i
+        k = rng.randrange(self.free)
+        start = 0
+        while start < size:
+            count = cells.count(EMPTY, start, start + COUNT_CHUNK)
+            if k < count:
+                i = cells.find(EMPTY, start)
+                for _ in range(k):
+                    i = cells.find(EMPTY, i + 1)
+                return i
+            k -= count
+            start += COUNT_CHUNK
+        return None
+
+
+class LargeBoardEngine:
+    """
+    The snake rules on a Board, with the same step() events as SnakeEngine.
+
+    The body lives in the grid: the tail's cell says which way the next
+    segment is, so moving is O(1) and the only per-snake state is the head
+    and tail positions and the length. Iterate segments() to walk the body
+    from tail to head.
+    """
+
+    def __init__(self, height, width, food_value=10, seed=None, rng=None):
+        """
+        Args:
+            height (int): Board height, including the wall ring
+            width (int): Board width, including the wall ring
+            food_value (int): Points gained when eating food
+            seed (int, optional): Seed for the engine's own random generator
+            rng (random.Random, optional): Random generator to use instead
+        """
+        self.height = height
+        self.width = width
+        self.food_value = food_value
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """Start a new game with a three-segment snake moving right."""
+        board = self.board = Board(self.height, self.width)
+        y = self.height // 2
+        x = max(3, self.width // 4)
+        head = board.index(y, x)
+        for i in (head - 2, head - 1, head):
+            board.cells[i] = BODY + RIGHT
+        board.free -= 3
+        self._head = head
+        self._tail = head - 2
+        self.length = 3
+        self.direction = RIGHT
+        self.score = 0
+        self.ticks = 0
+        self.game_over = False
+        self._place_food()
+
+    def _place_food(self):
+        i = self.board.random_empty(self.rng)
+        if i is None:
+            self._food = None
+            return None
+        self.board.cells[i] = FOOD
+        self.board.free -= 1
+        self._food = i
+        return i
+
+    @property
+    def head(self):
+        """The (y, x) position of the snake's head."""
+        return self.board.position(self._head)
+
+    @property
+    def tail(self):
+        """The (y, x) position of the snake's tail."""
+        return self.board.position(self._tail)
+
+    @property
+    def food(self):
+        """The (y, x) position of the food, or None once the board is full."""
+        return None if self._food is None else self.board.position(self._food)
+
+    def __len__(self):
+        return self.length
+
+    def segments(self):
+        """Yield the body's (y, x) positions from tail to head."""
+        cells = self.board.cells
+        steps = self.board.steps
+        i = self._tail
+        for _ in range(self.length):
+            yield self.board.position(i)
+            i += steps[cells[i] - BODY]
+
+    @property
+    def body(self):
+        """
+        The body as a head-first list, like SnakeEngine.body.
+
+        This builds a tuple per segment, so it is for renderers and keyframes
+        of modest snakes; walk segments() to avoid holding them all.
+        """
+        body = list(self.segments())
+        body.reverse()
+        return body
+
+    def would_turn(self, direction):
+        """
+        Returns:
+            bool: True if stepping with this direction would change the snake's heading
+        """
+        return direction is not None and direction != self.direction \
+            and direction != OPPOSITE[self.direction]
+
+    def safe_moves(self):
+        """
+        Returns:
+            list: (direction, (y, x)) for each move that survives the next tick
+        """
+        cells = self.board.cells
+        moves = []
+        for direction in DIRECTIONS:
+            if direction == OPPOSITE[self.direction]:
+                continue
+            i = self._head + self.board.steps[direction]
+            value = cells[i]
+            # The tail moves out of the way, since the snake is not eating there
+            if value == EMPTY or value == FOOD or i == self._tail:
+                moves.append((direction, self.board.position(i)))
+        return moves
+
+    def step(self, direction=None):
+        """
+        Advance the game by one tick.
+
+        Args:
+            direction (int, optional): New direction to turn to before moving
+
+        Returns:
+            list: Event tuples describing what changed during this tick, as
+                SnakeEngine.step() returns them
+        """
+        if self.game_over:
+            return []
+        if direction is not None and direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+        board = self.board
+        cells = board.cells
+        old_head = self._head
+        head = old_head + board.steps[self.direction]
+        self.ticks += 1
+
+        # The tail moves out of the way before the head moves in
+        eating = head == self._food
+        tail = None
+        if not eating:
+            tail = self._tail
+            self._tail = tail + board.steps[cells[tail] - BODY]
+            cells[tail] = EMPTY
+            board.free += 1
+            tail = board.position(tail)
+
+        old_position = board.position(old_head)
+        head_position = board.position(head)
+        events = [(EVENT_MOVE, old_position, head_position, tail)]
+        cells[old_head] = BODY + self.direction
+        self._head = head
+
+        value = cells[head]
+        if value == WALL:
+            self.game_over = True
+            events.append((EVENT_DIE, "wall"))
+            return events
+        if value >= BODY:
+            self.game_over = True
+            events.append((EVENT_DIE, "self"))
+            return events
+
+        cells[head] = BODY + self.direction
+        if eating:
+            self.length += 1
+            self.score += self.food_value
+            events.append((EVENT_EAT, self.score))
+            if self._place_food() is None:
+                # Nowhere left to place food, so the game ends cleanly
+                self.game_over = True
+                events.append((EVENT_DIE, "full"))
+            else:
+                events.append((EVENT_FOOD, self.food))
+        else:
+            board.free -= 1
+        return events
+
+
+class Viewport:
+    """
+    A window onto part of a board, e.g. the terminal's playfield.
+
+    follow() scrolls the window only when the tracked cell comes within
+    `margin` cells of an edge, so the view stays still most of the time.
+    """
+
+    def __init__(self, height, width, margin=None):
+        """
+        Args:
+            height (int): Rows shown
+            width (int): Columns shown
+            margin (int, optional): Cells kept between the tracked cell and an
+                edge; a quarter of the smaller side by default
+        """
+        self.height = height
+        self.width = width
+        self.margin = margin if margin is not None else min(height, width) // 4
+        self.top = 0
+        self.left = 0
+
+    def follow(self, position, board):
+        """
+        Scroll so a cell stays inside the margins, without leaving the board.
+
+        Returns:
+            bool: True if the view moved, so the whole window must be redrawn
+        """
+        y, x = position
+        top, left = self.top, self.left
+        if y < top + self.margin:
+            top = y - self.margin
+        elif y >= top + self.height - self.margin:
+            top = y - self.height + self.margin + 1
+        if x < left + self.margin:
+            left = x - self.margin
+        elif x >= left + self.width - self.margin:
+            left = x - self.width + self.margin + 1
+        top = max(0, min(top, board.height - self.height))
+        left = max(0, min(left, board.width - self.width))
+        moved = (top, left) != (self.top, self.left)
+        self.top, self.left = top, left
+        return moved
+
+    def contains(self, position):
+        y, x = position
+        return self.top <= y < self.top + self.height and self.left <= x < self.left + self.width
+
+    def to_screen(self, position):
+        """Convert a board position to a (row, column) in the window."""
+        return position[0] - self.top, position[1] - self.left
+
+    def rows(self, board, head=None):
+        """
+        Draw the visible part of the board as text.
+
+        Each row is one bytearray slice translated to characters, so drawing
+        costs the size of the window, not of the board.
+
+        Returns:
+            list: One string per visible row
+        """
+        rows = []
+        width = board.width
+        for y in range(self.top, min(self.top + self.height, board.height)):
+            start = y * width + self.left
+            row = board.cells[start:start + min(self.width, width - self.left)]
+            rows.append(row.translate(_DRAW_TABLE).decode("ascii"))
+        if head is not None and self.contains(head):
+            row, column = self.to_screen(head)
+            rows[row] = rows[row][:column] + "@" + rows[row][column + 1:]
+        return rows
+
+
+def greedy_move(engine):
+    """Take the surviving move closest to the food, like the tournament's greedy bot."""
+    moves = engine.safe_moves()
+    if not moves:
+        return None
+    if engine.food is None:
+        return moves[0][0]
+    food_y, food_x = engine.food
+    return min(moves, key=lambda move: abs(move[1][0] - food_y) + abs(move[1][1] - food_x))[0]
+
+
+def main():
+    """Run a greedy bot on a large board and report speed and memory."""
+    parser = argparse.ArgumentParser(description="Play a bot game on a large board.")
+    parser.add_argument("--board", default="10000x10000", help="board size as HEIGHTxWIDTH")
+    parser.add_argument("--ticks", type=int, default=200_000, help="most ticks to play")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the game")
+    parser.add_argument("--view", default="24x80", help="size of the final view around the head")
+    args = parser.parse_args()
+
+    height, width = (int(n) for n in args.board.lower().split("x"))
+    started = time.perf_counter()
+    engine = LargeBoardEngine(height, width, seed=args.seed)
+    setup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    while not engine.game_over and engine.ticks < args.ticks:
+        engine.step(greedy_move(engine))
+    elapsed = time.perf_counter() - started
+
+    view_height, view_width = (int(n) for n in args.view.lower().split("x"))
+    viewport = Viewport(view_height, view_width)
+    viewport.follow(engine.head, engine.board)
+    print("\n".join(viewport.rows(engine.board, engine.head)))
+    print(f"Board {height:,} x {width:,}: grid {len(engine.board.cells) / 2 ** 20:,.1f} MiB, "
+          f"set up in {setup:.2f}s")
+    print(f"{engine.ticks:,} ticks in {elapsed:.2f}s ({engine.ticks / max(elapsed, 1e-9):,.0f} ticks/s), "
+          f"length {len(engine):,}, score {engine.score:,}{' (game over)' if engine.game_over else ''}")
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return 0
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"Peak memory: {peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10):,.0f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the Snake Game database.
+
+The schema version is kept in SQLite's PRAGMA user_version. Opening a
+database that is already current costs a single pragma read; otherwise
+each pending migration runs in its own transaction together with the bump
+of user_version, so an interrupted upgrade resumes where it stopped.
+
+Databases created before versioning report version 0 and may already hold
+any part of the schema, so every migration is written to be safe on such a
+database: it creates only what is missing and backfills only what it
+created. Add new migrations to the end of MIGRATIONS; never reorder them.
+"""
+
+import sqlite3
+
+
+def _create_base_tables(cursor):
+    """Players, game sessions, highscores and settings."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS game_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_id INTEGER NOT NULL,
+        score INTEGER NOT NULL,
+        date_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration INTEGER NOT NULL,  -- in seconds
+        FOREIGN KEY (player_id) REFERENCES players (id) ON DELETE CASCADE
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS highscores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_id INTEGER NOT NULL,
+        score INTEGER NOT NULL,
+        date_achieved TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (player_id) REFERENCES players (id) ON DELETE CASCADE
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS game_settings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        setting_name TEXT UNIQUE NOT NULL,
+        setting_value TEXT NOT NULL,
+        description TEXT
+    )
+    ''')
+
+
+def _index_sessions_by_player_and_score(cursor):
+    """Replace the player_id index with (player_id, score), so a player's best session is a seek."""
+    cursor.execute("DROP INDEX IF EXISTS idx_game_sessions_player_id")
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_game_sessions_player_score ON game_sessions (player_id, score)
+    ''')
+
+
+def _add_player_stats(cursor):
+    """Per-player statistics rollup, kept current by triggers on game_sessions."""
+    backfill = not _exists(cursor, "table", "player_stats")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS player_stats (
+        player_id INTEGER PRIMARY KEY,
+        games_played INTEGER NOT NULL,
+        total_duration INTEGER NOT NULL,  -- in seconds
+        total_score INTEGER NOT NULL,
+        best_score INTEGER NOT NULL
+    )
+    ''')
+    if backfill:
+        cursor.execute('''
+        INSERT INTO player_stats (player_id, games_played, total_duration, total_score, best_score)
+        SELECT player_id, COUNT(*), SUM(duration), SUM(score), MAX(score)
+        FROM game_sessions GROUP BY player_id
+        ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS player_stats_insert AFTER INSERT ON game_sessions
+    BEGIN
+        INSERT INTO player_stats (player_id, games_played, total_duration, total_score, best_score)
+        VALUES (NEW.player_id, 1, NEW.duration, NEW.score, NEW.score)
+        ON CONFLICT (player_id) DO UPDATE SET
+            games_played = games_played + 1,
+            total_duration = total_duration + NEW.duration,
+            total_score = total_score + NEW.score,
+            best_score = MAX(best_score, NEW.score);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS player_stats_delete AFTER DELETE ON game_sessions
+    BEGIN
+        UPDATE player_stats SET
+            games_played = games_played - 1,
+            total_duration = total_duration - OLD.duration,
+            total_score = total_score - OLD.score,
+            best_score = CASE
+                WHEN OLD.score < best_score THEN best_score
+                ELSE COALESCE(
+                    (SELECT MAX(score) FROM game_sessions WHERE player_id = OLD.player_id), 0)
+            END
+        WHERE player_id = OLD.player_id;
+        DELETE FROM player_stats WHERE player_id = OLD.player_id AND games_played = 0;
+    END
+    ''')
+
+
+def _one_highscore_per_player(cursor):
+    """Keep only each player's best highscore row, and enforce it with a unique index."""
+    if _exists(cursor, "index", "idx_highscores_player_id"):
+        return
+    cursor.execute('''
+    DELETE FROM highscores WHERE id NOT IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY player_id ORDER BY score DESC, id ASC
+            ) AS position
+            FROM highscores
+        )
+        WHERE position = 1
+    )
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX idx_highscores_player_id ON highscores (player_id)")
+
+
+def _index_highscores_by_score_and_player(cursor):
+    """Replace the score index with (score DESC, player_id) for leaderboard and rank lookups."""
+    cursor.execute("DROP INDEX IF EXISTS idx_highscores_score")
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_highscores_score_player ON highscores (score DESC, player_id)
+    ''')
+
+
+def _add_highscore_counts(cursor):
+    """
+    Number of players per highscore, kept current by triggers, so a rank is a
+    sum over the distinct scores above a player rather than a count of players.
+    """
+    backfill = not _exists(cursor, "table", "highscore_counts")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS highscore_counts (
+        score INTEGER PRIMARY KEY,
+        players INTEGER NOT NULL
+    )
+    ''')
+    if backfill:
+        cursor.execute('''
+        INSERT INTO highscore_counts (score, players)
+        SELECT score, COUNT(*) FROM highscores GROUP BY score
+        ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS highscore_counts_insert AFTER INSERT ON highscores
+    BEGIN
+        INSERT INTO highscore_counts (score, players) VALUES (NEW.score, 1)
+        ON CONFLICT (score) DO UPDATE SET players = players + 1;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS highscore_counts_update AFTER UPDATE OF score ON highscores
+    WHEN OLD.score != NEW.score
+    BEGIN
+        UPDATE highscore_counts SET players = players - 1 WHERE score = OLD.score;
+        DELETE FROM highscore_counts WHERE score = OLD.score AND players = 0;
+        INSERT INTO highscore_counts (score, players) VALUES (NEW.score, 1)
+        ON CONFLICT (score) DO UPDATE SET players = players + 1;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS highscore_counts_delete AFTER DELETE ON highscores
+    BEGIN
+        UPDATE highscore_counts SET players = players - 1 WHERE score = OLD.score;
+        DELETE FROM highscore_counts WHERE score = OLD.score AND players = 0;
+    END
+    ''')
+
+
+def _add_replays(cursor):
+    """Compact input logs (see replay.py), one per game session."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS replays (
+        session_id INTEGER PRIMARY KEY,
+        data BLOB NOT NULL,
+        FOREIGN KEY (session_id) REFERENCES game_sessions (id) ON DELETE CASCADE
+    )
+    ''')
+
+
+# Migration n (1-based) brings a database from user_version n - 1 to n
+MIGRATIONS = (
+    _create_base_tables,
+    _index_sessions_by_player_and_score,
+    _add_player_stats,
+    _one_highscore_per_player,
+    _index_highscores_by_score_and_player,
+    _add_highscore_counts,
+    _add_replays,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _exists(cursor, kind, name):
+    """Check sqlite_master for a table or index."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name))
+    return cursor.fetchone() is not None
+
+
+def schema_version(conn):
+    """
+    Returns:
+        int: The database's PRAGMA user_version
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=SCHEMA_VERSION):
+    """
+    Apply pending migrations up to the target version.
+
+    Each migration takes the write lock with BEGIN IMMEDIATE and re-reads
+    the version first, so processes opening the same database at once run
+    every migration exactly once between them.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the database
+        target (int): Version to migrate to; the latest by default
+
+    Returns:
+        int: The schema version afterwards. A database newer than this code
+            is left as it is.
+
+    Raises:
+        sqlite3.Error: If a migration fails; it is rolled back first
+    """
+    version = schema_version(conn)
+    if version >= target:
+        return version
+
+    if conn.in_transaction:
+        conn.commit()
+    cursor = conn.cursor()
+    while version < target:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            if version < target:
+                MIGRATIONS[version](cursor)
+                version += 1
+                cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return version
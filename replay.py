@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Compact replay recording and playback for the Snake Game.
+
+A replay stores the engine's RNG seed, the board size and the player's
+direction changes, never the frames. Each direction change is one varint
+holding the ticks since the previous change shifted left by two bits,
+with the 2-bit direction in the low bits, so a whole game usually fits in
+a few hundred bytes. Re-running SnakeEngine with the same seed and inputs
+reproduces the game exactly, at any speed.
+
+Usage:
+    python replay.py SESSION_ID [--speed 2.0 | --headless] [--db snake_game.db]
+"""
+
+import argparse
+import struct
+import sys
+import time
+
+from snake_engine import SnakeEngine
+
+MAGIC = b"SNKR"
+VERSION = 1
+
+# Header: magic, version, seed, height, width, food_value
+_HEADER = struct.Struct("<4sBQHHI")
+
+# Largest food value the header's unsigned 32-bit field can hold
+MAX_FOOD_VALUE = 2 ** 32 - 1
+
+# A record of 0 (which no direction change can produce, because each is at
+# least one tick after the previous one) introduces a terminal resize
+_RESIZE = 0
+
+
+def _write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    """Read an unsigned LEB128 varint, returning (value, new_position)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    """
+    A recorded game: starting parameters, total ticks and timed inputs.
+
+    Inputs are (tick, direction) pairs and resizes are (tick, height, width)
+    triples, where tick is the engine step the change applies to (1-based).
+    """
+
+    def __init__(self, seed, height, width, food_value, ticks=0, inputs=None, resizes=None):
+        self.seed = seed
+        self.height = height
+        self.width = width
+        self.food_value = food_value
+        self.ticks = ticks
+        self.inputs = inputs if inputs is not None else []
+        self.resizes = resizes if resizes is not None else []
+
+    def to_bytes(self):
+        """
+        Encode the replay.
+
+        Returns:
+            bytes: The compact binary form
+        """
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.seed, self.height, self.width, self.food_value))
+        _write_varint(out, self.ticks)
+
+        last_input_tick = 0
+        resizes = iter(self.resizes)
+        resize = next(resizes, None)
+        for tick, direction in self.inputs + [(None, None)]:
+            # Resizes apply before the input of the same tick
+            while resize is not None and (tick is None or resize[0] <= tick):
+                out.append(_RESIZE)
+                _write_varint(out, resize[0] - last_input_tick)
+                _write_varint(out, resize[1])
+                _write_varint(out, resize[2])
+                resize = next(resizes, None)
+            if tick is not None:
+                _write_varint(out, ((tick - last_input_tick) << 2) | direction)
+                last_input_tick = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decode a replay.
+
+        Args:
+            data (bytes): The compact binary form
+
+        Returns:
+            Replay: The decoded replay
+
+        Raises:
+            ValueError: If the data is not a replay this version can read
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Replay data is too short")
+        magic, version, seed, height, width, food_value = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a supported replay")
+
+        ticks, pos = _read_varint(data, _HEADER.size)
+        replay = cls(seed, height, width, food_value, ticks)
+        last_input_tick = 0
+        while pos < len(data):
+            record, pos = _read_varint(data, pos)
+            if record == _RESIZE:
+                delta, pos = _read_varint(data, pos)
+                new_height, pos = _read_varint(data, pos)
+                new_width, pos = _read_varint(data, pos)
+                replay.resizes.append((last_input_tick + delta, new_height, new_width))
+            else:
+                last_input_tick += record >> 2
+                replay.inputs.append((last_input_tick, record & 3))
+        return replay
+
+    def new_engine(self):
+        """
+        Returns:
+            SnakeEngine: An engine in the replay's starting state
+        """
+        return SnakeEngine(self.height, self.width, food_value=self.food_value, seed=self.seed)
+
+    def steps(self, engine=None):
+        """
+        Re-run the game one tick at a time.
+
+        Args:
+            engine (SnakeEngine, optional): Engine to drive; a new one by default
+
+        Yields:
+            tuple: (engine, events) after each tick
+        """
+        engine = engine or self.new_engine()
+        inputs = dict(self.inputs)
+        resizes = {tick: (height, width) for tick, height, width in self.resizes}
+        while not engine.game_over and engine.ticks < self.ticks:
+            tick = engine.ticks + 1
+            if tick in resizes:
+                engine.resize(*resizes[tick])
+            yield engine, engine.step(inputs.get(tick))
+
+    def simulate(self, before_tick=None):
+        """
+        Re-run the whole game as fast as possible, without rendering.
+
+        Args:
+            before_tick (callable, optional): Called with the engine before
+                each tick is stepped, e.g. to add up the live game's tick delays
+
+        Returns:
+            SnakeEngine: The engine in its final state
+        """
+        engine = self.new_engine()
+        step = engine.step
+        inputs = dict(self.inputs)
+        resizes = {tick: (height, width) for tick, height, width in self.resizes}
+        ticks = self.ticks
+        while not engine.game_over and engine.ticks < ticks:
+            tick = engine.ticks + 1
+            if resizes and tick in resizes:
+                engine.resize(*resizes[tick])
+            if before_tick is not None:
+                before_tick(engine)
+            step(inputs.get(tick))
+        return engine
+
+
+def is_recordable_food_value(food_value):
+    """Whether a replay header can store food_value: a whole number from 0 to MAX_FOOD_VALUE."""
+    return isinstance(food_value, int) and not isinstance(food_value, bool) \
+        and 0 <= food_value <= MAX_FOOD_VALUE
+
+
+class ReplayRecorder:
+    """Collects inputs from a live game and encodes them as a Replay."""
+
+    def __init__(self, seed, height, width, food_value):
+        """
+        Raises:
+            ValueError: If food_value is not a whole number from 0 to
+                MAX_FOOD_VALUE, so a bad setting fails when the game starts
+                rather than when its replay is saved
+        """
+        if not is_recordable_food_value(food_value):
+            raise ValueError(f"food_value must be a whole number from 0 to {MAX_FOOD_VALUE}, got {food_value!r}")
+        self.replay = Replay(seed, height, width, food_value)
+
+    def record_input(self, tick, direction):
+        """Record a direction change applied on the given engine step."""
+        self.replay.inputs.append((tick, direction))
+
+    def record_resize(self, tick, height, width):
+        """Record a board resize applied before the given engine step."""
+        self.replay.resizes.append((tick, height, width))
+
+    def finish(self, ticks):
+        """
+        Args:
+            ticks (int): Number of engine steps the game lasted
+
+        Returns:
+            bytes: The encoded replay
+        """
+        self.replay.ticks = ticks
+        return self.replay.to_bytes()
+
+
+def tick_delay(score):
+    """Seconds per tick the live game uses at a given score."""
+    # Speed up slightly as score increases (but not too much)
+    return max(50, 100 - (score // 50) * 5) / 1000
+
+
+def main(argv=None):
+    """Play back a saved replay in the terminal or headless."""
+    parser = argparse.ArgumentParser(description="Play back a recorded Snake game.")
+    parser.add_argument("session_id", type=int, help="game session to replay")
+    parser.add_argument("--db", default="snake_game.db", help="path to the game database")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier")
+    parser.add_argument("--headless", action="store_true",
+                        help="re-simulate at full speed without drawing")
+    args = parser.parse_args(argv)
+
+    from database_manager import SnakeGameDatabaseManager
+
+    db = SnakeGameDatabaseManager(args.db)
+    data = db.get_replay(args.session_id)
+    session = db.get_game_session(args.session_id)
+    db.close()
+    if data is None:
+        print(f"No replay recorded for session {args.session_id}")
+        return 1
+    replay = Replay.from_bytes(data)
+
+    if args.headless:
+        start = time.perf_counter()
+        engine = replay.simulate()
+        elapsed = time.perf_counter() - start
+        print(f"Session {args.session_id}: score {engine.score} in {engine.ticks} ticks "
+              f"({engine.ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+        if session and session['score'] != engine.score:
+            print(f"Warning: recorded score was {session['score']}")
+        return 0
+
+    import curses
+    from snake_game import watch_replay
+
+    curses.wrapper(watch_replay, replay, args.speed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Batch verification of submitted scores against their recorded replays.
+
+Every session with a replay is re-simulated with the game rules and the
+replayed score and expected play time are compared with what was saved.
+Work is spread over a ProcessPoolExecutor in chunks, so a large backlog
+uses every core.
+
+Usage:
+    python replay_verifier.py [--db snake_game.db] [--workers N] [--output flagged.csv]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from replay import Replay, tick_delay
+
+# Allowed relative difference between recorded and expected play time
+DURATION_TOLERANCE = 0.5
+# Differences below this many seconds are never flagged
+DURATION_SLACK = 2
+# Largest board side a replay may use; far beyond any terminal, and small
+# enough that a forged header cannot make a worker build a huge board
+MAX_BOARD_SIDE = 1000
+
+
+def _check_board_sizes(replay):
+    """
+    Raises:
+        ValueError: If the replay starts on or resizes to a board larger than MAX_BOARD_SIDE
+    """
+    sizes = [(replay.height, replay.width)] + [(height, width) for _, height, width in replay.resizes]
+    for height, width in sizes:
+        if height > MAX_BOARD_SIDE or width > MAX_BOARD_SIDE:
+            raise ValueError(f"board of {height}x{width} is larger than {MAX_BOARD_SIDE}x{MAX_BOARD_SIDE}")
+
+
+def verify_session(session_id, score, duration, data, tolerance=DURATION_TOLERANCE):
+    """
+    Re-simulate one session's replay and compare it with the saved result.
+
+    Args:
+        session_id (int): The game session ID
+        score (int): The score saved for the session
+        duration (int): The duration saved for the session, in seconds
+        data (bytes): The encoded replay
+        tolerance (float): Allowed relative difference in play time
+
+    Returns:
+        dict: The session ID, replayed score and expected duration, and a
+            reason string if the session is flagged (None if it checks out)
+    """
+    result = {
+        'session_id': session_id,
+        'recorded_score': score,
+        'replayed_score': None,
+        'recorded_duration': duration,
+        'expected_duration': None,
+        'reason': None,
+    }
+    try:
+        replay = Replay.from_bytes(data)
+        _check_board_sizes(replay)
+    except (ValueError, IndexError) as e:
+        result['reason'] = f"unreadable replay: {e}"
+        return result
+
+    expected = 0.0
+
+    def add_tick_delay(engine):
+        nonlocal expected
+        expected += tick_delay(engine.score)
+
+    engine = replay.simulate(before_tick=add_tick_delay)
+
+    result['replayed_score'] = engine.score
+    result['expected_duration'] = round(expected, 2)
+    if engine.score != score:
+        result['reason'] = "score mismatch"
+    elif not engine.game_over:
+        result['reason'] = "replay ends before the game is over"
+    elif abs(duration - expected) > max(DURATION_SLACK, tolerance * expected):
+        result['reason'] = "duration mismatch"
+    return result
+
+
+def verify_chunk(rows, tolerance=DURATION_TOLERANCE):
+    """
+    Verify a chunk of sessions in a worker process.
+
+    Args:
+        rows (list): (session_id, score, duration, replay_data) tuples
+        tolerance (float): Allowed relative difference in play time
+
+    Returns:
+        tuple: (number of sessions checked, list of flagged results)
+    """
+    flagged = []
+    for row in rows:
+        result = verify_session(*row, tolerance=tolerance)
+        if result['reason']:
+            flagged.append(result)
+    return len(rows), flagged
+
+
+def verify_database(db_file, workers=None, chunk_size=500, after_id=0,
+                    tolerance=DURATION_TOLERANCE, progress=None):
+    """
+    Verify every session with a replay in the database.
+
+    Chunks are read in session ID order while earlier chunks are being
+    verified, with at most two chunks per worker in flight.
+
+    Args:
+        db_file (str): Path to the SQLite database file
+        workers (int, optional): Worker processes; defaults to the CPU count
+        chunk_size (int): Sessions sent to a worker at a time
+        after_id (int): Only verify sessions with a larger ID, to resume a run
+        tolerance (float): Allowed relative difference in play time
+        progress (callable, optional): Called with (checked, flagged_count, last_id)
+
+    Returns:
+        tuple: (number of sessions checked, list of flagged results)
+    """
+    from database_manager import SnakeGameDatabaseManager
+
+    workers = workers or os.cpu_count() or 1
+    db = SnakeGameDatabaseManager(db_file)
+    checked = 0
+    flagged = []
+    last_id = after_id
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < workers * 2:
+                    rows = db.get_sessions_with_replays(after_id=last_id, limit=chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    last_id = rows[-1]['id']
+                    chunk = [(row['id'], row['score'], row['duration'], row['data']) for row in rows]
+                    in_flight.add(executor.submit(verify_chunk, chunk, tolerance))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    count, chunk_flagged = future.result()
+                    checked += count
+                    flagged.extend(chunk_flagged)
+                if progress:
+                    progress(checked, len(flagged), last_id)
+    finally:
+        db.close()
+    flagged.sort(key=lambda result: result['session_id'])
+    return checked, flagged
+
+
+def main(argv=None):
+    """Verify replays in a database and report the flagged sessions."""
+    parser = argparse.ArgumentParser(description="Verify saved Snake scores against their replays.")
+    parser.add_argument("--db", default="snake_game.db", help="path to the game database")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="sessions per work unit")
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this session ID")
+    parser.add_argument("--tolerance", type=float, default=DURATION_TOLERANCE,
+                        help="allowed relative play time difference")
+    parser.add_argument("--output", help="write flagged sessions to this CSV file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def report(checked, flagged_count, last_id):
+        elapsed = time.perf_counter() - start
+        print(f"\r{checked:,} sessions checked, {flagged_count:,} flagged, "
+              f"{checked / max(elapsed, 1e-9):,.0f}/s (last ID {last_id})", end="", flush=True)
+
+    checked, flagged = verify_database(
+        args.db, args.workers, args.chunk_size, args.after_id, args.tolerance, progress=report
+    )
+    print()
+    print(f"Verified {checked:,} sessions in {time.perf_counter() - start:.1f}s; {len(flagged):,} flagged")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(flagged[0]) if flagged else ['session_id'])
+            writer.writeheader()
+            writer.writerows(flagged)
+    else:
+        for result in flagged[:20]:
+            print(f"  Session {result['session_id']}: {result['reason']} "
+                  f"(saved {result['recorded_score']} in {result['recorded_duration']}s, "
+                  f"replayed {result['replayed_score']} in ~{result['expected_duration']}s)")
+        if len(flagged) > 20:
+            print(f"  ... and {len(flagged) - 20:,} more (use --output to save them all)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
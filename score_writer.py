@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Background score submission for the Snake Game.
+
+The game loop hands finished sessions to a BackgroundScoreWriter and keeps
+running; a worker thread with its own database connection saves them in
+batches and resolves a Future with the player's new highscore and rank.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from database_manager import SnakeGameDatabaseManager
+
+# Queued in place of a session to tell the worker to stop
+_STOP = object()
+
+
+class BackgroundScoreWriter:
+    """
+    Saves game sessions on a worker thread.
+
+    Sessions queued while the worker is busy are written together with
+    add_game_sessions_bulk(), so a burst of submissions costs one commit.
+    """
+
+    def __init__(self, db_file="snake_game.db", batch_size=256, leaderboard=None):
+        """
+        Initialize the writer. The worker thread starts on the first submit().
+
+        Args:
+            db_file (str): Path to the SQLite database file
+            batch_size (int): Maximum number of sessions written per transaction
+            leaderboard (LeaderboardCache, optional): Another manager's leaderboard
+                cache to invalidate after each batch
+        """
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.leaderboard = leaderboard
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, player_id, score, duration, date_played=None, replay=None, callback=None):
+        """
+        Queue a game session to be saved.
+
+        Args:
+            player_id (int): The player's ID
+            score (int): The score achieved in the game
+            duration (int): The duration of the game in seconds
+            date_played (str, optional): Date and time the game was played
+            replay (bytes, optional): Encoded replay of the game
+            callback (callable, optional): Called with the Future once it resolves
+
+        Returns:
+            Future: Resolves to a dict with the new session_id, the player's
+                highscore row and their rank, or raises sqlite3.Error
+        """
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        self._start()
+        self._queue.put((future, (player_id, score, duration, date_played, replay)))
+        return future
+
+    def flush(self):
+        """Block until every queued session has been written."""
+        if self._thread:
+            self._queue.join()
+
+    def close(self):
+        """Write any queued sessions and stop the worker thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _start(self):
+        """Start the worker thread if it is not running yet."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Worker loop: drain the queue in batches and write each batch in one transaction."""
+        db = SnakeGameDatabaseManager(self.db_file, persistent=True)
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                pending = [item for item in batch if item is not _STOP]
+                stopping = len(pending) < len(batch)
+                try:
+                    if pending:
+                        self._write(db, pending)
+                except Exception as e:
+                    # Never leave a caller waiting on a future that cannot resolve
+                    for future, _ in pending:
+                        if not future.done():
+                            future.set_exception(e)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            db.close_persistent()
+
+    def _write(self, db, pending):
+        """Save a batch of sessions and resolve their futures."""
+        session_ids = db.add_game_sessions_bulk([session for _, session in pending])
+        if not session_ids:
+            for future, _ in pending:
+                future.set_exception(sqlite3.Error("Failed to save game session"))
+            return
+        if self.leaderboard is not None:
+            self.leaderboard.invalidate()
+
+        for (future, session), session_id in zip(pending, session_ids):
+            player_id = session[0]
+            future.set_result({
+                'session_id': session_id,
+                'highscore': db.get_player_highscore(player_id),
+                'rank': db.get_player_rank(player_id),
+            })
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Headless game rules for the Snake Game.
+
+The curses front end in snake_game.py drives a SnakeEngine instance, and the
+same engine can be stepped without a terminal by bots, replays and tests.
+"""
+
+import random
+from collections import deque
+
+# Directions, numbered so they fit in two bits
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+OPPOSITE = (DOWN, UP, RIGHT, LEFT)
+
+# Event kinds returned by SnakeEngine.step()
+EVENT_MOVE = "move"  # (EVENT_MOVE, old_head, new_head, vacated_tail or None)
+EVENT_EAT = "eat"    # (EVENT_EAT, score)
+EVENT_FOOD = "food"  # (EVENT_FOOD, new_food_position)
+EVENT_DIE = "die"    # (EVENT_DIE, reason) where reason is "wall", "self" or "full"
+
+# Random attempts create_food makes before scanning for free cells
+FOOD_SAMPLE_ATTEMPTS = 16
+
+
+def food_area(height, width):
+    """Return the (top, bottom, left, right) inclusive bounds where food may appear."""
+    # Use safe boundaries for food (2 cells from borders)
+    return 2, height - 3, 2, width - 3
+
+
+def create_food(height, width, snake, rng=random):
+    """
+    Create food at a random position that is not occupied by the snake.
+
+    Returns:
+        tuple: The (y, x) food position, or None if the board is full
+    """
+    top, bottom, left, right = food_area(height, width)
+    for _ in range(FOOD_SAMPLE_ATTEMPTS):
+        food = (rng.randint(top, bottom), rng.randint(left, right))
+        if food not in snake:
+            return food
+
+    # The board is crowded, so pick uniformly among the cells that are left
+    occupied = snake if isinstance(snake, (set, frozenset)) else set(snake)
+    free = [
+        (y, x)
+        for y in range(top, bottom + 1)
+        for x in range(left, right + 1)
+        if (y, x) not in occupied
+    ]
+    return rng.choice(free) if free else None
+
+
+class FreeCellIndex:
+    """
+    The set of cells food may be placed on, with O(1) uniform sampling.
+
+    Cells live in a list, and a dict maps each cell to its slot so removal
+    can swap the last cell into the hole instead of shifting the list.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = list(cells)
+        self.positions = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def add(self, cell):
+        """Mark a cell as free."""
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """Mark a cell as taken, if it was free."""
+        i = self.positions.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.positions[last] = i
+
+    def sample(self, rng=random):
+        """
+        Pick a free cell uniformly at random.
+
+        Returns:
+            tuple: A free (y, x) cell, or None if there are none left
+        """
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+class SnakeEngine:
+    """
+    The snake rules without any rendering or input handling.
+
+    The body is a deque with the head on the left, mirrored by a set of
+    occupied cells, so moving and self-collision checks are O(1) no matter
+    how long the snake grows. A FreeCellIndex of the cells food may land on
+    keeps food placement O(1) as the board fills up.
+    """
+
+    def __init__(self, height, width, food_value=10, seed=None, rng=None):
+        """
+        Initialize a new game on a board of the given size.
+
+        Args:
+            height (int): Playfield height, including the border rows
+            width (int): Playfield width, including the border columns
+            food_value (int): Points gained when eating food
+            seed (int, optional): Seed for the engine's own random generator
+            rng (random.Random, optional): Random generator to use instead
+        """
+        self.height = height
+        self.width = width
+        self.food_value = food_value
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """Start a new game with a three-segment snake moving right."""
+        y = self.height // 2
+        x = self.width // 4
+        self.body = deque([(y, x), (y, x - 1), (y, x - 2)])
+        self.occupied = set(self.body)
+        self.direction = RIGHT
+        self.score = 0
+        self.ticks = 0
+        self.game_over = False
+        self._index_free_cells()
+        self.food = self.free_cells.sample(self.rng)
+
+    def _index_free_cells(self):
+        """Rebuild the free-cell index from the current body."""
+        top, bottom, left, right = self._food_area = food_area(self.height, self.width)
+        self.free_cells = FreeCellIndex(
+            (y, x)
+            for y in range(top, bottom + 1)
+            for x in range(left, right + 1)
+            if (y, x) not in self.occupied
+        )
+
+    @property
+    def head(self):
+        """The (y, x) position of the snake's head."""
+        return self.body[0]
+
+    def __len__(self):
+        return len(self.body)
+
+    def resize(self, height, width):
+        """Update the board size after the terminal was resized."""
+        self.height = height
+        self.width = width
+        self._index_free_cells()
+
+    def would_turn(self, direction):
+        """
+        Check whether a direction is a real turn, so only turns need recording.
+
+        Returns:
+            bool: True if stepping with this direction would change the snake's heading
+        """
+        return direction is not None and direction != self.direction \
+            and direction != OPPOSITE[self.direction]
+
+    def turn(self, direction):
+        """
+        Change direction, ignoring 180-degree turns.
+
+        Returns:
+            bool: True if the direction was accepted
+        """
+        if direction == OPPOSITE[self.direction]:
+            return False
+        self.direction = direction
+        return True
+
+    def step(self, direction=None):
+        """
+        Advance the game by one tick.
+
+        Args:
+            direction (int, optional): New direction to turn to before moving
+
+        Returns:
+            list: Event tuples describing what changed during this tick
+        """
+        if self.game_over:
+            return []
+        if direction is not None and direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+        body = self.body
+        occupied = self.occupied
+        free_cells = self.free_cells
+        old_head = body[0]
+        dy, dx = DIRECTION_DELTAS[self.direction]
+        head_y = old_head[0] + dy
+        head_x = old_head[1] + dx
+        head = (head_y, head_x)
+        self.ticks += 1
+
+        # The tail moves out of the way before the head moves in
+        if head == self.food:
+            tail = None
+        else:
+            tail = body.pop()
+            occupied.discard(tail)
+            top, bottom, left, right = self._food_area
+            if top <= tail[0] <= bottom and left <= tail[1] <= right:
+                free_cells.add(tail)
+
+        events = [(EVENT_MOVE, old_head, head, tail)]
+        body.appendleft(head)
+
+        # Check for collisions with walls (excluding the score display area)
+        if head_y <= 0 or head_y >= self.height - 2 or head_x <= 0 or head_x >= self.width - 2:
+            self.game_over = True
+            events.append((EVENT_DIE, "wall"))
+        # Check for collision with self
+        elif head in occupied:
+            self.game_over = True
+            events.append((EVENT_DIE, "self"))
+
+        occupied.add(head)
+        free_cells.discard(head)
+
+        if tail is None:
+            self.score += self.food_value
+            events.append((EVENT_EAT, self.score))
+            self.food = free_cells.sample(self.rng)
+            if self.food is None:
+                # Nowhere left to place food, so the game ends cleanly
+                self.game_over = True
+                events.append((EVENT_DIE, "full"))
+            else:
+                events.append((EVENT_FOOD, self.food))
+
+        return events
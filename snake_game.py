@@ -1,19 +1,55 @@
 #!/usr/bin/env python3
 import curses
+import math
 import random
 import time
 import sys
 from datetime import datetime
-from database_manager import SnakeGameDatabaseManager
+from database_manager import SnakeGameDatabaseManager, SettingsSnapshot
+from autopilot import Autopilot
+from frame_stats import FrameProfiler, NullFrameProfiler
+from game_clock import TickScheduler, InputQueue
+from replay import ReplayRecorder, tick_delay
+from score_writer import BackgroundScoreWriter
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, EVENT_MOVE, EVENT_EAT, EVENT_FOOD
 
-# Initialize database manager
-db = SnakeGameDatabaseManager()
+# Database manager for the whole session. It opens its one long-lived connection,
+# and migrates the schema if needed, on first use rather than at import
+db = SnakeGameDatabaseManager(persistent=True)
+
+# Saves finished games on a worker thread so the terminal never waits on the disk
+score_writer = BackgroundScoreWriter(db.db_file, leaderboard=db.leaderboard)
 
 # Global variables for player tracking
 current_player = None
 game_settings = {}
 game_start_time = None
 
+# Let the autopilot steer from the start (for demo kiosks); 'a' toggles it in game
+autopilot_enabled = "--autopilot" in sys.argv
+
+# Opt-in frame timing: --frame-stats times every tick, shows an overlay row
+# ('f' toggles it) and writes a report to FRAME_STATS_FILE at exit
+FRAME_STATS_FILE = "frame_stats.json"
+frame_profiler = FrameProfiler() if "--frame-stats" in sys.argv else NullFrameProfiler()
+frame_overlay_enabled = frame_profiler.enabled
+
+# Ticks between overlay updates, so drawing the overlay barely shows up in it
+OVERLAY_INTERVAL = 10
+
+# Values used when a setting is missing from the database
+DEFAULT_SETTINGS = {
+    "food_value": 10,
+}
+
+# Arrow keys mapped to engine directions
+KEY_DIRECTIONS = {
+    curses.KEY_UP: UP,
+    curses.KEY_DOWN: DOWN,
+    curses.KEY_LEFT: LEFT,
+    curses.KEY_RIGHT: RIGHT,
+}
+
 def safe_addch(stdscr, y, x, char, attr=curses.A_NORMAL):
     """Safely add a character to the screen, avoiding terminal boundary errors."""
     height, width = stdscr.getmaxyx()
@@ -36,6 +72,12 @@ def safe_addstr(stdscr, y, x, string, attr=curses.A_NORMAL):
         except curses.error:
             pass
 
+def load_game_settings():
+    """Load a typed snapshot of the game settings, querying the database only when they changed."""
+    global game_settings
+    if not isinstance(game_settings, SettingsSnapshot) or game_settings.is_stale():
+        game_settings = db.get_settings_snapshot(defaults=DEFAULT_SETTINGS)
+
 def check_terminal_size(stdscr):
     """Check if the terminal is large enough to play the game."""
     height, width = stdscr.getmaxyx()
@@ -54,10 +96,70 @@ def check_terminal_size(stdscr):
         return False
     return True
 
+class GameRenderer:
+    """
+    Draws the playfield incrementally from engine events.
+
+    Only cells that changed during a tick are written (vacated tail, old and
+    new head, new food) and the status line is rewritten only when its text
+    changes. Terminal dimensions are cached until resize() is called.
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.resize()
+
+    def resize(self):
+        """Re-read the terminal dimensions and forget what is on screen."""
+        self.height, self.width = self.stdscr.getmaxyx()
+        self.status = None
+
+    def addch(self, y, x, char, attr=curses.A_NORMAL):
+        """Like safe_addch, but using the cached terminal dimensions."""
+        if 0 <= y < self.height - 1 and 0 <= x < self.width - 1:
+            try:
+                self.stdscr.addch(y, x, char, attr)
+            except curses.error:
+                pass
+
+    def draw_status(self, text):
+        """Draw the status line if its text changed since the last call."""
+        if text != self.status:
+            self.status = text
+            safe_addstr(self.stdscr, 0, 2, text, curses.color_pair(3))
+
+    def draw_overlay(self, text):
+        """Draw a line of text on the bottom row, below the playfield."""
+        safe_addstr(self.stdscr, self.height - 1, 0, text.ljust(self.width - 1))
+
+    def draw_full(self, engine, status):
+        """Redraw the whole playfield, e.g. at game start or after a resize."""
+        draw_border(self.stdscr)
+        for i, (y, x) in enumerate(engine.body):
+            char = "■" if i == 0 else "□"  # Different character for head
+            self.addch(y, x, char, curses.color_pair(1))
+        if engine.food is not None:
+            self.addch(engine.food[0], engine.food[1], "●", curses.color_pair(2))
+        self.draw_status(status)
+
+    def draw_events(self, events):
+        """Draw only the cells touched by one engine step."""
+        for event in events:
+            if event[0] == EVENT_MOVE:
+                _, old_head, head, tail = event
+                if tail is not None:
+                    self.addch(tail[0], tail[1], " ")
+                self.addch(old_head[0], old_head[1], "□", curses.color_pair(1))
+                self.addch(head[0], head[1], "■", curses.color_pair(1))
+            elif event[0] == EVENT_FOOD:
+                food = event[1]
+                self.addch(food[0], food[1], "●", curses.color_pair(2))
+
 def show_login_menu(stdscr):
     """Display login/registration menu and handle user selection."""
+    global autopilot_enabled, frame_overlay_enabled
     # C    curses.curs_set(0)  # Hide cursor
-    stdscr.timeout(100)  # Set input timeout for controlling game speed
+    stdscr.timeout(100)  # Input timeout for the menus; the game loop schedules its own ticks
     
     # Load game settings from database
     load_game_settings()
@@ -84,31 +186,34 @@ def show_login_menu(stdscr):
     # Get screen dimensions
     height, width = stdscr.getmaxyx()
     
-    # Initial snake position and body
-    snake_y = height // 2
-    snake_x = width // 4
-    snake = [(snake_y, snake_x), (snake_y, snake_x-1), (snake_y, snake_x-2)]
-    
-    # Initial food position - make sure it's not where the snake is
-    food = create_food(height, width, snake)
-    
-    # Initial direction - moving right
-    direction = curses.KEY_RIGHT
-    
-    # Initial score
-    score = 0
-    
-    # Game state
-    game_over = False
+    # Initial snake, food, direction and score, seeded so the game can be replayed
+    seed = random.getrandbits(63)
+    engine = SnakeEngine(height, width, food_value=game_settings["food_value"], seed=seed)
+    recorder = ReplayRecorder(seed, height, width, engine.food_value)
     
     # Record game start time
     game_start_time = datetime.now()
 
-    # Draw border
-    draw_border(stdscr)
+    # Steers in place of the arrow keys while enabled
+    autopilot = Autopilot()
+
+    def status():
+        mode = " | Autopilot" if autopilot_enabled else ""
+        return f" Player: {current_player['username']} | Score: {engine.score}{mode} "
+
+    # Draw border, snake, food and score
+    renderer = GameRenderer(stdscr)
+    renderer.draw_full(engine, status())
     
-    # Main game loop
-    while not game_over:
+    # Ticks run on a fixed schedule, and keys pressed in between are queued
+    scheduler = TickScheduler(tick_delay(engine.score))
+    turns = InputQueue()
+
+    # Main game loop, timing starting afresh for each game
+    frame_profiler.pause()
+    while not engine.game_over:
+        frame_profiler.start_tick()
+
         # Check if terminal was resized
         new_height, new_width = stdscr.getmaxyx()
         if new_height != height or new_width != width:
@@ -117,80 +222,65 @@ def show_login_menu(stdscr):
                 return
             # Update dimensions
             height, width = new_height, new_width
+            engine.resize(height, width)
+            recorder.record_resize(engine.ticks + 1, height, width)
             stdscr.clear()
-            draw_border(stdscr)
-        
-        # Display score and player info
-        player_info = f" Player: {current_player['username']} | Score: {score} "
-        safe_addstr(stdscr, 0, 2, player_info, curses.color_pair(3))
-        
-        # Draw food
-        safe_addch(stdscr, food[0], food[1], "●", curses.color_pair(2))
-        
-        # Get next key press but don't block
-        key = stdscr.getch()
+            renderer.resize()
+            renderer.draw_full(engine, status())
+            # Waiting on a too-small terminal is not part of any tick
+            frame_profiler.pause()
+            frame_profiler.start_tick()
+            scheduler.reset()
         
-        # Handle key press for direction
-        if key in [curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT]:
-            # Prevent 180-degree turns
-            if (key == curses.KEY_UP and direction != curses.KEY_DOWN) or \
-               (key == curses.KEY_DOWN and direction != curses.KEY_UP) or \
-               (key == curses.KEY_LEFT and direction != curses.KEY_RIGHT) or \
-               (key == curses.KEY_RIGHT and direction != curses.KEY_LEFT):
-                direction = key
-        
-        # Move snake in the current direction
-        head_y, head_x = snake[0]
-        if direction == curses.KEY_UP:
-            head_y -= 1
-        elif direction == curses.KEY_DOWN:
-            head_y += 1
-        elif direction == curses.KEY_LEFT:
-            head_x -= 1
-        elif direction == curses.KEY_RIGHT:
-            head_x += 1
-        
-        # Add new head position
-        snake.insert(0, (head_y, head_x))
-        
-        # Check if snake has eaten the food
-        if snake[0] == food:
-            score += game_settings["food_value"]
-            food = create_food(height, width, snake)
-            # Speed up slightly as score increases (but not too much)
-            timeout = max(50, 100 - (score // 50) * 5)
-            stdscr.timeout(timeout)
-        else:
-            # Remove tail if no food was eaten
-            last = snake.pop()
-            safe_addch(stdscr, last[0], last[1], " ")
+        # Collect every key pressed until the next tick is due
+        while True:
+            stdscr.timeout(math.ceil(scheduler.time_until_tick() * 1000))
+            key = stdscr.getch()
+            if key == -1:
+                if scheduler.time_until_tick() <= 0:
+                    break
+            elif key == ord("a"):
+                autopilot_enabled = not autopilot_enabled
+                turns.clear()
+            elif key == ord("f") and frame_profiler.enabled:
+                frame_overlay_enabled = not frame_overlay_enabled
+                renderer.draw_overlay("")
+            elif key in KEY_DIRECTIONS and not autopilot_enabled:
+                turns.push(KEY_DIRECTIONS[key], engine.direction)
+        frame_profiler.mark("input")
         
-        # Draw snake
-        for i, (y, x) in enumerate(snake):
-            char = "■" if i == 0 else "□"  # Different character for head
-            safe_addch(stdscr, y, x, char, curses.color_pair(1))
+        # Run the ticks that are due, one queued turn each, or let the autopilot steer
+        events = []
+        for _ in range(scheduler.due_ticks()):
+            direction = autopilot.decide(engine) if autopilot_enabled else turns.pop()
+            if engine.would_turn(direction):
+                recorder.record_input(engine.ticks + 1, direction)
+            tick_events = engine.step(direction)
+            events.extend(tick_events)
+            for event in tick_events:
+                if event[0] == EVENT_EAT:
+                    # Speed up slightly as score increases (but not too much)
+                    scheduler.set_period(tick_delay(engine.score))
+            if engine.game_over:
+                break
+        frame_profiler.mark("update")
         
-        # Check for collisions with walls (excluding the score display area)
-        if (head_y <= 0 or head_y >= height - 2 or head_x <= 0 or head_x >= width - 2):
-            game_over = True
-            
-        # Check for collision with self
-        if (head_y, head_x) in snake[1:]:
-            game_over = True
+        # Draw only what changed this frame
+        renderer.draw_events(events)
+        renderer.draw_status(status())
+        if frame_overlay_enabled and engine.ticks % OVERLAY_INTERVAL == 0:
+            renderer.draw_overlay(frame_profiler.overlay())
+        frame_profiler.mark("draw")
 
         # Refresh the screen
         stdscr.refresh()
+        frame_profiler.mark("refresh")
+    
+    # The game over screen is not part of any tick
+    frame_profiler.pause()
     
     # Game over screen
-    show_game_over(stdscr, score)
-
-def create_food(height, width, snake):
-    """Create food at a random position that is not occupied by the snake."""
-    while True:
-        # Use safe boundaries for food (2 cells from borders)
-        food = (random.randint(2, height - 3), random.randint(2, width - 3))
-        if food not in snake:
-            return food
+    show_game_over(stdscr, engine.score, recorder.finish(engine.ticks))
 
 def draw_border(stdscr):
     """Draw a border around the screen."""
@@ -211,8 +301,52 @@ def draw_border(stdscr):
     safe_addch(stdscr, height - 2, 0, "╚")
     safe_addch(stdscr, height - 2, width - 2, "╝")
 
-def show_game_over(stdscr, score):
-    """Display game over screen with final score."""
+def watch_replay(stdscr, replay, speed=1.0):
+    """Play back a recorded game in the terminal, speed times faster than it was played."""
+    curses.curs_set(0)
+    curses.start_color()
+    curses.init_pair(1, curses.COLOR_GREEN, curses.COLOR_BLACK)  # Snake
+    curses.init_pair(2, curses.COLOR_RED, curses.COLOR_BLACK)    # Food
+    curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK) # Score
+    
+    engine = replay.new_engine()
+    renderer = GameRenderer(stdscr)
+    stdscr.clear()
+    renderer.draw_full(engine, f" Replay x{speed:g} | Score: {engine.score} ")
+    stdscr.refresh()
+    
+    # Play back on the same fixed tick schedule as the live game, sped up
+    scheduler = TickScheduler(tick_delay(engine.score) / speed, max_catch_up=max(3, math.ceil(speed)))
+    steps = replay.steps(engine)
+    resize_ticks = {tick for tick, _, _ in replay.resizes}
+    finished = False
+    while not finished:
+        stdscr.timeout(math.ceil(scheduler.time_until_tick() * 1000))
+        if stdscr.getch() == ord("q"):
+            return
+        for _ in range(scheduler.due_ticks()):
+            step = next(steps, None)
+            if step is None:
+                finished = True
+                break
+            engine, events = step
+            if engine.ticks in resize_ticks:
+                stdscr.clear()
+                renderer.resize()
+                renderer.draw_full(engine, f" Replay x{speed:g} | Score: {engine.score} ")
+            else:
+                renderer.draw_events(events)
+            scheduler.set_period(tick_delay(engine.score) / speed)
+        renderer.draw_status(f" Replay x{speed:g} | Score: {engine.score} ")
+        stdscr.refresh()
+    
+    stdscr.nodelay(False)
+    safe_addstr(stdscr, 0, 2, f" Replay finished | Score: {engine.score} | Press any key ",
+                curses.color_pair(3))
+    stdscr.getch()
+
+def show_game_over(stdscr, score, replay=None):
+    """Display game over screen with final score, saving the session and its replay."""
     global current_player, game_start_time
     
     stdscr.clear()
@@ -231,31 +365,17 @@ def show_game_over(stdscr, score):
     safe_addstr(stdscr, center_y - 2, max(0, (width - len(score_msg)) // 2), 
                score_msg, curses.color_pair(3))
     
-    # Save score to database if logged in
+    # Save score to database in the background if logged in
+    save_future = None
     if current_player and current_player['id'] is not None:
         # Calculate game duration
         game_end_time = datetime.now()
         duration = int((game_end_time - game_start_time).total_seconds())
         
-        try:
-            # Save game session
-            db.connect()
-            db.add_game_session(current_player['id'], score, duration)
-            db.close()
-            
-            # Get player's highscore
-            db.connect()
-            highscore = db.get_player_highscore(current_player['id'])
-            db.close()
-            
-            if highscore:
-                highscore_msg = f"Your Highscore: {highscore['score']}"
-                safe_addstr(stdscr, center_y, max(0, (width - len(highscore_msg)) // 2), 
-                           highscore_msg, curses.color_pair(1))
-        except Exception as e:
-            error_msg = f"Error saving score: {e}"
-            safe_addstr(stdscr, center_y, max(0, (width - len(error_msg)) // 2), 
-                       error_msg, curses.color_pair(2))
+        save_future = score_writer.submit(current_player['id'], score, duration, replay=replay)
+        saving_msg = "Saving score..."
+        safe_addstr(stdscr, center_y, max(0, (width - len(saving_msg)) // 2), saving_msg)
+    save_shown = False
     
     # Menu options
     menu_items = ["Play Again", "View Highscores", "Exit"]
@@ -263,6 +383,11 @@ def show_game_over(stdscr, score):
     
     # Menu handling
     while True:
+        # Show the highscore once the background save has finished
+        if save_future is not None and save_future.done() and not save_shown:
+            show_save_result(stdscr, save_future, center_y, width)
+            save_shown = True
+        
         # Display menu items
         for i, item in enumerate(menu_items):
             y = center_y + 2 + i
@@ -272,8 +397,11 @@ def show_game_over(stdscr, score):
             else:
                 safe_addstr(stdscr, y, x, item)
         
-        # Handle key presses
-        stdscr.nodelay(False)  # Wait for key press
+        # Handle key presses, polling while the save is still pending
+        if save_future is not None and not save_shown:
+            stdscr.timeout(100)
+        else:
+            stdscr.nodelay(False)  # Wait for key press
         key = stdscr.getch()
         
         if key == curses.KEY_UP and selected_option > 0:
@@ -291,9 +419,29 @@ def show_game_over(stdscr, score):
                            game_over_msg, curses.A_BOLD | curses.color_pair(2))
                 safe_addstr(stdscr, center_y - 2, max(0, (width - len(score_msg)) // 2), 
                            score_msg, curses.color_pair(3))
+                save_shown = False
             elif menu_items[selected_option] == "Exit":
                 return "exit"
 
+def show_save_result(stdscr, save_future, center_y, width):
+    """Display the player's highscore and rank from a finished background save."""
+    # Blank out the "Saving score..." line
+    safe_addstr(stdscr, center_y, 0, " " * (width - 1))
+    try:
+        result = save_future.result()
+        highscore = result['highscore']
+        if highscore:
+            highscore_msg = f"Your Highscore: {highscore['score']}"
+            rank = result['rank']
+            if rank:
+                highscore_msg += f" | Rank: #{rank['rank']} of {rank['total']}"
+            safe_addstr(stdscr, center_y, max(0, (width - len(highscore_msg)) // 2), 
+                       highscore_msg, curses.color_pair(1))
+    except Exception as e:
+        error_msg = f"Error saving score: {e}"
+        safe_addstr(stdscr, center_y, max(0, (width - len(error_msg)) // 2), 
+                   error_msg, curses.color_pair(2))
+
 if __name__ == "__main__":
     try:
         # Initialize curses and database
@@ -311,9 +459,12 @@ if __name__ == "__main__":
     finally:
         # Ensure terminal is left in a good state
         curses.endwin()
-        # Close database connection if still open
-        if db.conn:
-            db.close()
+        # Write any scores still queued, then close the persistent database connection
+        score_writer.close()
+        db.close_persistent()
+        if frame_profiler.enabled:
+            frame_profiler.dump(FRAME_STATS_FILE)
+            print(f"Frame timings written to {FRAME_STATS_FILE}")
         print("Thanks for playing Snake!")
         print(f"Run 'python snake_game.py' to play again.")
 
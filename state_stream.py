@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Delta-encoded game state stream for spectators and remote renderers.
+
+Instead of sending the whole snake every tick, the stream carries one small
+delta per tick: the direction the head moved, whether the tail stayed put,
+and the new food position, score or cause of death when they change. A
+typical tick is a single byte however long the snake is. Keyframes with
+the full state are sent every so often, when the board is resized, and to
+every viewer that joins, so anyone can pick the stream up mid-game.
+
+Usage:
+    python state_stream.py USERNAME [--host 127.0.0.1] [--port 2324]
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import deque
+
+from replay import _write_varint, _read_varint
+from snake_engine import DIRECTION_DELTAS, EVENT_MOVE, EVENT_EAT, EVENT_FOOD, EVENT_DIE
+
+STREAM_VERSION = 1
+
+# First byte of a frame. Keyframes set the top bit; deltas hold the head's
+# direction in the low two bits plus flags for whatever else changed.
+KEYFRAME = 0x80
+KEYFRAME_GAME_OVER = 0x01
+DELTA_DIRECTION = 0x03
+DELTA_GREW = 0x04
+DELTA_FOOD = 0x08
+DELTA_SCORE = 0x10
+DELTA_DIE = 0x20
+
+# Decoded keyframes are reported as (EVENT_KEYFRAME, state), before the
+# engine-style events of the following deltas
+EVENT_KEYFRAME = "keyframe"
+
+DIE_REASONS = ("wall", "self", "full")
+_DELTA_DIRECTIONS = {delta: direction for direction, delta in enumerate(DIRECTION_DELTAS)}
+
+
+class StreamState:
+    """
+    A game as seen from the stream.
+
+    It has the attributes renderers read from a SnakeEngine (body, food,
+    score, height, width), so it can be drawn the same way.
+    """
+
+    def __init__(self, height, width, body, food, score, ticks, game_over=False):
+        self.height = height
+        self.width = width
+        self.body = deque(body)
+        self.food = food
+        self.score = score
+        self.ticks = ticks
+        self.game_over = game_over
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def __len__(self):
+        return len(self.body)
+
+
+class StateEncoder:
+    """
+    Turns one game's ticks into stream frames.
+
+    The encoder is per game; all viewers of that game are sent the same
+    bytes, plus a keyframe() of their own when they join.
+    """
+
+    def __init__(self, keyframe_interval=256):
+        """
+        Args:
+            keyframe_interval (int): Ticks between scheduled keyframes
+        """
+        self.keyframe_interval = keyframe_interval
+        self._size = None
+        self._since_keyframe = 0
+
+    def keyframe(self, engine):
+        """
+        Encode the whole state of a game.
+
+        The body is sent as its head position plus two bits per segment for
+        the direction to the next one, so a keyframe is about length/4 bytes.
+
+        Args:
+            engine (SnakeEngine): The game to encode
+
+        Returns:
+            bytes: A keyframe
+        """
+        out = bytearray([KEYFRAME | (KEYFRAME_GAME_OVER if engine.game_over else 0), STREAM_VERSION])
+        for value in (engine.ticks, engine.height, engine.width, engine.score):
+            _write_varint(out, value)
+        if engine.food is None:
+            _write_varint(out, 0)
+        else:
+            _write_varint(out, engine.food[0] + 1)
+            _write_varint(out, engine.food[1])
+        body = engine.body
+        _write_varint(out, len(body))
+        _write_varint(out, body[0][0])
+        _write_varint(out, body[0][1])
+        packed = 0
+        bits = 0
+        previous = body[0]
+        for i in range(1, len(body)):
+            segment = body[i]
+            packed |= _DELTA_DIRECTIONS[(segment[0] - previous[0], segment[1] - previous[1])] << bits
+            bits += 2
+            if bits == 8:
+                out.append(packed)
+                packed = bits = 0
+            previous = segment
+        if bits:
+            out.append(packed)
+        self._size = (engine.height, engine.width)
+        self._since_keyframe = 0
+        return bytes(out)
+
+    def encode(self, engine, events):
+        """
+        Encode one tick.
+
+        Args:
+            engine (SnakeEngine): The game, after the step
+            events (list): The events the step returned
+
+        Returns:
+            bytes: A delta, a keyframe when one is due, or nothing if the tick
+                changed nothing
+        """
+        if not events:
+            return b""
+        self._since_keyframe += 1
+        if self._since_keyframe >= self.keyframe_interval or self._size != (engine.height, engine.width):
+            return self.keyframe(engine)
+
+        out = bytearray(1)
+        flags = 0
+        for event in events:
+            kind = event[0]
+            if kind == EVENT_MOVE:
+                _, old_head, head, tail = event
+                flags |= _DELTA_DIRECTIONS[(head[0] - old_head[0], head[1] - old_head[1])]
+                if tail is None:
+                    flags |= DELTA_GREW
+            elif kind == EVENT_EAT:
+                flags |= DELTA_SCORE
+                _write_varint(out, event[1])
+            elif kind == EVENT_FOOD:
+                flags |= DELTA_FOOD
+                _write_varint(out, event[1][0])
+                _write_varint(out, event[1][1])
+            elif kind == EVENT_DIE:
+                flags |= DELTA_DIE
+                out.append(DIE_REASONS.index(event[1]))
+        out[0] = flags
+        return bytes(out)
+
+
+class StateDecoder:
+    """
+    Rebuilds a game from stream bytes.
+
+    Data can be fed in chunks of any size; incomplete frames are kept until
+    the rest arrives. Deltas before the first keyframe are skipped.
+    """
+
+    def __init__(self):
+        self.state = None
+        self._buffer = b""
+
+    def feed(self, data):
+        """
+        Args:
+            data (bytes): The next bytes of the stream
+
+        Returns:
+            list: (EVENT_KEYFRAME, state) for each keyframe and engine-style
+                event tuples for each delta, in stream order
+        """
+        buffer = self._buffer + data
+        events = []
+        pos = 0
+        while pos < len(buffer):
+            try:
+                pos = self._decode_frame(buffer, pos, events)
+            except IndexError:
+                break
+        self._buffer = buffer[pos:]
+        return events
+
+    def _decode_frame(self, data, pos, events):
+        """Decode the frame at pos, appending its events, and return the next position."""
+        first = data[pos]
+        if first & KEYFRAME:
+            if data[pos + 1] != STREAM_VERSION:
+                raise ValueError(f"unsupported stream version {data[pos + 1]}")
+            pos += 2
+            ticks, pos = _read_varint(data, pos)
+            height, pos = _read_varint(data, pos)
+            width, pos = _read_varint(data, pos)
+            score, pos = _read_varint(data, pos)
+            food_y, pos = _read_varint(data, pos)
+            food = None
+            if food_y:
+                food_x, pos = _read_varint(data, pos)
+                food = (food_y - 1, food_x)
+            length, pos = _read_varint(data, pos)
+            y, pos = _read_varint(data, pos)
+            x, pos = _read_varint(data, pos)
+            end = pos + (2 * (length - 1) + 7) // 8
+            if end > len(data):
+                raise IndexError("incomplete keyframe")
+            body = [(y, x)]
+            for i in range(length - 1):
+                dy, dx = DIRECTION_DELTAS[(data[pos + i // 4] >> (2 * (i % 4))) & 3]
+                y += dy
+                x += dx
+                body.append((y, x))
+            self.state = StreamState(height, width, body, food, score, ticks,
+                                     bool(first & KEYFRAME_GAME_OVER))
+            events.append((EVENT_KEYFRAME, self.state))
+            return end
+
+        # Read the whole delta before applying it, in case it is incomplete
+        pos += 1
+        score = food = reason = None
+        if first & DELTA_SCORE:
+            score, pos = _read_varint(data, pos)
+        if first & DELTA_FOOD:
+            food_y, pos = _read_varint(data, pos)
+            food_x, pos = _read_varint(data, pos)
+            food = (food_y, food_x)
+        if first & DELTA_DIE:
+            reason = DIE_REASONS[data[pos]]
+            pos += 1
+
+        state = self.state
+        if state is None:
+            return pos
+        old_head = state.body[0]
+        dy, dx = DIRECTION_DELTAS[first & DELTA_DIRECTION]
+        head = (old_head[0] + dy, old_head[1] + dx)
+        tail = None if first & DELTA_GREW else state.body.pop()
+        state.body.appendleft(head)
+        state.ticks += 1
+        events.append((EVENT_MOVE, old_head, head, tail))
+        if reason is not None and reason != "full":
+            state.game_over = True
+            events.append((EVENT_DIE, reason))
+        if score is not None:
+            state.score = score
+            events.append((EVENT_EAT, score))
+        if reason == "full":
+            state.food = None
+            state.game_over = True
+            events.append((EVENT_DIE, reason))
+        elif food is not None:
+            state.food = food
+            events.append((EVENT_FOOD, food))
+        return pos
+
+
+async def watch(username, host="127.0.0.1", port=2324, out=None):
+    """
+    Follow a player's games from a game server's stream port, drawing them with ANSI codes.
+
+    Args:
+        username (str): Player to watch
+        host (str): Server address
+        port (int): The server's stream port
+        out (file, optional): Where to draw; standard output by default
+    """
+    from game_server import AnsiRenderer, SHOW_CURSOR
+
+    out = out or sys.stdout
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"{username}\n".encode())
+    decoder = StateDecoder()
+    renderer = None
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            frame = []
+            for event in decoder.feed(data):
+                if event[0] == EVENT_KEYFRAME:
+                    state = event[1]
+                    renderer = AnsiRenderer(state.height, state.width)
+                    frame = [renderer.draw_full(state, "")]
+                elif renderer:
+                    frame.append(renderer.draw_events([event]))
+            if renderer:
+                frame.append(renderer.draw_status(f" Watching: {username} | Score: {decoder.state.score} "))
+            out.write("".join(frame))
+            out.flush()
+    finally:
+        out.write(SHOW_CURSOR + "\n")
+        writer.close()
+
+
+def main():
+    """Watch a player's games on a running game server."""
+    parser = argparse.ArgumentParser(description="Watch a player's games on a game server.")
+    parser.add_argument("username", help="player to watch")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=2324, help="the server's stream port")
+    args = parser.parse_args()
+    try:
+        asyncio.run(watch(args.username, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Could not connect: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
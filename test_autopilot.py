@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the autopilot.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+from autopilot import Autopilot, benchmark
+from snake_engine import SnakeEngine, OPPOSITE
+
+
+def play(height, width, seed, max_ticks=50000, **kwargs):
+    """Let the autopilot play one game to the end."""
+    engine = SnakeEngine(height, width, seed=seed)
+    pilot = Autopilot(**kwargs)
+    while not engine.game_over and engine.ticks < max_ticks:
+        direction = pilot.decide(engine)
+        assert direction is None or direction != OPPOSITE[engine.direction]
+        engine.step(direction)
+    return engine, pilot
+
+
+def test_fills_most_of_a_small_board():
+    """The autopilot keeps going until the board is nearly full."""
+    playable = (12 - 3) * (20 - 3)
+    for seed in range(5):
+        engine, _ = play(12, 20, seed)
+        assert engine.game_over
+        assert len(engine) > playable * 0.8
+
+
+def test_paths_are_reused():
+    """Searches happen about once per piece of food, not once per tick."""
+    _, cached = play(30, 80, 1, max_ticks=5000)
+    _, uncached = play(30, 80, 1, max_ticks=5000, cache_paths=False)
+    assert cached.searches < cached.decisions / 5
+    assert uncached.searches >= uncached.decisions
+
+
+def test_hamiltonian_cycle_covers_the_board():
+    """The fallback cycle visits every playable cell once, one step at a time."""
+    for height, width in [(12, 20), (13, 20), (12, 21), (13, 22)]:
+        pilot = Autopilot()
+        pilot.decide(SnakeEngine(height, width, seed=0))
+        cycle = pilot._build_cycle()
+        rows, cols = height - 3, width - 3
+        expected = rows * cols if rows * cols % 2 == 0 else (rows - 1) * cols
+        assert len(cycle) == expected
+        assert sorted(cycle.values()) == sorted(cycle)
+        assert all(abs(b - a) in (1, width) for a, b in cycle.items())
+
+        # Following the successors from any cell comes back round after len(cycle) steps
+        start = next(iter(cycle))
+        cell, steps = cycle[start], 1
+        while cell != start:
+            cell, steps = cycle[cell], steps + 1
+        assert steps == len(cycle)
+
+
+def test_benchmark_reports_throughput():
+    """The benchmark returns decisions per second for a board size."""
+    result = benchmark(20, 60, 500)
+    assert result['decisions_per_second'] > 0
+    assert result['games'] >= 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
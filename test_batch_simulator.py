@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized batch simulator.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_simulator import BatchSnakeSimulator
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def test_batch_matches_engine_rules():
+    """Every game in the batch follows the same rules as SnakeEngine."""
+    n_games, height, width = 64, 20, 30
+    batch = BatchSnakeSimulator(n_games, height, width, food_value=10, seed=3)
+    engines = [SnakeEngine(height, width, food_value=10, seed=i) for i in range(n_games)]
+    for i, engine in enumerate(engines):
+        engine.food = (int(batch.food_y[i]), int(batch.food_x[i]))
+
+    rng = random.Random(7)
+    for _ in range(300):
+        directions = np.array([rng.choice(DIRECTIONS + (-1,)) for _ in range(n_games)])
+        ate, died = batch.step(directions)
+        for i, engine in enumerate(engines):
+            if engine.game_over:
+                assert not batch.alive[i]
+                continue
+            engine.step(None if directions[i] < 0 else int(directions[i]))
+            assert engine.game_over == bool(died[i])
+            assert engine.score == batch.score[i]
+            if not engine.game_over:
+                assert engine.head == (batch.head_y[i], batch.head_x[i])
+                assert len(engine) == batch.length[i]
+            # Food placement uses a different generator, so copy it over
+            engine.food = (int(batch.food_y[i]), int(batch.food_x[i]))
+
+
+def test_food_never_on_snake():
+    """Food is only placed on cells the snake does not occupy."""
+    batch = BatchSnakeSimulator(256, 12, 12, seed=1)
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        batch.step(rng.integers(0, 4, size=batch.n_games))
+        live = np.flatnonzero(batch.alive)
+        assert not batch.grid[live, batch.food_y[live], batch.food_x[live]].any()
+        batch.reset(~batch.alive)
+
+
+def test_filling_the_board_is_reported_as_a_death():
+    """A game whose food finds no free cell ends, and step() reports it as died."""
+    batch = BatchSnakeSimulator(2, 7, 12, seed=0)
+    head_y, head_x = batch.head_y[0], batch.head_x[0]
+    batch.food_y[0], batch.food_x[0] = head_y, head_x + 1
+    # Fill every other food cell of the first game
+    batch.grid[0, 2:5, 2:10] = True
+    batch.grid[0, head_y, head_x + 1] = False
+    ate, died = batch.step()
+    assert ate[0] and died[0] and not batch.alive[0]
+    assert not died[1] and batch.alive[1]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the benchmark suite.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+from benchmarks import (
+    _engine_with_snake, bench_database, bench_engine_tick, compare, measure, result_key,
+)
+
+
+def test_engine_with_snake_has_a_clear_run():
+    """The prepared snake has the requested length and survives its run."""
+    engine = _engine_with_snake(500, 50)
+    assert len(engine) == 500
+    assert len(engine.occupied) == 500
+    for _ in range(50):
+        engine.step()
+    assert not engine.game_over
+    assert len(engine) == 500
+
+
+def test_measure_reports_per_operation_times():
+    """Timings are per operation and ordered min <= median <= max."""
+    timing = measure(lambda: sum(range(1000)), number=10, repeat=3)
+    assert 0 < timing['min'] <= timing['median'] <= timing['max']
+    assert (timing['number'], timing['repeat']) == (10, 3)
+
+
+def test_small_runs_produce_results():
+    """Each benchmark family yields one result per scale."""
+    results = bench_engine_tick([10, 100], run=20, repeat=1)
+    results += bench_database([100, 300], players=10, number=5, repeat=1)
+    keys = [result_key(result) for result in results]
+    assert keys[:2] == ["engine_tick[length=10]", "engine_tick[length=100]"]
+    assert "get_highscores[rows=300]" in keys
+    assert len(keys) == 8
+
+
+def test_compare_flags_regressions():
+    """Only benchmarks slower than the threshold are flagged."""
+    def run(*times):
+        return {'results': [{'name': "tick", 'params': {'length': i}, 'min': t, 'median': t}
+                            for i, t in enumerate(times)]}
+
+    rows = compare(run(1.0, 1.2, 2.0), run(1.0, 1.0, 1.0, 1.0), threshold=0.25)
+    assert [regressed for *_, regressed in rows] == [False, False, True]
+    assert rows[2][3] == 2.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 Test script for the Snake Game Database Manager.
-This script creates a test database and performs various operations to verify functionality.
+Running this file creates a test database and walks through the manager's
+operations, then runs the test functions, which pytest can also run.
 """
 
+import asyncio
 import os
+import sqlite3
+import threading
 import time
 from datetime import datetime, timedelta
-from database_manager import SnakeGameDatabaseManager
+from database_manager import SnakeGameDatabaseManager, PooledSnakeGameDatabaseManager, parse_setting_value
+from migrations import migrate
+from score_writer import BackgroundScoreWriter
+from async_database_manager import AsyncSnakeGameDatabaseManager
+from test_helpers import temp_db_file
 
 
 def print_section(title):
@@ -156,6 +164,393 @@ def main():
     return 0
 
 
+def test_bulk_insert_rolls_back_malformed_sessions():
+    """A malformed tuple part way through a batch saves nothing and leaves no transaction open."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        player_id = db.add_player("ada")
+        assert db.add_game_sessions_bulk([(player_id, 10, 5), (player_id, 20)]) == []
+        assert db.add_game_sessions_bulk([(player_id, 10, 5), None]) == []
+        assert not db.conn.in_transaction
+        assert db.get_player_game_sessions(player_id) == []
+        assert db.get_player_highscore(player_id) is None
+        assert len(db.add_game_sessions_bulk([(player_id, 30, 5)])) == 1
+
+
+def test_bulk_insert_returns_ids_and_best_scores():
+    """A batch gets consecutive IDs in input order, its replays, and each player's best score."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        ada, bob = db.add_player("ada"), db.add_player("bob")
+        db.add_game_session(ada, 100, 10)
+        session_ids = db.add_game_sessions_bulk([
+            (ada, 60, 5),
+            (bob, 30, 5, "2024-01-02 03:04:05"),
+            (bob, 90, 5, None, b"replay"),
+        ])
+        assert len(session_ids) == 3
+        assert session_ids == list(range(session_ids[0], session_ids[0] + 3))
+        assert db.get_game_session(session_ids[1])['date_played'] == "2024-01-02 03:04:05"
+        assert db.get_replay(session_ids[2]) == b"replay"
+        assert db.get_replay(session_ids[0]) is None
+        assert db.get_player_highscore(ada)['score'] == 100
+        assert db.get_player_highscore(bob)['score'] == 90
+        assert db.add_game_sessions_bulk([]) == []
+
+
+def test_persistent_connection_is_reused():
+    """Inside a with block connect() and close() keep one tuned connection."""
+    with temp_db_file() as path:
+        with SnakeGameDatabaseManager(path) as db:
+            conn = db.conn
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            for score in range(5):
+                db.connect()
+                assert db.add_game_session(db.add_player(f"p{score}"), score, 1) is not None
+                db.close()
+                assert db.conn is conn
+        assert db.conn is None and not db.persistent
+
+        # Without persistent mode close() really closes
+        db = SnakeGameDatabaseManager(path)
+        assert db.connect()
+        db.close()
+        assert db.conn is None
+
+
+def test_pool_checks_connections_out_and_back_in():
+    """Many threads share a small pool; held connections stay with their thread until close()."""
+    with temp_db_file() as path:
+        db = PooledSnakeGameDatabaseManager(path, pool_size=2, checkout_timeout=5)
+        player_id = db.add_player("ada")
+        failures = []
+
+        def worker():
+            for i in range(20):
+                if db.add_game_session(player_id, i, 1) is None:
+                    failures.append(i)
+                db.get_player_stats(player_id)
+
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+            assert not any(thread.is_alive() for thread in threads)
+            assert not failures
+            assert db.get_player_stats(player_id)['games_played'] == 120
+            assert db.conn is None and db._idle.qsize() <= 2
+
+            assert db.connect()
+            conn = db.conn
+            db.get_all_players()
+            assert db.conn is conn
+            db.close()
+            assert db.conn is None
+            with db.connection() as conn:
+                with db.connection() as inner:
+                    assert inner is conn
+                assert db.conn is conn
+            assert db.conn is None
+        finally:
+            db.close_all()
+
+
+def test_cached_leaderboard_reads_skip_the_pool():
+    """A leaderboard cache hit does not wait for a connection, even with the pool exhausted."""
+    with temp_db_file() as path:
+        db = PooledSnakeGameDatabaseManager(path, pool_size=1, checkout_timeout=0.5)
+        db.add_game_session(db.add_player("ada"), 50, 1)
+        db.get_highscores()
+        holding, release = threading.Event(), threading.Event()
+
+        def hold_the_only_connection():
+            with db.connection():
+                holding.set()
+                release.wait(10)
+
+        thread = threading.Thread(target=hold_the_only_connection)
+        thread.start()
+        try:
+            holding.wait(10)
+            start = time.perf_counter()
+            assert db.get_highscores()[0]['score'] == 50
+            assert time.perf_counter() - start < 0.25
+            assert db.get_player_stats(1) is None
+        finally:
+            release.set()
+            thread.join()
+            db.close_all()
+
+
+def test_leaderboard_cache_is_invalidated_by_writes():
+    """Reads hit the cache until a write that changes the top rows."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path, leaderboard_size=2) as db:
+        ada, bob, cy = db.add_player("ada"), db.add_player("bob"), db.add_player("cy")
+        db.add_game_session(ada, 50, 1)
+        db.add_game_session(bob, 40, 1)
+        db.get_highscores(limit=2)
+        assert db.get_highscores(limit=2)[0]['score'] == 50
+        assert db.leaderboard.stats() == {"hits": 1, "misses": 1}
+
+        # Rows handed out are copies, so callers cannot corrupt the cache
+        db.get_highscores(limit=1)[0]['score'] = 0
+        assert db.get_highscores(limit=1)[0]['score'] == 50
+
+        # A score that cannot reach the cached top rows keeps the cache
+        misses = db.leaderboard.stats()["misses"]
+        db.add_game_session(cy, 10, 1)
+        db.get_highscores(limit=2)
+        assert db.leaderboard.stats()["misses"] == misses
+
+        db.add_game_session(cy, 60, 1)
+        assert [row['username'] for row in db.get_highscores(limit=2)] == ["cy", "ada"]
+        db.update_player(ada, "ada2")
+        assert db.get_highscores(limit=2)[1]['username'] == "ada2"
+        db.add_game_sessions_bulk([(bob, 70, 1)])
+        assert db.get_highscores(limit=1)[0]['username'] == "bob"
+        db.delete_player(bob)
+        assert "bob" not in [row['username'] for row in db.get_highscores(limit=2)]
+
+
+def query_plan(conn, sql, params=()):
+    """The detail column of EXPLAIN QUERY PLAN, joined into one string."""
+    return " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_highscores_keep_one_best_row_per_player():
+    """Scores only raise a player's single highscore row, and the leaderboard reads it in index order."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        player_id = db.add_player("ada")
+        for score in (40, 80, 60):
+            db.add_game_session(player_id, score, 1)
+        assert [row['score'] for row in db.get_highscores()] == [80]
+        db.add_game_sessions_bulk([(player_id, 70, 1), (player_id, 95, 1)])
+        assert [row['score'] for row in db.get_highscores()] == [95]
+        assert db.conn.execute("SELECT COUNT(*) FROM highscores").fetchone()[0] == 1
+
+        plan = query_plan(db.conn, """
+            SELECT h.id, h.player_id, h.score, h.date_achieved, p.username
+            FROM highscores h JOIN players p ON h.player_id = p.id
+            ORDER BY h.score DESC LIMIT 10
+        """)
+        assert "idx_highscores_score_player" in plan and "TEMP B-TREE" not in plan
+
+
+def test_migration_dedupes_highscores():
+    """Upgrading keeps each player's best (earliest on ties) row and then enforces one row each."""
+    with temp_db_file() as path:
+        conn = sqlite3.connect(path)
+        migrate(conn, target=3)
+        conn.executescript('''
+        INSERT INTO players (username) VALUES ('ada'), ('bob');
+        INSERT INTO highscores (id, player_id, score) VALUES (1, 1, 50), (2, 1, 80), (3, 2, 30), (4, 1, 80);
+        ''')
+        migrate(conn)
+        assert conn.execute("SELECT id, player_id, score FROM highscores ORDER BY id").fetchall() == \
+            [(2, 1, 80), (3, 2, 30)]
+        try:
+            conn.execute("INSERT INTO highscores (player_id, score) VALUES (1, 10)")
+            assert False, "a second highscore row for a player was accepted"
+        except sqlite3.IntegrityError:
+            pass
+        conn.close()
+
+
+def test_ranks_with_ties_and_window_edges():
+    """Tied players share a rank, and the window is cut off at the top and bottom of the board."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        scores = {"a": 90, "b": 70, "c": 70, "d": 70, "e": 50, "f": 10}
+        ids = {name: db.add_player(name) for name in scores}
+        for name, score in scores.items():
+            db.add_game_session(ids[name], score, 1)
+
+        assert db.get_player_rank(ids["c"]) == {'player_id': ids["c"], 'score': 70, 'rank': 2, 'total': 6}
+        assert db.get_player_rank(ids["e"])['rank'] == 5
+
+        def window(name, radius):
+            return [(row['username'], row['rank']) for row in db.get_rank_window(ids[name], radius)]
+
+        assert window("c", 1) == [("b", 2), ("c", 2), ("d", 2)]
+        assert window("c", 2) == [("a", 1), ("b", 2), ("c", 2), ("d", 2), ("e", 5)]
+        assert window("a", 2) == [("a", 1), ("b", 2), ("c", 2)]
+        assert window("f", 2) == [("d", 2), ("e", 5), ("f", 6)]
+        assert window("e", 0) == [("e", 5)]
+        assert [name for name, _ in window("d", 10)] == list(scores)
+        assert db.get_rank_window(db.add_player("nobody")) == []
+
+
+def test_highscore_counts_follow_highscores():
+    """highscore_counts tracks new highscores and raised ones, dropping empty scores."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        ada, bob = db.add_player("ada"), db.add_player("bob")
+
+        def counts():
+            return db.conn.execute("SELECT score, players FROM highscore_counts ORDER BY score").fetchall()
+
+        db.add_game_session(ada, 50, 1)
+        db.add_game_session(bob, 50, 1)
+        assert [tuple(row) for row in counts()] == [(50, 2)]
+        db.add_game_session(bob, 70, 1)
+        assert [tuple(row) for row in counts()] == [(50, 1), (70, 1)]
+        db.add_game_session(ada, 70, 1)
+        assert [tuple(row) for row in counts()] == [(70, 2)]
+        db.add_game_session(ada, 20, 1)
+        assert [tuple(row) for row in counts()] == [(70, 2)]
+
+
+def test_deleting_a_player_removes_them_from_ranks():
+    """A deleted player's highscore, sessions and statistics go with them, so ranks close up."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        ada, bob, cy = db.add_player("ada"), db.add_player("bob"), db.add_player("cy")
+        session_id = db.add_game_session(ada, 90, 1, replay=b"replay")
+        db.add_game_session(bob, 50, 1)
+        db.add_game_session(cy, 10, 1)
+        assert db.get_player_rank(bob) == {'player_id': bob, 'score': 50, 'rank': 2, 'total': 3}
+
+        assert db.delete_player(ada)
+        assert [row['username'] for row in db.get_highscores()] == ["bob", "cy"]
+        assert db.get_player_rank(bob) == {'player_id': bob, 'score': 50, 'rank': 1, 'total': 2}
+        assert [(row['username'], row['rank']) for row in db.get_rank_window(bob, radius=2)] == \
+            [("bob", 1), ("cy", 2)]
+        assert db.get_player_rank(ada) is None
+        assert db.get_game_session(session_id) is None and db.get_replay(session_id) is None
+        assert db.get_player_stats(ada)['games_played'] == 0
+        assert not db.delete_player(ada)
+
+
+def test_player_stats_follow_sessions():
+    """player_stats tracks inserts and deletes, recomputing the best score with an index seek."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        ada = db.add_player("ada")
+        first = db.add_game_session(ada, 30, 10)
+        best = db.add_game_session(ada, 50, 20)
+        db.add_game_sessions_bulk([(ada, 40, 30)])
+        stats = db.get_player_stats(ada)
+        assert (stats['games_played'], stats['total_duration'], stats['best_score']) == (3, 60, 50)
+        assert stats['average_score'] == 40
+
+        db.delete_game_session(best)
+        stats = db.get_player_stats(ada)
+        assert (stats['games_played'], stats['total_duration'], stats['best_score']) == (2, 40, 40)
+        db.delete_game_session(first)
+        assert db.get_player_stats(ada)['best_score'] == 40
+        assert db.get_player_stats(db.add_player("bob"))['games_played'] == 0
+
+        plan = query_plan(db.conn, "SELECT MAX(score) FROM game_sessions WHERE player_id = ?", (ada,))
+        assert "COVERING INDEX idx_game_sessions_player_score" in plan
+
+
+def test_background_writer_resolves_futures():
+    """Queued sessions are saved off-thread and resolve with the new highscore and rank."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        ada, bob = db.add_player("ada"), db.add_player("bob")
+        db.add_game_session(bob, 200, 1)
+        db.get_highscores()
+        writer = BackgroundScoreWriter(path, leaderboard=db.leaderboard)
+        called = []
+        futures = [writer.submit(ada, score, 1) for score in (100, 300)]
+        futures.append(writer.submit(ada, 250, 1, callback=called.append))
+        results = [future.result(timeout=10) for future in futures]
+        writer.close()
+        assert called == [futures[-1]]
+        assert len({result['session_id'] for result in results}) == 3
+        assert results[-1]['highscore']['score'] == 300
+        assert results[-1]['rank']['rank'] == 1
+        # The writer invalidated this manager's cached leaderboard
+        assert db.get_highscores(limit=1)[0]['username'] == "ada"
+
+
+def test_background_writer_reports_failed_saves():
+    """A batch the database rejects resolves its futures with an error instead of hanging."""
+    with temp_db_file() as path:
+        writer = BackgroundScoreWriter(path)
+        future = writer.submit(1, None, 1)
+        try:
+            future.result(timeout=10)
+            assert False, "the failed save was not reported"
+        except sqlite3.Error:
+            pass
+        writer.close()
+
+
+def test_async_manager_batches_concurrent_writes():
+    """Concurrent saves share a few bulk transactions, each caller getting its own session ID."""
+    with temp_db_file() as path:
+        with SnakeGameDatabaseManager(path) as db:
+            player_id = db.add_player("ada")
+
+        async def run():
+            async with AsyncSnakeGameDatabaseManager(path) as async_db:
+                batches = []
+                bulk = async_db.db.add_game_sessions_bulk
+
+                def counting_bulk(sessions):
+                    batches.append(len(sessions))
+                    return bulk(sessions)
+
+                async_db.db.add_game_sessions_bulk = counting_bulk
+                session_ids = await asyncio.gather(
+                    *(async_db.add_game_session(player_id, score, 30) for score in range(0, 500, 5))
+                )
+                highscores, stats = await asyncio.gather(
+                    async_db.get_highscores(limit=3),
+                    async_db.get_player_stats(player_id),
+                )
+            return session_ids, batches, highscores, stats
+
+        session_ids, batches, highscores, stats = asyncio.run(run())
+        assert len(session_ids) == len(set(session_ids)) == 100 and None not in session_ids
+        assert sum(batches) == 100 and len(batches) < 10
+        assert stats['games_played'] == 100 and stats['best_score'] == 495
+        assert highscores[0]['score'] == 495
+
+
+def test_settings_round_trip_and_snapshot():
+    """Settings upsert in place, parse to typed values, and the snapshot goes stale on writes."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        setting_id = db.add_setting("food_value", "10", "Points per food")
+        assert db.add_setting("food_value", "15") == setting_id
+        assert db.get_setting("food_value")['description'] == "Points per food"
+        assert db.set_settings({"walls_enabled": True, "special_food_probability": 0.25})
+        assert db.get_setting("walls_enabled")['setting_value'] == "true"
+
+        snapshot = db.get_settings_snapshot(defaults={"speed": 3, "food_value": 1})
+        assert snapshot == {"food_value": 15, "walls_enabled": True,
+                            "special_food_probability": 0.25, "speed": 3}
+        assert db.get_settings_snapshot() is db.get_settings_snapshot()
+        assert not snapshot.is_stale()
+        db.set_settings({"walls_enabled": False})
+        assert snapshot.is_stale()
+        assert db.get_settings_snapshot()['walls_enabled'] is False
+        assert db.delete_setting("walls_enabled")
+        assert "walls_enabled" not in db.get_settings_snapshot()
+
+
+def test_food_values_a_replay_cannot_hold_are_refused():
+    """A bad food_value is refused when it is written, and nothing else in the batch is stored."""
+    with temp_db_file() as path, SnakeGameDatabaseManager(path) as db:
+        assert db.add_setting("food_value", "20") is not None
+        for value in ("2.5", "-1", "20.0", "true", "lots", str(2 ** 32)):
+            assert db.add_setting("food_value", value) is None
+        assert not db.set_settings({"walls_enabled": True, "food_value": 2.5})
+        assert db.get_settings_snapshot() == {"food_value": 20}
+        assert db.set_settings({"food_value": 30})
+        assert db.get_settings_snapshot()['food_value'] == 30
+
+
+def test_only_values_the_setter_writes_are_converted():
+    """Booleans, integers and finite floats round-trip; other text stays a string."""
+    for value in (True, False, 0, -7, 10 ** 20, 0.25, -1.5e-07, 3.0e+40):
+        text = str(value).lower() if isinstance(value, bool) else str(value)
+        assert parse_setting_value(text) == value and type(parse_setting_value(text)) is type(value)
+    for text in ("yes", "no", "on", "off", "True", "inf", "-inf", "nan", "1e999", "1_000", " 5", "hard"):
+        assert parse_setting_value(text) == text
+
+
 if __name__ == "__main__":
     main()
-
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for frame timing instrumentation.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from frame_stats import PHASES, FrameProfiler, Histogram, NullFrameProfiler
+
+
+def run_ticks(profiler, ticks, sleep=0.0):
+    """Drive the profiler the way the game loop does."""
+    for _ in range(ticks):
+        profiler.start_tick()
+        time.sleep(sleep)
+        for phase in PHASES:
+            profiler.mark(phase)
+
+
+def test_histogram_percentiles():
+    """Percentiles land within one bucket of the true value."""
+    histogram = Histogram()
+    for ns in range(1, 10001):
+        histogram.add(ns * 1000)
+    assert histogram.count == 10000
+    assert histogram.max == 10_000_000
+    assert 5_000_000 <= histogram.percentile(50) <= 5_000_000 * 1.2
+    assert 9_900_000 <= histogram.percentile(99) <= 10_000_000
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_phases_and_ticks_are_recorded():
+    """Each mark records a phase, and each tick after the first records a period."""
+    profiler = FrameProfiler(window=8)
+    run_ticks(profiler, 20, sleep=0.001)
+    report = profiler.report()
+    for phase in PHASES:
+        assert report['phases'][phase]['count'] == 20
+    assert report['phases']['tick']['count'] == 19
+    assert report['phases']['input']['p50_ms'] >= 1.0
+    assert report['jitter']['count'] == 18
+    assert len(profiler.window['tick']) == 8
+
+
+def test_pause_skips_the_gap():
+    """Time spent paused is not counted as a tick."""
+    profiler = FrameProfiler()
+    run_ticks(profiler, 3)
+    profiler.pause()
+    time.sleep(0.05)
+    run_ticks(profiler, 3)
+    assert profiler.histograms['tick'].count == 4
+    assert profiler.histograms['tick'].max < 50_000_000
+
+
+def test_overlay_and_dump():
+    """The overlay is one line and the dump is readable JSON."""
+    profiler = FrameProfiler()
+    run_ticks(profiler, 5)
+    line = profiler.overlay()
+    assert "\n" not in line and "jitter" in line
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        profiler.dump(path)
+        with open(path) as f:
+            assert set(json.load(f)['phases']) == set(PHASES) | {'tick'}
+    finally:
+        os.remove(path)
+
+
+def test_null_profiler_does_nothing():
+    """The stand-in accepts the same calls when instrumentation is off."""
+    profiler = NullFrameProfiler()
+    run_ticks(profiler, 3)
+    profiler.pause()
+    assert not profiler.enabled
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the fixed-timestep scheduler and input queue.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+from game_clock import TickScheduler, InputQueue
+from snake_engine import UP, DOWN, LEFT, RIGHT
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ticks_keep_a_fixed_rate():
+    """Time spent between checks does not stretch the schedule."""
+    clock = FakeClock()
+    scheduler = TickScheduler(0.1, clock=clock)
+    assert scheduler.due_ticks() == 0
+    assert abs(scheduler.time_until_tick() - 0.1) < 1e-9
+
+    ticks = 0
+    for _ in range(100):
+        # Each frame overshoots its deadline by a little drawing time
+        clock.now += scheduler.time_until_tick() + 0.03
+        ticks += scheduler.due_ticks()
+    assert ticks == 100
+    # The next deadline is still on the original 0.1s grid
+    assert abs((scheduler.next_tick - 100.0) / 0.1 - round((scheduler.next_tick - 100.0) / 0.1)) < 1e-6
+
+
+def test_catch_up_is_limited():
+    """After a long stall, only max_catch_up ticks run and the rest are dropped."""
+    clock = FakeClock()
+    scheduler = TickScheduler(0.1, max_catch_up=3, clock=clock)
+    clock.now += 0.25
+    assert scheduler.due_ticks() == 2
+    clock.now += 5.0
+    assert scheduler.due_ticks() == 3
+    assert scheduler.dropped > 40
+    assert scheduler.due_ticks() == 0
+    assert abs(scheduler.time_until_tick() - 0.1) < 1e-9
+
+
+def test_changing_the_rate():
+    """A new period applies from the next deadline."""
+    clock = FakeClock()
+    scheduler = TickScheduler(0.1, max_catch_up=10, clock=clock)
+    scheduler.set_period(0.05)
+    assert abs(scheduler.time_until_tick() - 0.05) < 1e-9
+    clock.now += 0.22
+    assert scheduler.due_ticks() == 4
+
+
+def test_input_queue_keeps_quick_sequences():
+    """Up then left pressed within one tick are applied on consecutive ticks."""
+    turns = InputQueue(size=3)
+    assert turns.push(UP, RIGHT)
+    assert turns.push(LEFT, RIGHT)
+    assert [turns.pop(), turns.pop(), turns.pop()] == [UP, LEFT, None]
+
+
+def test_input_queue_ignores_useless_keys():
+    """Repeats and reversals of the queued heading are dropped, and the queue is bounded."""
+    turns = InputQueue(size=2)
+    assert not turns.push(RIGHT, RIGHT)
+    assert not turns.push(LEFT, RIGHT)
+    assert turns.push(UP, RIGHT)
+    assert not turns.push(DOWN, RIGHT)
+    assert turns.push(RIGHT, RIGHT)
+    assert not turns.push(UP, RIGHT)
+    assert len(turns) == 2
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
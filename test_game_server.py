@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-session game server.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import asyncio
+
+from async_database_manager import AsyncSnakeGameDatabaseManager
+from database_manager import SnakeGameDatabaseManager
+from game_server import IAC, WILL, ECHO, AnsiRenderer, GameServer, TelnetInput
+from replay import Replay, tick_delay
+from snake_engine import SnakeEngine, UP, RIGHT
+from test_helpers import temp_db_file
+
+
+def test_telnet_input_strips_negotiation_and_reads_arrows():
+    """Negotiation is dropped and arrow sequences split across reads still parse."""
+    keys = TelnetInput()
+    assert keys.feed(bytes([IAC, WILL, ECHO]) + b"ab") == [ord("a"), ord("b")]
+    assert keys.feed(b"\x1b[") == []
+    assert keys.feed(b"Cx\x1bOA") == [("arrow", RIGHT), ord("x"), ("arrow", UP)]
+    assert keys.feed(bytes([IAC, 250, 31, 0, 80, IAC, 240]) + b"\r") == [13]
+
+
+def test_renderer_sends_only_changed_cells():
+    """After the full frame, a tick sends a few cells and an unchanged status is skipped."""
+    engine = SnakeEngine(24, 80, seed=1)
+    renderer = AnsiRenderer(24, 80)
+    full = renderer.draw_full(engine, " Score: 0 ")
+    assert "●" in full and "■" in full
+    update = renderer.draw_events(engine.step())
+    assert 0 < len(update) < 100
+    assert renderer.draw_status(" Score: 0 ") == ""
+    assert "Score: 10" in renderer.draw_status(" Score: 10 ")
+
+
+async def _play_one_game(db_file):
+    """Log in over TCP, steer into a wall, decline another game and return the screen."""
+    db = AsyncSnakeGameDatabaseManager(db_file)
+    game_server = GameServer(db)
+    server = await asyncio.start_server(game_server.handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"tester\r\n")
+        await reader.readuntil(b"Player: tester")
+        # The snake starts heading right; turning left at once is ignored, so go up
+        writer.write(b"\x1b[A")
+        screen = await asyncio.wait_for(reader.readuntil(b"Play again?"), 30)
+        writer.write(b"n")
+        screen += await reader.read()
+        writer.close()
+        return screen, game_server.stats
+    finally:
+        server.close()
+        await db.close()
+
+
+def test_game_is_played_and_saved():
+    """A client plays a full game, which is saved with a replay that verifies."""
+    with temp_db_file() as db_file:
+        screen, stats = asyncio.run(_play_one_game(db_file))
+        assert b"GAME OVER!" in screen and b"Bye!" in screen
+        assert stats['games_finished'] == 1 and stats['active_games'] == 0
+
+        db = SnakeGameDatabaseManager(db_file)
+        player = db.get_player(username="tester")
+        [session] = db.get_sessions_with_replays()
+        db.close()
+        assert session['player_id'] == player['id']
+        replay = Replay.from_bytes(session['data'])
+        engine = replay.simulate()
+        assert engine.game_over and engine.score == session['score']
+        assert replay.inputs and replay.inputs[0][1] == UP
+        assert stats['ticks'] == engine.ticks
+
+
+def test_sessions_tick_independently():
+    """Many concurrent games each keep their own tick rate on one loop."""
+
+    async def run(db_file):
+        db = AsyncSnakeGameDatabaseManager(db_file)
+        game_server = GameServer(db)
+        server = await asyncio.start_server(game_server.handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        writers = []
+        try:
+            for i in range(50):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(f"p{i}\r\n".encode())
+                writers.append((reader, writer))
+            for reader, _ in writers:
+                await reader.readuntil(b"Score: 0")
+            await asyncio.sleep(tick_delay(0) * 10)
+            return dict(game_server.stats)
+        finally:
+            for _, writer in writers:
+                writer.write(b"q")
+                writer.close()
+            server.close()
+            await db.close()
+
+    with temp_db_file() as db_file:
+        stats = asyncio.run(run(db_file))
+    assert stats['peak_games'] == 50
+    # About ten ticks each, with some slack for slow machines
+    assert 50 * 6 <= stats['ticks'] <= 50 * 12
+
+
+def test_duplicate_logins_are_refused_and_quits_are_not_saved():
+    """A username in use is asked for again, and a quit game is abandoned unsaved."""
+
+    async def run(db_file):
+        db = AsyncSnakeGameDatabaseManager(db_file)
+        game_server = GameServer(db)
+        server = await asyncio.start_server(game_server.handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            first_reader, first = await asyncio.open_connection("127.0.0.1", port)
+            first.write(b"ada\r\n")
+            await first_reader.readuntil(b"Player: ada")
+            second_reader, second = await asyncio.open_connection("127.0.0.1", port)
+            second.write(b"ada\r\n")
+            await asyncio.wait_for(second_reader.readuntil(b"ada is already playing."), 5)
+
+            first.write(b"q")
+            goodbye = await asyncio.wait_for(first_reader.readuntil(b"Bye!"), 5)
+            first.close()
+            await asyncio.sleep(0.05)
+            second.write(b"ada\r\n")
+            await asyncio.wait_for(second_reader.readuntil(b"Player: ada"), 5)
+            second.write(b"q")
+            await asyncio.wait_for(second_reader.readuntil(b"Bye!"), 5)
+            second.close()
+            return goodbye, dict(game_server.stats)
+        finally:
+            server.close()
+            await db.close()
+
+    with temp_db_file() as db_file:
+        goodbye, stats = asyncio.run(run(db_file))
+        assert b"not saved" in goodbye
+        assert stats['games_finished'] == 0 and stats['peak_games'] == 1
+        db = SnakeGameDatabaseManager(db_file)
+        assert db.get_player_game_sessions(db.get_player(username="ada")['id']) == []
+        db.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Shared setup for the test scripts.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def temp_db_file(name="snake_game.db"):
+    """
+    Give a database path in a fresh temporary directory, with no file created yet.
+
+    The directory is removed afterwards along with everything in it, so the
+    database's -wal and -shm files go too.
+
+    Args:
+        name (str): File name of the database
+
+    Yields:
+        str: Path to the database file
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        yield os.path.join(directory, name)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
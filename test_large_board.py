@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for large-board mode.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import random
+from collections import deque
+
+from large_board import BODY, EMPTY, FOOD, WALL, Board, LargeBoardEngine, Viewport, greedy_move
+from snake_engine import DIRECTION_DELTAS, EVENT_DIE, EVENT_EAT, EVENT_MOVE, UP, DOWN, LEFT, RIGHT
+from state_stream import StateDecoder, StateEncoder
+
+
+def check_grid(engine):
+    """The grid agrees with the engine's head, tail, length, food and free count."""
+    segments = list(engine.segments())
+    assert len(segments) == len(engine)
+    assert segments[0] == engine.tail and segments[-1] == engine.head
+    cells = engine.board.cells
+    assert sum(cells.count(BODY + d) for d in range(4)) == len(engine)
+    assert cells.count(FOOD) == (engine.food is not None)
+    assert cells.count(EMPTY) == engine.board.free
+
+
+def test_board_has_a_wall_ring():
+    """Only the outer ring is wall, and every other cell starts empty."""
+    board = Board(6, 9)
+    assert board[0, 4] == board[5, 4] == board[3, 0] == board[3, 8] == WALL
+    assert board.free == 4 * 7
+    board.add_wall(2, 2)
+    assert board[2, 2] == WALL and board.free == 4 * 7 - 1
+
+
+def test_random_empty_is_uniform_on_a_nearly_full_board():
+    """When sampling gives up, every empty cell is still equally likely."""
+    board = Board(100, 100)
+    # Leave one empty cell right after a long run of walls and three close together
+    for i, value in enumerate(board.cells):
+        if value == EMPTY:
+            board.add_wall(*board.position(i))
+    empty = [board.index(50, 50), board.index(98, 96), board.index(98, 97), board.index(98, 98)]
+    for i in empty:
+        board.cells[i] = EMPTY
+    board.free = len(empty)
+
+    rng = random.Random(5)
+    picks = [board.random_empty(rng) for _ in range(4000)]
+    assert set(picks) == set(empty)
+    for i in empty:
+        assert 800 <= picks.count(i) <= 1200
+
+
+def test_body_follows_a_reference_snake():
+    """A random game matches a deque-of-tuples snake tick for tick."""
+    engine = LargeBoardEngine(30, 40, seed=4)
+    rng = random.Random(4)
+    body = deque(reversed(list(engine.segments())))
+    while not engine.game_over and engine.ticks < 3000:
+        direction = rng.choice(engine.safe_moves() or [(None, None)])[0]
+        events = engine.step(direction)
+        _, old_head, head, tail = events[0]
+        assert events[0][0] == EVENT_MOVE and old_head == body[0]
+        dy, dx = DIRECTION_DELTAS[engine.direction]
+        assert head == (old_head[0] + dy, old_head[1] + dx)
+        if tail is not None:
+            assert tail == body.pop()
+        body.appendleft(head)
+        if not engine.game_over:
+            assert list(reversed(body)) == list(engine.segments())
+            if engine.ticks % 100 == 0:
+                check_grid(engine)
+    assert engine.ticks > 100
+
+
+def test_eating_grows_and_scores():
+    """Eating keeps the tail, adds the food value and places new food."""
+    engine = LargeBoardEngine(12, 12, seed=1)
+    eaten = 0
+    while not engine.game_over and eaten < 5:
+        events = engine.step(greedy_move(engine))
+        if any(event[0] == EVENT_EAT for event in events):
+            eaten += 1
+            assert events[0][3] is None
+    assert (len(engine), engine.score) == (8, 50)
+    check_grid(engine)
+
+
+def test_deaths():
+    """Running into the wall or the body ends the game with the right reason."""
+    engine = LargeBoardEngine(10, 10, seed=0)
+    engine.board.cells[engine.board.cells.index(FOOD)] = EMPTY
+    engine._food = None
+    engine.board.free += 1
+    while not engine.game_over:
+        events = engine.step(UP)
+    assert events[-1] == (EVENT_DIE, "wall") and engine.head[0] == 0
+
+    engine = LargeBoardEngine(20, 20, seed=0)
+    engine.length = 5
+    engine._tail -= 2
+    for i in (engine._tail, engine._tail + 1):
+        engine.board.cells[i] = BODY + RIGHT
+    events = []
+    for direction in (DOWN, LEFT, UP):
+        events = engine.step(direction)
+    assert events[-1] == (EVENT_DIE, "self")
+
+
+def test_filling_the_board_ends_the_game():
+    """When no empty cell is left for food, the game ends as full."""
+    engine = LargeBoardEngine(5, 7, seed=2)
+    board = engine.board
+    assert engine.head == (2, 3)
+    # Put the food right in front of the head, then wall off every other empty cell
+    board.cells[engine._food] = EMPTY
+    engine._food = board.index(2, 4)
+    board.cells[engine._food] = FOOD
+    for i, value in enumerate(board.cells):
+        if value == EMPTY:
+            board.add_wall(*board.position(i))
+    assert board.free == 0
+    events = engine.step(RIGHT)
+    assert events[-1] == (EVENT_DIE, "full") and engine.food is None
+
+
+def test_giant_board():
+    """A 10,000 x 10,000 board costs a byte per cell and plays like any other."""
+    engine = LargeBoardEngine(10_000, 10_000, seed=7)
+    assert len(engine.board.cells) == 10 ** 8
+    assert engine.board.free == 9998 * 9998 - 3 - 1
+    for _ in range(2000):
+        engine.step(greedy_move(engine))
+    assert not engine.game_over
+    assert engine.board.free == 9998 * 9998 - len(engine) - 1
+
+
+def test_state_stream_works_with_large_boards():
+    """Keyframes and deltas from a large-board game decode to the same snake."""
+    engine = LargeBoardEngine(500, 500, seed=3)
+    encoder = StateEncoder()
+    decoder = StateDecoder()
+    decoder.feed(encoder.keyframe(engine))
+    for _ in range(1000):
+        decoder.feed(encoder.encode(engine, engine.step(greedy_move(engine))))
+    assert list(decoder.state.body) == engine.body
+    assert decoder.state.food == engine.food
+
+
+def test_viewport_follows_within_the_board():
+    """The view scrolls only near its edges and never past the board."""
+    board = Board(100, 200)
+    view = Viewport(10, 20, margin=3)
+    assert not view.follow((5, 5), board)
+    assert view.follow((8, 5), board) and view.top == 2
+    view.follow((99, 199), board)
+    assert (view.top, view.left) == (90, 180)
+    rows = view.rows(board, head=(95, 190))
+    assert len(rows) == 10 and all(len(row) == 20 for row in rows)
+    assert rows[-1] == "#" * 20 and rows[5][10] == "@"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
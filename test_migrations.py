@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for versioned schema migrations and lazy database setup.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import os
+import sqlite3
+import threading
+
+from database_manager import PooledSnakeGameDatabaseManager, SnakeGameDatabaseManager
+from migrations import SCHEMA_VERSION, migrate, schema_version
+from test_helpers import temp_db_file
+
+
+def names(conn, kind):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+def test_setup_is_lazy():
+    """Creating a manager touches nothing; the first query creates the current schema."""
+    with temp_db_file() as path:
+        db = SnakeGameDatabaseManager(path, persistent=True)
+        assert not os.path.exists(path)
+        assert db.get_highscores() == []
+        db.close_persistent()
+        with sqlite3.connect(path) as conn:
+            assert schema_version(conn) == SCHEMA_VERSION
+            assert {"players", "game_sessions", "highscores", "highscore_counts",
+                    "player_stats", "replays", "game_settings"} <= names(conn, "table")
+
+
+def test_current_schema_is_not_written():
+    """An up-to-date database is only read, so even a read-only connection works."""
+    with temp_db_file() as path:
+        with sqlite3.connect(path) as conn:
+            migrate(conn)
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        assert migrate(conn) == SCHEMA_VERSION
+        conn.close()
+
+
+def test_migrations_resume_from_any_version():
+    """Migrating in steps ends in the same place as migrating at once."""
+    with temp_db_file() as path:
+        conn = sqlite3.connect(path)
+        assert migrate(conn, target=3) == 3
+        assert "highscore_counts" not in names(conn, "table")
+        assert migrate(conn) == SCHEMA_VERSION
+        assert "highscore_counts" in names(conn, "table")
+        conn.close()
+
+
+def test_unversioned_database_is_upgraded():
+    """A database from before player_stats, highscore_counts and replays is migrated and backfilled."""
+    with temp_db_file() as path:
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+        CREATE TABLE players (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+                              creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE game_sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, player_id INTEGER NOT NULL,
+                                    score INTEGER NOT NULL, date_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                    duration INTEGER NOT NULL);
+        CREATE INDEX idx_game_sessions_player_id ON game_sessions (player_id);
+        CREATE TABLE highscores (id INTEGER PRIMARY KEY AUTOINCREMENT, player_id INTEGER NOT NULL,
+                                 score INTEGER NOT NULL, date_achieved TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE INDEX idx_highscores_score ON highscores (score DESC);
+        INSERT INTO players (username) VALUES ('ada'), ('bob');
+        INSERT INTO game_sessions (player_id, score, duration) VALUES (1, 50, 10), (1, 80, 20), (2, 80, 5);
+        INSERT INTO highscores (player_id, score) VALUES (1, 50), (1, 80), (2, 80);
+        ''')
+        conn.close()
+
+        db = SnakeGameDatabaseManager(path)
+        assert db.get_player_stats(1)['games_played'] == 2
+        assert db.get_player_rank(2) == {'player_id': 2, 'score': 80, 'rank': 1, 'total': 2}
+        assert [row['score'] for row in db.get_highscores()] == [80, 80]
+
+        conn = sqlite3.connect(path)
+        assert schema_version(conn) == SCHEMA_VERSION
+        indexes = names(conn, "index")
+        assert "idx_game_sessions_player_id" not in indexes and "idx_highscores_score" not in indexes
+        assert {"idx_game_sessions_player_score", "idx_highscores_score_player"} <= indexes
+        conn.close()
+
+
+def test_unversioned_current_database_is_not_backfilled_twice():
+    """A database made by the old create_tables (current schema, version 0) keeps its rollups."""
+    with temp_db_file() as path:
+        db = SnakeGameDatabaseManager(path)
+        player_id = db.add_player("ada")
+        db.add_game_session(player_id, 40, 10)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA user_version = 0")
+
+        db = SnakeGameDatabaseManager(path)
+        assert db.get_player_stats(player_id)['games_played'] == 1
+        assert db.get_player_rank(player_id)['total'] == 1
+
+
+def test_concurrent_first_use_sees_the_schema():
+    """Threads sharing a pooled manager on a new database all see a working schema."""
+    with temp_db_file() as path:
+        db = PooledSnakeGameDatabaseManager(path, pool_size=4)
+        errors = []
+
+        def worker(i):
+            try:
+                assert db.add_player(f"player{i}") is not None
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        try:
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors
+            assert len(db.get_all_players()) == 8
+        finally:
+            db.close_all()
+
+
+def test_threads_exiting_without_close_do_not_leak_connections():
+    """Short-lived threads that never call close() leave the pool's slots free."""
+    with temp_db_file() as path:
+        db = PooledSnakeGameDatabaseManager(path, pool_size=2, checkout_timeout=5)
+        results = []
+
+        def worker(i):
+            results.append(db.add_player(f"player{i}"))
+            results.append(db.get_player(username=f"player{i}") is not None)
+
+        try:
+            for i in range(10):
+                thread = threading.Thread(target=worker, args=(i,))
+                thread.start()
+                thread.join(10)
+                assert not thread.is_alive()
+            assert None not in results and False not in results
+            assert db._idle.qsize() <= 2
+            with db.connection():
+                assert db.conn is not None
+                assert len(db.get_all_players()) == 10
+                assert db.conn is not None
+            assert db.conn is None
+        finally:
+            db.close_all()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
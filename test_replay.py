@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for replay recording and playback.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import random
+
+import pytest
+
+from replay import MAX_FOOD_VALUE, Replay, ReplayRecorder
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def record_game(seed, height=20, width=60, resize_at=None):
+    """Play a random game the way the curses loop does, recording it."""
+    engine = SnakeEngine(height, width, food_value=10, seed=seed)
+    recorder = ReplayRecorder(seed, height, width, engine.food_value)
+    keys = random.Random(seed)
+    while not engine.game_over and engine.ticks < 5000:
+        if resize_at is not None and engine.ticks + 1 == resize_at:
+            height, width = height + 4, width + 10
+            engine.resize(height, width)
+            recorder.record_resize(engine.ticks + 1, height, width)
+        direction = keys.choice(DIRECTIONS) if keys.random() < 0.2 else None
+        if engine.would_turn(direction):
+            recorder.record_input(engine.ticks + 1, direction)
+        engine.step(direction)
+    return engine, recorder.finish(engine.ticks)
+
+
+def test_round_trip_encoding():
+    """Decoding an encoded replay gives back the same inputs."""
+    replay = Replay(123, 20, 60, 10, ticks=500,
+                    inputs=[(1, 0), (5, 2), (300, 1), (301, 3)],
+                    resizes=[(5, 30, 80), (400, 20, 60)])
+    decoded = Replay.from_bytes(replay.to_bytes())
+    assert (decoded.seed, decoded.height, decoded.width, decoded.food_value, decoded.ticks) == \
+        (123, 20, 60, 10, 500)
+    assert decoded.inputs == replay.inputs
+    assert decoded.resizes == replay.resizes
+
+
+def test_replay_reproduces_game():
+    """Simulating a replay ends in exactly the recorded state."""
+    for seed in range(20):
+        engine, data = record_game(seed)
+        replayed = Replay.from_bytes(data).simulate()
+        assert replayed.score == engine.score
+        assert replayed.ticks == engine.ticks
+        assert list(replayed.body) == list(engine.body)
+
+
+def test_replay_with_resize():
+    """Board resizes are recorded and applied on the same tick."""
+    engine, data = record_game(7, resize_at=3)
+    replay = Replay.from_bytes(data)
+    assert replay.resizes == [(3, 24, 70)]
+    replayed = replay.simulate()
+    assert (replayed.score, replayed.ticks) == (engine.score, engine.ticks)
+
+
+def test_replays_are_compact():
+    """Input-only logs stay small."""
+    _, data = record_game(3)
+    replay = Replay.from_bytes(data)
+    assert len(data) <= 32 + 2 * len(replay.inputs)
+
+
+def test_food_values_the_header_cannot_hold_are_refused():
+    """The recorder rejects a food value the header cannot store."""
+    for value in (2.5, -1, 20.0, True, "10", MAX_FOOD_VALUE + 1):
+        with pytest.raises(ValueError):
+            ReplayRecorder(1, 20, 60, value)
+    assert Replay.from_bytes(ReplayRecorder(1, 20, 60, MAX_FOOD_VALUE).finish(0)).food_value == MAX_FOOD_VALUE
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
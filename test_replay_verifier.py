@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for batch replay verification.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+from database_manager import SnakeGameDatabaseManager
+from replay import Replay
+from replay_verifier import MAX_BOARD_SIDE, verify_session, verify_database
+from test_helpers import temp_db_file
+from test_replay import record_game
+
+
+def honest_duration(data):
+    """The play time a live game of this replay would have taken."""
+    return round(verify_session(0, 0, 0, data)['expected_duration'])
+
+
+def test_honest_session_passes():
+    """A session saved with its real score and play time is not flagged."""
+    engine, data = record_game(1)
+    result = verify_session(1, engine.score, honest_duration(data), data)
+    assert result['reason'] is None
+    assert result['replayed_score'] == engine.score
+
+
+def test_mismatches_are_flagged():
+    """Inflated scores, impossible durations and cut-short replays are flagged."""
+    engine, data = record_game(2)
+    duration = honest_duration(data)
+    assert verify_session(1, engine.score + 10, duration, data)['reason'] == "score mismatch"
+    assert verify_session(1, engine.score, duration * 10 + 60, data)['reason'] == "duration mismatch"
+
+    replay = Replay.from_bytes(data)
+    replay.ticks -= 1
+    cut = verify_session(1, engine.score, duration, replay.to_bytes())['reason']
+    assert cut in ("replay ends before the game is over", "score mismatch")
+    assert verify_session(1, 0, 0, b"junk")['reason'].startswith("unreadable replay")
+
+
+def test_oversized_boards_are_unreadable():
+    """A forged header or resize asking for a huge board is flagged without building it."""
+    huge = Replay(1, 65535, 65535, 10, ticks=1000).to_bytes()
+    assert len(huge) < 32
+    assert verify_session(1, 0, 0, huge)['reason'].startswith("unreadable replay")
+
+    engine, data = record_game(4)
+    replay = Replay.from_bytes(data)
+    replay.resizes.append((1, 20, MAX_BOARD_SIDE + 1))
+    assert verify_session(1, engine.score, 0, replay.to_bytes())['reason'].startswith("unreadable replay")
+
+
+def test_verify_database():
+    """Every session with a replay is checked across worker processes."""
+    with temp_db_file() as db_file:
+        db = SnakeGameDatabaseManager(db_file)
+        player_id = db.add_player("verifier")
+        sessions = []
+        for seed in range(30):
+            engine, data = record_game(seed)
+            score = engine.score + (10 if seed % 7 == 0 else 0)
+            sessions.append((player_id, score, honest_duration(data), None, data))
+        sessions.append((player_id, 50, 10))
+        db.add_game_sessions_bulk(sessions)
+        db.close()
+
+        checked, flagged = verify_database(db_file, workers=2, chunk_size=4)
+        assert checked == 30
+        assert [result['session_id'] for result in flagged] == [1, 8, 15, 22, 29]
+
+        checked, flagged = verify_database(db_file, workers=1, after_id=20)
+        assert checked == 10
+        assert [result['session_id'] for result in flagged] == [22, 29]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
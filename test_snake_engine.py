@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless Snake Game engine.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import random
+
+from snake_engine import (
+    SnakeEngine, FreeCellIndex, create_food, UP, DOWN, LEFT, RIGHT,
+    EVENT_MOVE, EVENT_EAT, EVENT_FOOD, EVENT_DIE,
+)
+
+
+def test_initial_state():
+    """A new game starts with a three-segment snake moving right."""
+    engine = SnakeEngine(20, 60, seed=1)
+    assert list(engine.body) == [(10, 15), (10, 14), (10, 13)]
+    assert engine.occupied == set(engine.body)
+    assert engine.direction == RIGHT
+    assert engine.score == 0
+    assert engine.food not in engine.occupied
+
+
+def test_move_and_reverse_guard():
+    """Moving shifts the body by one cell and 180-degree turns are ignored."""
+    engine = SnakeEngine(20, 60, seed=1)
+    engine.food = (2, 2)
+    events = engine.step(LEFT)
+    assert engine.direction == RIGHT
+    assert events == [(EVENT_MOVE, (10, 15), (10, 16), (10, 13))]
+    engine.step(UP)
+    assert engine.head == (9, 16)
+    assert len(engine) == 3
+    assert (10, 14) not in engine.occupied
+
+
+def test_eating_grows_and_scores():
+    """Eating food grows the snake, adds food_value and places new food."""
+    engine = SnakeEngine(20, 60, food_value=10, seed=1)
+    engine.food = (10, 16)
+    events = engine.step()
+    kinds = [event[0] for event in events]
+    assert kinds == [EVENT_MOVE, EVENT_EAT, EVENT_FOOD]
+    assert engine.score == 10
+    assert len(engine) == 4
+    assert engine.food not in engine.occupied
+
+
+def test_wall_collision():
+    """Running into the border ends the game."""
+    engine = SnakeEngine(20, 60, seed=1)
+    engine.food = (2, 2)
+    engine.step(UP)
+    for _ in range(20):
+        events = engine.step()
+        if engine.game_over:
+            break
+    assert events[-1] == (EVENT_DIE, "wall")
+    assert engine.step() == []
+
+
+def test_self_collision_and_tail_chasing():
+    """The head may follow the vacated tail cell but not hit the body."""
+    engine = SnakeEngine(20, 60, seed=1)
+    engine.food = (2, 2)
+    # A four-cell loop always moves into the cell the tail just left
+    engine.body.append((11, 13))
+    engine.occupied.add((11, 13))
+    for direction in (DOWN, LEFT, UP, RIGHT):
+        engine.step(direction)
+        assert not engine.game_over
+
+    engine = SnakeEngine(20, 60, seed=1)
+    engine.food = (2, 2)
+    for _ in range(4):
+        engine.food = (engine.head[0], engine.head[1] + 1)
+        engine.step()
+    engine.step(DOWN)
+    engine.step(LEFT)
+    events = engine.step(UP)
+    assert events[-1] == (EVENT_DIE, "self")
+
+
+def test_seeded_games_are_deterministic():
+    """Two engines with the same seed place food identically."""
+    first = SnakeEngine(20, 60, seed=42)
+    second = SnakeEngine(20, 60, seed=42)
+    assert first.food == second.food
+
+
+def test_free_cell_index():
+    """Swap-remove keeps the index consistent and sampling only returns free cells."""
+    cells = [(y, x) for y in range(3) for x in range(3)]
+    index = FreeCellIndex(cells)
+    index.discard((0, 0))
+    index.discard((2, 2))
+    index.discard((5, 5))
+    assert len(index) == 7
+    assert (0, 0) not in index and (1, 1) in index
+    assert all(index.cells[i] == cell for cell, i in index.positions.items())
+    rng = random.Random(0)
+    assert {index.sample(rng) for _ in range(200)} == set(cells) - {(0, 0), (2, 2)}
+    for cell in cells:
+        index.discard(cell)
+    assert index.sample(rng) is None
+
+
+def test_engine_keeps_free_cells_in_sync():
+    """The free-cell index always holds exactly the unoccupied food cells."""
+    engine = SnakeEngine(12, 14, seed=5)
+    rng = random.Random(5)
+    for _ in range(2000):
+        if engine.game_over:
+            engine.reset()
+        engine.step(rng.choice((UP, DOWN, LEFT, RIGHT)))
+        expected = {
+            (y, x) for y in range(2, 10) for x in range(2, 12)
+        } - engine.occupied
+        assert set(engine.free_cells.cells) == expected
+
+
+def test_full_board_ends_game():
+    """When no free cell is left for food, the game ends instead of hanging."""
+    engine = SnakeEngine(20, 60, seed=1)
+    engine.food = (10, 16)
+    engine.free_cells = FreeCellIndex([(10, 16)])
+    events = engine.step()
+    assert engine.game_over
+    assert engine.food is None
+    assert events[-1] == (EVENT_DIE, "full")
+    assert create_food(5, 5, {(2, 2)}) is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
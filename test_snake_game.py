@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the curses front end's incremental renderer.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+from unittest import mock
+
+from autopilot import Autopilot
+from snake_engine import SnakeEngine, FreeCellIndex, EVENT_DIE, EVENT_EAT, RIGHT
+from snake_game import GameRenderer
+
+
+class FakeScreen:
+    """Stands in for a curses window, keeping the last character written to each cell."""
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.cells = {}
+        self.strings = []
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addch(self, y, x, char, attr=0):
+        self.cells[y, x] = char
+
+    def addstr(self, y, x, string, attr=0):
+        self.strings.append((y, x, string))
+
+    def screen(self):
+        """The non-blank cells on screen."""
+        return {cell: char for cell, char in self.cells.items() if char != " "}
+
+
+def full_redraw(engine, height, width):
+    """What a fresh full redraw of the engine's current state puts on screen."""
+    screen = FakeScreen(height, width)
+    GameRenderer(screen).draw_full(engine, "")
+    return screen.screen()
+
+
+def no_colors():
+    # color_pair() needs initscr(), which a test cannot call without a terminal
+    return mock.patch("curses.color_pair", lambda pair: pair << 8)
+
+
+def test_partial_redraws_match_a_full_redraw():
+    """Drawing only the events, several ticks per frame, leaves the same screen as a full redraw."""
+    height, width = 14, 30
+    with no_colors():
+        engine = SnakeEngine(height, width, seed=3)
+        screen = FakeScreen(height, width)
+        renderer = GameRenderer(screen)
+        renderer.draw_full(engine, "")
+        autopilot = Autopilot()
+        eaten = 0
+        frame = 0
+        while not engine.game_over:
+            frame += 1
+            events = []
+            # Alternate between one and three ticks per frame, as a late frame catches up
+            for _ in range(1 if frame % 2 else 3):
+                tick_events = engine.step(autopilot.decide(engine))
+                events.extend(tick_events)
+                eaten += sum(event[0] == EVENT_EAT for event in tick_events)
+                if engine.game_over:
+                    break
+            renderer.draw_events(events)
+            if not engine.game_over:
+                assert screen.screen() == full_redraw(engine, height, width)
+        assert eaten >= 5
+
+
+def test_full_board_leaves_no_food_on_screen():
+    """When the last free cell is eaten the food is gone and nothing new is drawn."""
+    height, width = 14, 30
+    with no_colors():
+        engine = SnakeEngine(height, width, seed=1)
+        head_y, head_x = engine.head
+        engine.food = (head_y, head_x + 1)
+        engine.free_cells = FreeCellIndex([engine.food])
+        screen = FakeScreen(height, width)
+        renderer = GameRenderer(screen)
+        renderer.draw_full(engine, "")
+        assert screen.cells[engine.food] == "●"
+
+        events = engine.step(RIGHT)
+        renderer.draw_events(events)
+        assert events[-1] == (EVENT_DIE, "full") and engine.food is None
+        assert "●" not in screen.screen().values()
+        assert screen.screen() == full_redraw(engine, height, width)
+
+
+def test_unchanged_status_is_not_rewritten():
+    """The status line is only written when its text changes, and again after a resize."""
+    with no_colors():
+        screen = FakeScreen(14, 30)
+        renderer = GameRenderer(screen)
+        renderer.draw_status(" Score: 0 ")
+        renderer.draw_status(" Score: 0 ")
+        assert len(screen.strings) == 1
+        renderer.draw_status(" Score: 10 ")
+        assert screen.strings[-1] == (0, 2, " Score: 10 ")
+        renderer.resize()
+        renderer.draw_status(" Score: 10 ")
+        assert len(screen.strings) == 3
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the delta-encoded state stream.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import asyncio
+import random
+
+from async_database_manager import AsyncSnakeGameDatabaseManager
+from autopilot import Autopilot
+from game_server import GameServer
+from snake_engine import SnakeEngine, EVENT_DIE
+from state_stream import EVENT_KEYFRAME, StateDecoder, StateEncoder
+from test_helpers import temp_db_file
+
+
+def play(engine, encoder, ticks=None):
+    """Let the autopilot play, returning the stream and the engine's events."""
+    autopilot = Autopilot()
+    stream = bytearray(encoder.keyframe(engine))
+    events = []
+    while not engine.game_over and (ticks is None or engine.ticks < ticks):
+        tick_events = engine.step(autopilot.decide(engine))
+        events.extend(tick_events)
+        stream += encoder.encode(engine, tick_events)
+    return bytes(stream), events
+
+
+def test_round_trip_in_any_chunk_sizes():
+    """Decoded events and state match the engine, however the bytes are split."""
+    engine = SnakeEngine(14, 24, seed=5)
+    stream, _ = play(engine, StateEncoder(keyframe_interval=50))
+    assert engine.game_over
+
+    rng = random.Random(1)
+    decoder = StateDecoder()
+    decoded = []
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(1, 7)
+        decoded.extend(decoder.feed(stream[pos:pos + size]))
+        pos += size
+    keyframes = [event for event in decoded if event[0] == EVENT_KEYFRAME]
+    assert len(keyframes) == 1 + engine.ticks // 50
+
+    # A scheduled keyframe stands in for that tick's delta, so compare the
+    # decoded state rather than expecting every tick's events
+    state = decoder.state
+    assert list(state.body) == list(engine.body)
+    assert (state.score, state.food, state.ticks, state.game_over) == \
+        (engine.score, engine.food, engine.ticks, True)
+
+
+def test_deltas_match_engine_events():
+    """Without scheduled keyframes, every tick decodes to the engine's own events."""
+    engine = SnakeEngine(14, 24, seed=9)
+    stream, expected = play(engine, StateEncoder(keyframe_interval=10 ** 9))
+    decoded = StateDecoder().feed(stream)
+    assert decoded[0][0] == EVENT_KEYFRAME
+    assert decoded[1:] == expected
+    assert expected[-1][0] == EVENT_DIE
+
+
+def test_stream_is_compact():
+    """Plain moves cost one byte, and a keyframe about two bits per segment."""
+    engine = SnakeEngine(40, 80, seed=3)
+    encoder = StateEncoder(keyframe_interval=10 ** 9)
+    stream, _ = play(engine, encoder, ticks=3000)
+    assert len(stream) < engine.ticks * 1.2
+    assert len(encoder.keyframe(engine)) < 32 + len(engine) // 4
+
+
+def test_joining_mid_game_and_resizing():
+    """A viewer starting from a later keyframe follows along, and a resize sends a keyframe."""
+    engine = SnakeEngine(20, 40, seed=2)
+    encoder = StateEncoder()
+    play(engine, encoder, ticks=100)
+    decoder = StateDecoder()
+    # Deltas before a keyframe are skipped
+    assert decoder.feed(encoder.encode(engine, engine.step())) == []
+    decoder.feed(encoder.keyframe(engine))
+    engine.resize(22, 44)
+    frame = encoder.encode(engine, engine.step())
+    assert decoder.feed(frame)[0][0] == EVENT_KEYFRAME
+    assert (decoder.state.height, decoder.state.width) == (22, 44)
+    for _ in range(20):
+        decoder.feed(encoder.encode(engine, engine.step()))
+    assert list(decoder.state.body) == list(engine.body)
+
+
+def test_server_streams_games_to_spectators():
+    """A spectator connected to the stream port follows a player's game to the end."""
+
+    async def run(db_file):
+        db = AsyncSnakeGameDatabaseManager(db_file)
+        game_server = GameServer(db)
+        server = await asyncio.start_server(game_server.handle_client, "127.0.0.1", 0)
+        streams = await asyncio.start_server(game_server.handle_spectator, "127.0.0.1", 0)
+        try:
+            spectator_reader, spectator = await asyncio.open_connection(
+                "127.0.0.1", streams.sockets[0].getsockname()[1])
+            spectator.write(b"star\n")
+            await asyncio.sleep(0.05)
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", server.sockets[0].getsockname()[1])
+            writer.write(b"star\r\n")
+            await reader.readuntil(b"Player: star")
+            writer.write(b"\x1b[A")
+            await asyncio.wait_for(reader.readuntil(b"Play again?"), 30)
+
+            decoder = StateDecoder()
+            events = []
+            while not (decoder.state and decoder.state.game_over):
+                events.extend(decoder.feed(await asyncio.wait_for(spectator_reader.read(4096), 5)))
+            writer.write(b"n")
+            writer.close()
+            spectator.close()
+            return decoder.state, events
+        finally:
+            server.close()
+            streams.close()
+            await db.close()
+
+    with temp_db_file() as db_file:
+        state, events = asyncio.run(run(db_file))
+    assert events[0][0] == EVENT_KEYFRAME
+    assert events[-1] == (EVENT_DIE, "wall")
+    assert state.head[0] == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the bot tournament runner.
+Each test function can be run by pytest, or all of them by running this file directly.
+"""
+
+import sqlite3
+
+from database_manager import SnakeGameDatabaseManager
+from replay_verifier import verify_session
+from test_helpers import temp_db_file
+from tournament import POLICIES, play_episode, run_chunk, run_tournament
+
+
+def test_episodes_do_not_depend_on_chunking():
+    """A seed plays the same game whichever chunk it lands in."""
+    for name in POLICIES:
+        whole = run_chunk(name, range(4), 12, 20, 2000)
+        split = run_chunk(name, range(2), 12, 20, 2000) + run_chunk(name, range(2, 4), 12, 20, 2000)
+        assert whole == split
+
+
+def test_results_are_saved_in_batches():
+    """Every episode becomes a session of its policy's player."""
+    with temp_db_file() as db_file:
+        db = SnakeGameDatabaseManager(db_file, persistent=True)
+        progress = []
+        results = run_tournament(db, ["greedy", "random"], range(10), height=12, width=20,
+                                 max_ticks=2000, workers=2, chunk_size=3, batch_size=4,
+                                 progress=lambda episodes, ticks: progress.append(episodes))
+        assert {name: result['games'] for name, result in results.items()} == {'greedy': 10, 'random': 10}
+        assert progress[-1] == 20
+
+        for name, result in results.items():
+            player = db.get_player(username="bot:" + name)
+            sessions = db.get_player_game_sessions(player['id'])
+            assert len(sessions) == 10
+            assert max(session['score'] for session in sessions) == result['best_score']
+
+        # Running again reuses the players
+        run_tournament(db, ["greedy"], range(2), height=12, width=20, max_ticks=2000, workers=1)
+        assert len(db.get_all_players()) == 2
+        db.close_persistent()
+
+
+def test_only_finished_games_keep_their_replays():
+    """A game cut off at max_ticks is saved without a replay, so it is never flagged."""
+    score, ticks, duration, replay = play_episode(POLICIES["autopilot"](0), 0, 12, 20, 50, record=True)
+    assert ticks == 50 and replay is None
+
+    score, ticks, duration, replay = play_episode(POLICIES["random"](0), 0, 12, 20, 20000, record=True)
+    assert ticks < 20000 and replay is not None
+    assert verify_session(1, score, duration, replay)['reason'] is None
+
+
+class FailingDatabase(SnakeGameDatabaseManager):
+    """A manager whose bulk inserts always fail."""
+
+    def add_game_sessions_bulk(self, sessions):
+        return []
+
+
+def test_failed_saves_are_raised():
+    """A batch the database rejects stops the tournament instead of being dropped."""
+    with temp_db_file() as db_file:
+        db = FailingDatabase(db_file, persistent=True)
+        try:
+            run_tournament(db, ["greedy"], range(2), height=12, width=20, max_ticks=2000, workers=1)
+            assert False, "the failed save was not reported"
+        except sqlite3.Error:
+            pass
+        db.close_persistent()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Multi-core bot tournament for the Snake Game.
+
+Runs every policy on every seed with the headless SnakeEngine, spread over
+a process pool, and streams the finished games into the database as one
+player per policy and one game session per episode. Sessions are saved with
+add_game_sessions_bulk() in large transactions while the workers keep
+playing, so the database keeps up with any number of cores.
+
+Usage:
+    python tournament.py [--policies autopilot greedy random] [--seeds 1000]
+                         [--workers N] [--board 20x60] [--db snake_game.db]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from autopilot import Autopilot
+from replay import ReplayRecorder, tick_delay
+from snake_engine import SnakeEngine, DIRECTIONS, DIRECTION_DELTAS, OPPOSITE
+
+# Players are named after their policy, e.g. "bot:autopilot"
+PLAYER_PREFIX = "bot:"
+
+
+def _surviving_moves(engine):
+    """Directions that do not end the game on the next tick."""
+    head_y, head_x = engine.head
+    tail = engine.body[-1]
+    moves = []
+    for direction in DIRECTIONS:
+        if direction == OPPOSITE[engine.direction]:
+            continue
+        dy, dx = DIRECTION_DELTAS[direction]
+        cell = (head_y + dy, head_x + dx)
+        if not (0 < cell[0] < engine.height - 2 and 0 < cell[1] < engine.width - 2):
+            continue
+        # The tail moves out of the way unless the snake is eating
+        if cell in engine.occupied and cell != tail:
+            continue
+        moves.append((direction, cell))
+    return moves
+
+
+class RandomPolicy:
+    """Picks uniformly among the moves that survive the next tick."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def decide(self, engine):
+        moves = _surviving_moves(engine)
+        return self.rng.choice(moves)[0] if moves else None
+
+
+class GreedyPolicy:
+    """Takes the surviving move closest to the food, ignoring what comes after."""
+
+    def decide(self, engine):
+        moves = _surviving_moves(engine)
+        if not moves:
+            return None
+        if engine.food is None:
+            return moves[0][0]
+        food_y, food_x = engine.food
+        return min(moves, key=lambda move: abs(move[1][0] - food_y) + abs(move[1][1] - food_x))[0]
+
+
+# Policy name mapped to a factory taking the episode's seed, so every
+# episode plays the same way however the seeds are split between workers
+POLICIES = {
+    "autopilot": lambda seed: Autopilot(),
+    "greedy": lambda seed: GreedyPolicy(),
+    "random": lambda seed: RandomPolicy(seed),
+}
+
+
+def play_episode(policy, seed, height, width, max_ticks, record=False):
+    """
+    Play one game with a policy.
+
+    Args:
+        policy: Object with a decide(engine) method returning a direction
+        seed (int): Seed for the game
+        height (int): Board height
+        width (int): Board width
+        max_ticks (int): Ticks after which the game is cut off
+        record (bool): Also return an encoded replay
+
+    Returns:
+        tuple: (score, ticks, duration in seconds of live play, replay or None).
+            A game cut off at max_ticks has no replay, since its replay would
+            end before the game is over and fail verification.
+    """
+    engine = SnakeEngine(height, width, seed=seed)
+    recorder = ReplayRecorder(seed, height, width, engine.food_value) if record else None
+    decide = policy.decide
+    step = engine.step
+    duration = 0.0
+    while not engine.game_over and engine.ticks < max_ticks:
+        direction = decide(engine)
+        if recorder and engine.would_turn(direction):
+            recorder.record_input(engine.ticks + 1, direction)
+        duration += tick_delay(engine.score)
+        step(direction)
+    replay = recorder.finish(engine.ticks) if recorder and engine.game_over else None
+    return engine.score, engine.ticks, round(duration), replay
+
+
+def run_chunk(policy_name, seeds, height, width, max_ticks, record=False):
+    """
+    Play a run of seeds with one policy in a worker process.
+
+    Returns:
+        list: (policy_name, seed, score, ticks, duration, replay) tuples
+    """
+    factory = POLICIES[policy_name]
+    return [
+        (policy_name, seed) + play_episode(factory(seed), seed, height, width, max_ticks, record)
+        for seed in seeds
+    ]
+
+
+def run_tournament(db, policies, seeds, height=20, width=60, max_ticks=20000, workers=None,
+                   chunk_size=8, batch_size=5000, record=False, progress=None):
+    """
+    Play every policy on every seed and save the games.
+
+    Args:
+        db (SnakeGameDatabaseManager): Database to save players and sessions in
+        policies (list): Names of policies from POLICIES
+        seeds (range): Seeds each policy plays
+        height (int): Board height
+        width (int): Board width
+        max_ticks (int): Ticks after which a game is cut off
+        workers (int, optional): Worker processes; defaults to the CPU count
+        chunk_size (int): Episodes sent to a worker at a time
+        batch_size (int): Sessions saved per transaction
+        record (bool): Save a replay with every session that played to the end
+        progress (callable, optional): Called with (episodes, ticks) after each chunk
+
+    Returns:
+        dict: Policy name mapped to a summary with games, mean_score,
+            best_score and mean_ticks
+
+    Raises:
+        sqlite3.Error: If a batch of sessions could not be saved
+    """
+    workers = workers or os.cpu_count() or 1
+    player_ids = {}
+    for name in policies:
+        username = PLAYER_PREFIX + name
+        player = db.get_player(username=username)
+        player_ids[name] = player['id'] if player else db.add_player(username)
+
+    chunks = (
+        (name, seeds[i:i + chunk_size])
+        for name in policies
+        for i in range(0, len(seeds), chunk_size)
+    )
+    summary = {name: {'games': 0, 'total_score': 0, 'best_score': 0, 'total_ticks': 0}
+               for name in policies}
+    pending = []
+    episodes = 0
+    ticks = 0
+
+    def save():
+        if pending:
+            if not db.add_game_sessions_bulk(pending):
+                raise sqlite3.Error(f"Failed to save {len(pending)} game sessions")
+            pending.clear()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep every worker busy without queueing the whole tournament up front
+            while not exhausted and len(in_flight) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                name, chunk_seeds = chunk
+                in_flight.add(executor.submit(
+                    run_chunk, name, chunk_seeds, height, width, max_ticks, record
+                ))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for name, seed, score, episode_ticks, duration, replay in future.result():
+                    pending.append((player_ids[name], score, duration, None, replay))
+                    stats = summary[name]
+                    stats['games'] += 1
+                    stats['total_score'] += score
+                    stats['best_score'] = max(stats['best_score'], score)
+                    stats['total_ticks'] += episode_ticks
+                    episodes += 1
+                    ticks += episode_ticks
+            if len(pending) >= batch_size:
+                save()
+            if progress:
+                progress(episodes, ticks)
+    save()
+
+    return {
+        name: {
+            'games': stats['games'],
+            'mean_score': stats['total_score'] / max(stats['games'], 1),
+            'best_score': stats['best_score'],
+            'mean_ticks': stats['total_ticks'] / max(stats['games'], 1),
+        }
+        for name, stats in summary.items()
+    }
+
+
+def main(argv=None):
+    """Run a tournament and report progress, throughput and per-policy results."""
+    parser = argparse.ArgumentParser(description="Run Snake bot policies over many seeds.")
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES),
+                        help="policies to play")
+    parser.add_argument("--seeds", type=int, default=1000, help="seeds each policy plays")
+    parser.add_argument("--seed-start", type=int, default=0, help="first seed")
+    parser.add_argument("--board", default="20x60", help="board size as HEIGHTxWIDTH")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="ticks after which a game is cut off")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="episodes per work unit")
+    parser.add_argument("--batch-size", type=int, default=5000, help="sessions saved per transaction")
+    parser.add_argument("--replays", action="store_true", help="save a replay with every session that ends before --max-ticks")
+    parser.add_argument("--db", default="snake_game.db", help="path to the game database")
+    args = parser.parse_args(argv)
+
+    from database_manager import SnakeGameDatabaseManager
+
+    height, width = (int(n) for n in args.board.lower().split("x"))
+    seeds = range(args.seed_start, args.seed_start + args.seeds)
+    total = len(seeds) * len(args.policies)
+    start = time.perf_counter()
+
+    def report(episodes, ticks):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"\r{episodes:,}/{total:,} episodes ({episodes / total:.0%}), "
+              f"{episodes / elapsed:,.0f} episodes/s, {ticks / elapsed:,.0f} ticks/s",
+              end="", flush=True)
+
+    db = SnakeGameDatabaseManager(args.db, persistent=True)
+    try:
+        results = run_tournament(
+            db, args.policies, seeds, height, width, args.max_ticks, args.workers,
+            args.chunk_size, args.batch_size, args.replays, progress=report
+        )
+    finally:
+        db.close_persistent()
+    print()
+    print(f"Played {total:,} episodes in {time.perf_counter() - start:.1f}s")
+    print(f"{'policy':>10} {'games':>8} {'mean score':>11} {'best':>7} {'mean ticks':>11}")
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['mean_score']):
+        print(f"{name:>10} {result['games']:>8,} {result['mean_score']:>11,.1f} "
+              f"{result['best_score']:>7,} {result['mean_ticks']:>11,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())